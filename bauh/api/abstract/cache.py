@@ -35,6 +35,13 @@ class MemoryCache(ABC):
     def clean_expired(self):
         pass
 
+    @abstractmethod
+    def get_stats(self) -> dict:
+        """
+        :return: 'entries', 'bytes' ( estimated ), 'hits', 'misses' and 'evictions' of the cache
+        """
+        pass
+
 
 class MemoryCacheFactory(ABC):
     """
@@ -42,9 +49,11 @@ class MemoryCacheFactory(ABC):
     """
 
     @abstractmethod
-    def new(self, expiration: int) -> MemoryCache:
+    def new(self, expiration: int, max_entries: int = None, max_bytes: int = None) -> MemoryCache:
         """
         :param expiration: expiration time for the cache keys in seconds. Use -1 to disable this feature.
+        :param max_entries: max number of keys. The least recently used keys are removed when it is exceeded.
+        :param max_bytes: max number of bytes the cached values can take. The least recently used keys are removed when it is exceeded.
         :return:
         """
         pass
@@ -6,13 +6,15 @@ from bauh.api.abstract.cache import MemoryCacheFactory
 from bauh.api.abstract.disk import DiskCacheLoaderFactory
 from bauh.api.abstract.download import FileDownloader
 from bauh.api.http import HttpClient
+from bauh.commons.internet import InternetChecker
+from bauh.commons.store import PackageDataStore
 
 
 class ApplicationContext:
 
     def __init__(self, disk_cache: bool, download_icons: bool, http_client: HttpClient, app_root_dir: str, i18n: dict,
                  cache_factory: MemoryCacheFactory, disk_loader_factory: DiskCacheLoaderFactory,
-                 logger: logging.Logger, file_downloader: FileDownloader):
+                 logger: logging.Logger, file_downloader: FileDownloader, disk_store: PackageDataStore, internet_checker: InternetChecker = None):
         """
         :param disk_cache: if package data should be cached to disk
         :param download_icons: if packages icons should be downloaded
@@ -23,6 +25,8 @@ class ApplicationContext:
         :param disk_loader_factory:
         :param logger: a logger instance
         :param file_downloader:
+        :param disk_store: where the packages data are cached to the disk
+        :param internet_checker: a shared instance that knows if the internet connection is available ( a new one watching the http_client is created if not informed )
         """
         self.disk_cache = disk_cache
         self.download_icons = download_icons
@@ -33,6 +37,8 @@ class ApplicationContext:
         self.disk_loader_factory = disk_loader_factory
         self.logger = logger
         self.file_downloader = file_downloader
+        self.disk_store = disk_store
+        self.internet_checker = internet_checker if internet_checker else InternetChecker(logger, http_client)
         self.arch_x86_64 = sys.maxsize > 2**32
 
     def is_system_x86_64(self):
@@ -1,9 +1,8 @@
-import json
 import os
 import shutil
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Set, Type
+from typing import List, Set, Type, Dict, Callable
 
 from bauh.api.abstract.context import ApplicationContext
 from bauh.api.abstract.disk import DiskCacheLoader
@@ -13,15 +12,17 @@ from bauh.api.abstract.model import SoftwarePackage, PackageUpdate, PackageHisto
 
 class SearchResult:
 
-    def __init__(self, installed: List[SoftwarePackage], new: List[SoftwarePackage], total: int):
+    def __init__(self, installed: List[SoftwarePackage], new: List[SoftwarePackage], total: int, timings: Dict[str, float] = None):
         """
         :param installed: already installed packages
         :param new: new packages found
         :param total: total number of applications actually found
+        :param timings: seconds taken by each manager to return its results ( manager class name as key )
         """
         self.installed = installed
         self.new = new
         self.total = total
+        self.timings = timings if timings is not None else {}
 
 
 class SoftwareManager(ABC):
@@ -37,11 +38,12 @@ class SoftwareManager(ABC):
         self.context = context
 
     @abstractmethod
-    def search(self, words: str, disk_loader: DiskCacheLoader, limit: int) -> SearchResult:
+    def search(self, words: str, disk_loader: DiskCacheLoader, limit: int, on_partial: Callable[[SearchResult], None] = None) -> SearchResult:
         """
         :param words: the words typed by the user
         :param disk_loader: a running disk loader thread that loads package data from the disk asynchronously
         :param limit: the max number of packages to be retrieved. <= 1 should retrieve everything
+        :param on_partial: optional. Managers retrieving the packages in several steps can call it with all the packages found so far, so they are displayed before the search finishes.
         :return:
         """
         pass
@@ -75,8 +77,11 @@ class SoftwareManager(ABC):
         :param pkg:
         :return:
         """
-        if pkg.supports_disk_cache() and os.path.exists(pkg.get_disk_cache_path()):
-            shutil.rmtree(pkg.get_disk_cache_path())
+        if pkg.supports_disk_cache():
+            self.context.disk_store.delete(pkg.get_disk_data_key())
+
+            if os.path.exists(pkg.get_disk_cache_path()):
+                shutil.rmtree(pkg.get_disk_cache_path())
 
     @abstractmethod
     def update(self, pkg: SoftwarePackage, root_password: str, watcher: ProcessWatcher) -> bool:
@@ -153,6 +158,12 @@ class SoftwareManager(ABC):
         :return: if the instance can work based on what is installed in the user's machine.
         """
 
+    def get_hosts(self) -> Set[str]:
+        """
+        :return: the hosts the instance retrieves data from. They are used to check the internet connection.
+        """
+        return set()
+
     def cache_to_disk(self, pkg: SoftwarePackage, icon_bytes: bytes, only_icon: bool):
         """
         Saves the package data to the hard disk.
@@ -164,12 +175,10 @@ class SoftwareManager(ABC):
         if self.context.disk_cache and pkg.supports_disk_cache():
 
             if not only_icon:
-                Path(pkg.get_disk_cache_path()).mkdir(parents=True, exist_ok=True)
                 data = pkg.get_data_to_cache()
 
                 if data:
-                    with open(pkg.get_disk_data_path(), 'w+') as f:
-                        f.write(json.dumps(data))
+                    self.context.disk_store.put(pkg.get_disk_data_key(), data)
 
             if icon_bytes:
                 Path(pkg.get_disk_cache_path()).mkdir(parents=True, exist_ok=True)
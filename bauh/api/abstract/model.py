@@ -1,3 +1,4 @@
+import os
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import List
@@ -124,8 +125,11 @@ class SoftwarePackage(ABC):
     def get_disk_icon_path(self):
         return '{}/icon.png'.format(self.get_disk_cache_path())
 
-    def get_disk_data_path(self):
-        return '{}/data.json'.format(self.get_disk_cache_path())
+    def get_disk_data_key(self):
+        """
+        :return: the key identifying the package data in the disk data store ( its cache path relative to the cache root )
+        """
+        return os.path.relpath(self.get_disk_cache_path(), CACHE_PATH)
 
     @abstractmethod
     def get_data_to_cache(self) -> dict:
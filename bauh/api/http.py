@@ -1,36 +1,288 @@
+import hashlib
+import json
 import logging
+import os
 import time
 import traceback
+from pathlib import Path
+from threading import Lock
+from typing import Callable
+from urllib.parse import urlparse
 
 import requests
+from requests.structures import CaseInsensitiveDict
+
+from bauh.api.constants import CACHE_PATH
+from bauh.commons import metrics
+
+HTTP_CACHE_PATH = CACHE_PATH + '/http'
+HTTP_CACHE_MAX_SIZE = 50 * 1024 * 1024  # bytes
+HTTP_CACHE_HOST_TTLS = {  # seconds a cached response is considered fresh ( without revalidating it )
+    'aur.archlinux.org': 60,
+    'flathub.org': 60 * 60,
+    'search.apps.ubuntu.com': 60 * 60
+}
+
+
+class HttpDiskCache:
+    """
+    Persists successful GET responses to the disk. A cached response is returned without any request while it is fresh
+    ( see 'host_ttls' ). After that it is revalidated through a conditional request ( If-None-Match / If-Modified-Since ),
+    so unchanged resources are not downloaded again. The least recently used responses are removed when 'max_size' is exceeded.
+    """
+
+    def __init__(self, logger: logging.Logger, path: str = HTTP_CACHE_PATH, max_size: int = HTTP_CACHE_MAX_SIZE,
+                 host_ttls: dict = None, default_ttl: int = 0):
+        """
+        :param logger:
+        :param path: directory where the responses are saved
+        :param max_size: max number of bytes all cached bodies can take
+        :param host_ttls: seconds the responses of each host are fresh
+        :param default_ttl: seconds the responses of hosts not defined in 'host_ttls' are fresh. 0 means always revalidate.
+        """
+        self.logger = logger
+        self.path = path
+        self.max_size = max_size
+        self.host_ttls = host_ttls if host_ttls is not None else HTTP_CACHE_HOST_TTLS
+        self.default_ttl = default_ttl
+        self.lock = Lock()
+        self._index = None  # key -> {'size': body size, 'accessed_at': last access timestamp}
+        self._size = 0
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return '{}/{}.json'.format(self.path, key)
+
+    def _body_path(self, key: str) -> str:
+        return '{}/{}.body'.format(self.path, key)
+
+    def _load_index(self):
+        if self._index is None:
+            self._index, self._size = {}, 0
+
+            if os.path.isdir(self.path):
+                for f in os.scandir(self.path):
+                    if f.name.endswith('.body'):
+                        stat = f.stat()
+                        self._index[f.name.split('.')[0]] = {'size': stat.st_size, 'accessed_at': stat.st_mtime}
+                        self._size += stat.st_size
+
+    def _write(self, file_path: str, content: bytes):
+        tmp_path = file_path + '.tmp'
+
+        with open(tmp_path, 'wb+') as f:
+            f.write(content)
+
+        os.replace(tmp_path, file_path)  # atomic: readers never see a partially written file
+
+    def _remove(self, key: str):
+        for file_path in (self._meta_path(key), self._body_path(key)):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        entry = self._index.pop(key, None)
+
+        if entry:
+            self._size -= entry['size']
+
+    def _evict(self):
+        if self._size > self.max_size:
+            for key, _ in sorted(self._index.items(), key=lambda e: e[1]['accessed_at']):
+                self._remove(key)
+
+                if self._size <= self.max_size:
+                    break
+
+    def get_ttl(self, url: str) -> int:
+        return self.host_ttls.get(urlparse(url).hostname, self.default_ttl)
+
+    def get(self, url: str) -> dict:
+        """
+        :param url:
+        :return: the cached entry ( 'meta' and 'body' ) or None
+        """
+        key = self._key(url)
+
+        with self.lock:
+            self._load_index()
+
+            if key not in self._index:
+                return
+
+            try:
+                with open(self._meta_path(key)) as f:
+                    meta = json.loads(f.read())
+
+                with open(self._body_path(key), 'rb') as f:
+                    body = f.read()
+            except:
+                self.logger.warning("Could not read the cached response of '{}'".format(url))
+                self._remove(key)
+                return
+
+            self._index[key]['accessed_at'] = time.time()
+            os.utime(self._body_path(key))  # keeps the LRU order between sessions
+
+        return {'meta': meta, 'body': body}
+
+    def is_fresh(self, url: str, entry: dict) -> bool:
+        return entry['meta']['stored_at'] + self.get_ttl(url) > time.time()
+
+    def get_validation_headers(self, entry: dict) -> dict:
+        headers = {}
+
+        if entry['meta'].get('etag'):
+            headers['If-None-Match'] = entry['meta']['etag']
+
+        if entry['meta'].get('last_modified'):
+            headers['If-Modified-Since'] = entry['meta']['last_modified']
+
+        return headers
+
+    def to_response(self, url: str, entry: dict) -> requests.Response:
+        res = requests.Response()
+        res.url = url
+        res.status_code = 200
+        res.headers = CaseInsensitiveDict(entry['meta'].get('headers', {}))
+        res.encoding = entry['meta'].get('encoding')
+        res._content = entry['body']
+        return res
+
+    def revalidated(self, url: str, entry: dict):
+        """
+        Marks a cached entry as fresh again ( the server answered '304 Not Modified' )
+        :param url:
+        :param entry:
+        :return:
+        """
+        entry['meta']['stored_at'] = time.time()
+        key = self._key(url)
+
+        with self.lock:
+            try:
+                self._write(self._meta_path(key), json.dumps(entry['meta']).encode())
+            except:
+                self.logger.warning("Could not update the cached response of '{}'".format(url))
+
+    def store(self, url: str, res: requests.Response):
+        etag, last_modified = res.headers.get('ETag'), res.headers.get('Last-Modified')
+
+        if not etag and not last_modified and self.get_ttl(url) <= 0:
+            return  # it could never be reused
+
+        body = res.content
+
+        if body is None or len(body) > self.max_size / 10:
+            return
+
+        meta = {'url': url,
+                'stored_at': time.time(),
+                'etag': etag,
+                'last_modified': last_modified,
+                'encoding': res.encoding,
+                'headers': {h: v for h, v in res.headers.items() if h.lower() in ('content-type', 'etag', 'last-modified')}}
+        key = self._key(url)
+
+        with self.lock:
+            self._load_index()
+
+            try:
+                Path(self.path).mkdir(parents=True, exist_ok=True)
+                self._write(self._body_path(key), body)
+                self._write(self._meta_path(key), json.dumps(meta).encode())
+            except:
+                self.logger.warning("Could not cache the response of '{}'".format(url))
+                traceback.print_exc()
+                return
+
+            old = self._index.get(key)
+
+            if old:
+                self._size -= old['size']
+
+            self._index[key] = {'size': len(body), 'accessed_at': time.time()}
+            self._size += len(body)
+            self._evict()
 
 
 class HttpClient:
 
-    def __init__(self, logger: logging.Logger, max_attempts: int = 2, timeout: int = 30, sleep: float = 0.5):
+    def __init__(self, logger: logging.Logger, max_attempts: int = 2, timeout: int = 30, sleep: float = 0.5, cache: HttpDiskCache = None):
         self.max_attempts = max_attempts
         self.session = requests.Session()
         self.timeout = timeout
         self.sleep = sleep
         self.logger = logger
+        self.cache = cache
+        self.connection_listeners = []
+
+    def add_connection_listener(self, listener: Callable[[bool], None]):
+        """
+        :param listener: called with True every time a request reaches its host and with False every time it fails to connect
+        :return:
+        """
+        self.connection_listeners.append(listener)
+
+    def _notify_connection(self, available: bool):
+        for listener in self.connection_listeners:
+            listener(available)
+
+    def get(self, url: str, headers: dict = None):
+        """
+        :param url:
+        :param headers: additional request headers. If conditional headers are sent ( e.g: If-None-Match ), a '304' response is returned as well.
+        :return: the response or None if it could not be retrieved
+        """
+        with metrics.registry.span('http.get:{}'.format(urlparse(url).hostname)):
+            return self._get(url, headers)
+
+    def _get(self, url: str, headers: dict = None):
+        use_cache = self.cache and not headers  # requests with custom headers are not cached
+        cached = self.cache.get(url) if use_cache else None
+
+        if cached:
+            if self.cache.is_fresh(url, cached):
+                metrics.registry.inc('http.cache.fresh')
+                return self.cache.to_response(url, cached)
+
+            req_headers = self.cache.get_validation_headers(cached)
+        else:
+            req_headers = headers
 
-    def get(self, url: str):
         cur_attempts = 1
 
         while cur_attempts <= self.max_attempts:
             cur_attempts += 1
 
             try:
-                res = self.session.get(url, timeout=self.timeout)
+                res = self.session.get(url, timeout=self.timeout, headers=req_headers)
+                self._notify_connection(True)
+                metrics.registry.inc('http.status:{}'.format(res.status_code))
 
                 if res.status_code == 200:
+                    if use_cache:
+                        self.cache.store(url, res)
+
                     return res
 
+                if res.status_code == 304:
+                    if cached:
+                        metrics.registry.inc('http.cache.not_modified')
+                        self.cache.revalidated(url, cached)
+                        return self.cache.to_response(url, cached)
+                    elif headers:  # conditional request made by the caller
+                        return res
+
                 if self.sleep > 0:
                     time.sleep(self.sleep)
             except Exception as e:
+                metrics.registry.inc('http.errors')
+
                 if isinstance(e, requests.exceptions.ConnectionError):
-                    self.logger.error('Internet seems to be off')
+                    self._notify_connection(False)  # the connection state is probed again ( only this host may be unreachable )
+                    self.logger.error("Could not connect to '{}'".format(urlparse(url).hostname))
                     raise
 
                 self.logger.error("Could not retrieve data from '{}'".format(url))
@@ -48,7 +300,8 @@ class HttpClient:
         :param url:
         :return:
         """
-        res = self.session.head(url)
+        with metrics.registry.span('http.head:{}'.format(urlparse(url).hostname)):
+            res = self.session.head(url)
 
         if res.status_code == 200:
             return res.headers['content-length']
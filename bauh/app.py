@@ -1,3 +1,4 @@
+import atexit
 import os
 import sys
 
@@ -6,7 +7,10 @@ from PyQt5.QtWidgets import QApplication
 
 from bauh import __version__, __app_name__, app_args, ROOT_DIR
 from bauh.api.abstract.controller import ApplicationContext
-from bauh.api.http import HttpClient
+from bauh.api.http import HttpClient, HttpDiskCache
+from bauh.commons import metrics
+from bauh.commons.internet import InternetChecker
+from bauh.commons.store import PackageDataStore
 from bauh.view.core import gems, config
 from bauh.view.core.controller import GenericSoftwareManager
 from bauh.view.core.downloader import AdaptableFileDownloader
@@ -25,21 +29,29 @@ def main():
     logger = logs.new_logger(__app_name__, bool(args.logs))
     app_args.validate(args, logger)
 
+    if args.metrics or args.metrics_file:
+        metrics.registry.enable()
+        atexit.register(metrics.registry.dump, args.metrics_file)
+
     i18n_key, i18n = util.get_locale_keys(args.locale)
 
     cache_cleaner = CacheCleaner()
-    cache_factory = DefaultMemoryCacheFactory(expiration_time=args.cache_exp, cleaner=cache_cleaner)
-    icon_cache = cache_factory.new(args.icon_exp)
+    cache_factory = DefaultMemoryCacheFactory(expiration_time=args.cache_exp, cleaner=cache_cleaner, max_entries=args.cache_max_entries)  # <= 0: no limit
+    icon_cache = cache_factory.new(args.icon_exp, max_bytes=args.icon_cache_size * 1024 * 1024)
 
+    disk_store = PackageDataStore(logger)
+    http_client = HttpClient(logger, cache=HttpDiskCache(logger) if args.http_cache else None)
     context = ApplicationContext(i18n=i18n,
-                                 http_client=HttpClient(logger),
+                                 http_client=http_client,
                                  disk_cache=args.disk_cache,
                                  download_icons=args.download_icons,
                                  app_root_dir=ROOT_DIR,
                                  cache_factory=cache_factory,
-                                 disk_loader_factory=DefaultDiskCacheLoaderFactory(disk_cache_enabled=args.disk_cache, logger=logger),
+                                 disk_loader_factory=DefaultDiskCacheLoaderFactory(disk_cache_enabled=args.disk_cache, logger=logger, disk_store=disk_store),
                                  logger=logger,
-                                 file_downloader=AdaptableFileDownloader(logger, bool(args.download_mthread)))
+                                 file_downloader=AdaptableFileDownloader(logger, bool(args.download_mthread)),
+                                 disk_store=disk_store,
+                                 internet_checker=InternetChecker(logger, http_client))
     user_config = config.read()
 
     app = QApplication(sys.argv)
@@ -14,6 +14,10 @@ def read() -> Namespace:
                         help='default memory caches expiration time in SECONDS. Default: %(default)s')
     parser.add_argument('-ie', '--icon-exp', action="store", default=int(os.getenv('BAUH_ICON_EXPIRATION', 60 * 5)),
                         type=int, help='cached icons expiration time in SECONDS. Default: %(default)s')
+    parser.add_argument('-cm', '--cache-max-entries', action="store", default=int(os.getenv('BAUH_CACHE_MAX_ENTRIES', 5000)),
+                        type=int, help='maximum number of keys each memory cache can hold. The least recently used keys are removed first. Use -1 for no limit. Default: %(default)s')
+    parser.add_argument('-is', '--icon-cache-size', action="store", default=int(os.getenv('BAUH_ICON_CACHE_SIZE', 50)),
+                        type=int, help='maximum size in MEGABYTES the cached icons can take. The least recently used icons are removed first. Use -1 for no limit. Default: %(default)s')
     parser.add_argument('-l', '--locale', action="store", default=os.getenv('BAUH_LOCALE'), help='Locale key. e.g: en, es, pt, ...')
     parser.add_argument('-i', '--check-interval', action="store", default=int(os.getenv('BAUH_CHECK_INTERVAL', 60)),
                         type=int, help='Updates check interval in SECONDS. Default: %(default)s')
@@ -36,6 +40,10 @@ def read() -> Namespace:
     parser.add_argument('--logs', action="store", default=int(os.getenv('BAUH_LOGS', 0)), choices=[0, 1], type=int, help='If the application logs should be displayed. Default: %(default)s')
     parser.add_argument('--show-panel', action="store_true", help='Shows the management panel after the app icon is attached to the tray.')
     parser.add_argument('-dmt', '--download-mthread', action="store", default=os.getenv('BAUH_DOWNLOAD_MULTITHREAD', 1), choices=[0, 1], type=int, help='If installation files should be downloaded using multi-threads (only possible if aria2c is installed). Not all gems support this feature. Check README.md. Default: %(default)s')
+    parser.add_argument('-gt', '--gem-timeout', action="store", default=int(os.getenv('BAUH_GEM_TIMEOUT', 60)), type=int, help='Maximum time in SECONDS a gem has to return its installed packages. Gems taking longer are ignored so they do not hold the others up. Default: %(default)s')
+    parser.add_argument('--http-cache', action="store", default=os.getenv('BAUH_HTTP_CACHE', 0), choices=[0, 1], type=int, help='If the HTTP responses should be cached to the disk and revalidated ( ETag / Last-Modified ) instead of fully downloaded again. Default: %(default)s')
+    parser.add_argument('--metrics', action="store", default=os.getenv('BAUH_METRICS', 0), choices=[0, 1], type=int, help='If timings and counters ( HTTP requests, commands, caches, gems ) should be collected and printed as JSON when the application exits. Default: %(default)s')
+    parser.add_argument('--metrics-file', action="store", default=os.getenv('BAUH_METRICS_FILE'), help='File where the collected metrics should be written as JSON when the application exits ( instead of the standard output ). It enables the metrics collection.')
     return parser.parse_args()
     
     
@@ -47,6 +55,15 @@ def validate(args: Namespace, logger: logging.Logger):
     if args.icon_exp < 0:
         logger.info("'icon-exp' set to '{}': cache will not expire.".format(args.cache_exp))
 
+    if args.cache_max_entries <= 0:
+        logger.info("'cache-max-entries' set to '{}': memory caches will not be limited.".format(args.cache_max_entries))
+
+    if args.icon_cache_size <= 0:
+        logger.info("'icon-cache-size' set to '{}': icon cache will not be limited.".format(args.icon_cache_size))
+
+    if args.metrics or args.metrics_file:
+        logger.info("Metrics enabled. They will be written to {} on exit.".format(args.metrics_file if args.metrics_file else 'the standard output'))
+
     if args.locale and not args.locale.strip():
         logger.info("'locale' set as '{}'. You must provide a valid one. Aborting...".format(args.locale))
         exit(1)
@@ -70,6 +87,13 @@ def validate(args: Namespace, logger: logging.Logger):
     if args.logs == 1:
         logger.info("Logs are enabled")
 
+    if args.gem_timeout <= 0:
+        logger.info("'gem-timeout' set as '{}'. It must be > 0. Aborting...".format(args.gem_timeout))
+        exit(1)
+
+    if args.http_cache == 1:
+        logger.info("HTTP disk cache enabled")
+
     if args.download_mthread == 1:
         logger.info("Multi-threaded downloads enabled")
 
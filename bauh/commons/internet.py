@@ -1,16 +1,102 @@
 import logging
-
-import requests
+import socket
+import time
+from threading import Lock
+from typing import Iterable
 
 from bauh.api.http import HttpClient
 
+PROBE_PORT = 443
+PROBE_TIMEOUT = 3  # seconds
+EXPIRATION = 30  # seconds a connectivity state is trusted before probing again
+
+
+class InternetChecker:
+    """
+    Keeps the internet connection state shared by all operations. The state is updated by a cheap TCP connect probe
+    ( only when the last known state has expired ) and passively by every request made through the HttpClient.
+    A failed request only expires the state: the connection is considered off after the probe confirms it.
+    """
+
+    def __init__(self, logger: logging.Logger, http_client: HttpClient = None, hosts: Iterable[str] = None,
+                 expiration: int = EXPIRATION, timeout: float = PROBE_TIMEOUT):
+        """
+        :param logger:
+        :param http_client: a client whose requests results will update the connection state
+        :param hosts: hosts tried by the probe ( see 'set_hosts' )
+        :param expiration: seconds a known state is valid
+        :param timeout: max seconds to wait for each host connection
+        """
+        self.logger = logger
+        self.hosts = []
+        self.expiration = expiration
+        self.timeout = timeout
+        self.lock = Lock()
+        self._available = None
+        self._updated_at = None  # None: the state must be probed
+
+        if hosts:
+            self.set_hosts(hosts)
+
+        if http_client:
+            http_client.add_connection_listener(self.notify)
+
+    def set_hosts(self, hosts: Iterable[str]):
+        """
+        :param hosts: hosts tried by the probe ( usually the ones the enabled gems retrieve data from ). Only one needs to be reachable.
+        :return:
+        """
+        self.lock.acquire()
+
+        try:
+            self.hosts = sorted(set(hosts))
+        finally:
+            self.lock.release()
+
+    def _probe(self) -> bool:
+        if not self.hosts:
+            return True  # nothing to be reached
+
+        for host in self.hosts:
+            try:
+                socket.create_connection((host, PROBE_PORT), timeout=self.timeout).close()
+                return True
+            except OSError:
+                continue
 
-def is_available(client: HttpClient, logger: logging.Logger) -> bool:
-    try:
-        client.get('https://google.com')
-        return True
-    except requests.exceptions.ConnectionError:
-        if logger:
-            logger.warning('Internet connection seems to be off')
         return False
 
+    def notify(self, available: bool):
+        """
+        Updates the connection state based on something that actually happened ( e.g: a request result ).
+        A failure may concern a single host, so it only expires the known state and the next check probes the connection.
+        :param available:
+        :return:
+        """
+        self.lock.acquire()
+
+        try:
+            if available:
+                self._available = True
+                self._updated_at = time.monotonic()
+            else:
+                self._updated_at = None
+        finally:
+            self.lock.release()
+
+    def is_available(self) -> bool:
+        self.lock.acquire()
+
+        try:
+            if self._updated_at is None or time.monotonic() - self._updated_at > self.expiration:
+                available = self._probe()
+
+                if not available and self.logger:
+                    self.logger.warning('Internet connection seems to be off')
+
+                self._available = available
+                self._updated_at = time.monotonic()
+
+            return self._available
+        finally:
+            self.lock.release()
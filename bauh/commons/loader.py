@@ -0,0 +1,138 @@
+import logging
+import time
+import traceback
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Tuple
+
+from bauh.api.abstract.model import SoftwarePackage, PackageStatus
+from bauh.commons import metrics
+
+
+class AsyncPackageDataLoader(ABC):
+    """
+    Retrieves packages data using a fixed number of threads, no matter how many packages are requested.
+    Packages sharing the same key ( e.g: the same id ) while their data is still being retrieved are filled by a single request.
+    """
+
+    def __init__(self, max_workers: int, logger: logging.Logger):
+        """
+        :param max_workers: max number of simultaneous requests
+        :param logger:
+        """
+        self.logger = logger
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lock = Lock()
+        self._pending = {}  # key -> packages waiting for the same data
+        self.requested = 0
+        self.finished = 0
+        self._fetch_time = 0  # total seconds spent fetching
+        self._max_fetch_time = 0
+
+    @abstractmethod
+    def get_key(self, pkg: SoftwarePackage) -> str:
+        """
+        :param pkg:
+        :return: the key identifying the data to be retrieved for the package
+        """
+        pass
+
+    @abstractmethod
+    def fetch(self, key: str, pkg: SoftwarePackage) -> object:
+        """
+        Retrieves the data associated with a key. Runs in one of the pool threads.
+        :param key:
+        :param pkg: the first package requesting the data
+        :return: the data retrieved or None
+        """
+        pass
+
+    @abstractmethod
+    def fill(self, pkg: SoftwarePackage, data: object):
+        """
+        Fills a package with the retrieved data.
+        :param pkg:
+        :param data:
+        :return:
+        """
+        pass
+
+    def load(self, pkg: SoftwarePackage):
+        """
+        Queues the data retrieval for a given package. The package status is set to READY when its data is filled.
+        :param pkg:
+        :return:
+        """
+        key = self.get_key(pkg)
+        pkg.status = PackageStatus.LOADING_DATA
+
+        self.lock.acquire()
+        try:
+            waiting = self._pending.get(key)
+
+            if waiting is not None:  # the same data is already queued
+                waiting.append(pkg)
+                return
+
+            self._pending[key] = [pkg]
+            self.requested += 1
+        finally:
+            self.lock.release()
+
+        self.executor.submit(self._load, key, pkg)
+
+    def _load(self, key: str, pkg: SoftwarePackage):
+        ti = time.time()
+        try:
+            data = self.fetch(key, pkg)
+        except:
+            self.logger.error("Could not retrieve data for '{}'".format(key))
+            traceback.print_exc()
+            data = None
+
+        fetch_time = time.time() - ti
+        metrics.registry.observe('loader.fetch:{}'.format(self.__class__.__name__), fetch_time)
+
+        self.lock.acquire()
+        try:
+            pkgs = self._pending.pop(key)
+            self.finished += 1
+            self._fetch_time += fetch_time
+            self._max_fetch_time = max(self._max_fetch_time, fetch_time)
+            all_finished = self.finished == self.requested
+        finally:
+            self.lock.release()
+
+        for p in pkgs:
+            try:
+                if data is not None:
+                    self.fill(p, data)
+            except:
+                self.logger.error("Could not fill the data of '{}'".format(key))
+                traceback.print_exc()
+            finally:
+                p.status = PackageStatus.READY
+
+        if all_finished:
+            stats = self.get_metrics()
+            self.logger.info('{}: data of {} packages retrieved ( average latency: {:.2f} seconds, max: {:.2f} seconds )'.format(self.__class__.__name__, stats['finished'], stats['avg_latency'], stats['max_latency']))
+
+    def get_progress(self) -> Tuple[int, int]:
+        """
+        :return: the number of data retrievals finished and requested
+        """
+        return self.finished, self.requested
+
+    def get_metrics(self) -> dict:
+        """
+        :return: 'queued': data retrievals not finished yet ( waiting or running ), 'finished', 'avg_latency' and 'max_latency' of the retrievals in seconds
+        """
+        self.lock.acquire()
+        try:
+            return {'queued': self.requested - self.finished,
+                    'finished': self.finished,
+                    'avg_latency': self._fetch_time / self.finished if self.finished else 0,
+                    'max_latency': self._max_fetch_time}
+        finally:
+            self.lock.release()
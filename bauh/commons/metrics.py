@@ -0,0 +1,177 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from threading import Lock
+from typing import Callable
+
+MAX_SAMPLES = 1000  # recent values kept by each histogram to calculate its percentiles
+MAX_SPANS = 2000  # recent spans kept for the timeline
+
+
+class Histogram:
+
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.samples.append(value)
+
+    def _percentile(self, sorted_samples: list, percent: float) -> float:
+        return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * percent))]
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.samples)
+        return {'count': self.count,
+                'sum': self.total,
+                'min': self.min,
+                'max': self.max,
+                'avg': self.total / self.count if self.count else 0,
+                'p50': self._percentile(samples, 0.5) if samples else None,
+                'p95': self._percentile(samples, 0.95) if samples else None}
+
+
+class Span:
+    """
+    Measures the duration of a block ( 'with registry.span(name) as span' ). The duration is always available through 'span.duration',
+    but it is only recorded if the registry is enabled.
+    """
+
+    def __init__(self, registry: "MetricsRegistry", name: str):
+        self.registry = registry
+        self.name = name
+        self.started_at = None
+        self.duration = None
+        self._start = None
+
+    def __enter__(self) -> "Span":
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self._start
+        self.registry.end_span(self, failed=exc_type is not None)
+
+
+class MetricsRegistry:
+    """
+    Central registry of counters, histograms and spans ( timed blocks ). Nothing is recorded while it is disabled.
+    Its content can be dumped as JSON ( see 'dump' ).
+    """
+
+    def __init__(self, enabled: bool = False, max_spans: int = MAX_SPANS):
+        self.enabled = enabled
+        self.created_at = time.time()
+        self.counters = {}
+        self.histograms = {}
+        self.spans = deque(maxlen=max_spans)
+        self.sources = {}
+        self.lock = Lock()
+        self._pid = os.getpid()
+
+    def _acquire(self):
+        if self._pid != os.getpid():  # forked process: the lock could have been copied while held by another thread
+            self.lock = Lock()
+            self._pid = os.getpid()
+
+        self.lock.acquire()
+
+    def enable(self):
+        self.enabled = True
+
+    def inc(self, name: str, value: int = 1):
+        if self.enabled:
+            self._acquire()
+            try:
+                self.counters[name] = self.counters.get(name, 0) + value
+            finally:
+                self.lock.release()
+
+    def observe(self, name: str, value: float):
+        if self.enabled:
+            self._acquire()
+            try:
+                self._observe(name, value)
+            finally:
+                self.lock.release()
+
+    def _observe(self, name: str, value: float):
+        histogram = self.histograms.get(name)
+
+        if histogram is None:
+            histogram = Histogram()
+            self.histograms[name] = histogram
+
+        histogram.observe(value)
+
+    def span(self, name: str) -> Span:
+        return Span(self, name)
+
+    def end_span(self, span: Span, failed: bool = False):
+        if self.enabled:
+            self._acquire()
+            try:
+                self._observe(span.name, span.duration)
+                self.spans.append({'name': span.name,
+                                   'start': span.started_at - self.created_at,
+                                   'duration': span.duration,
+                                   'thread': threading.current_thread().name,
+                                   'failed': failed})
+            finally:
+                self.lock.release()
+
+    def add_source(self, name: str, source: Callable[[], object]):
+        """
+        :param name:
+        :param source: called when the metrics are exported. It must return a JSON serializable value ( e.g: cache stats )
+        :return:
+        """
+        self.sources[name] = source
+
+    def to_dict(self) -> dict:
+        self._acquire()
+        try:
+            res = {'pid': os.getpid(),
+                   'uptime': time.time() - self.created_at,
+                   'counters': dict(self.counters),
+                   'histograms': {name: h.to_dict() for name, h in self.histograms.items()},
+                   'spans': [*self.spans]}
+        finally:
+            self.lock.release()
+
+        res['sources'] = {}
+        for name, source in self.sources.items():
+            try:
+                res['sources'][name] = source()
+            except:
+                res['sources'][name] = None
+
+        return res
+
+    def dump(self, file_path: str = None):
+        """
+        Writes all the metrics as JSON
+        :param file_path: output file. If not defined, the metrics are written to the standard output.
+        :return:
+        """
+        content = json.dumps(self.to_dict(), indent=2, sort_keys=True)
+
+        if file_path:
+            with open(file_path, 'w+') as f:
+                f.write(content)
+        else:
+            sys.stdout.write(content + '\n')
+
+
+registry = MetricsRegistry()  # shared by the whole application. Enabled through the app arguments ( see app_args.py )
@@ -0,0 +1,161 @@
+import json
+import logging
+import os
+import sqlite3
+import traceback
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Set
+
+from bauh.api.constants import CACHE_PATH
+
+DB_PATH = CACHE_PATH + '/packages.db'
+LEGACY_DATA_FILE = 'data.json'  # old format: one file per package inside its cache directory
+MAX_QUERY_ARGS = 500  # keeps the queries below the SQLite variables limit
+MIGRATED_VERSION = 1  # database 'user_version' once the old 'data.json' files were imported
+
+
+class PackageDataStore:
+    """
+    Keeps the cached data of all packages in a single SQLite database instead of one file per package.
+    Every write is done in a transaction, and the database can be shared between threads and processes.
+    The old per package 'data.json' files are imported ( and removed ) once. The import is retried while it does not succeed.
+    """
+
+    def __init__(self, logger: logging.Logger, path: str = DB_PATH, legacy_root: str = CACHE_PATH):
+        """
+        :param logger:
+        :param path: database file path
+        :param legacy_root: directory where the old 'data.json' files should be looked for
+        """
+        self.logger = logger
+        self.path = path
+        self.legacy_root = legacy_root
+        self.lock = Lock()
+        self._con = None
+        self._pid = None
+
+    def _acquire(self):
+        if self._pid is not None and self._pid != os.getpid():  # forked process: the parent connection and lock state must not be reused
+            self.lock = Lock()
+            self._con = None
+
+        self.lock.acquire()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._con is None:
+            Path(os.path.dirname(self.path)).mkdir(parents=True, exist_ok=True)
+            self._con = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._pid = os.getpid()
+            self._con.execute('PRAGMA journal_mode=WAL')
+            self._con.execute('CREATE TABLE IF NOT EXISTS package_data (key TEXT PRIMARY KEY, data TEXT NOT NULL)')
+            self._con.commit()
+
+            if self._con.execute('PRAGMA user_version').fetchone()[0] < MIGRATED_VERSION:
+                try:
+                    self._migrate()
+                except:
+                    self.logger.error('Could not migrate the cached package data files to {}. It will be retried.'.format(self.path))
+                    traceback.print_exc()
+
+        return self._con
+
+    def _migrate(self):
+        if not os.path.isdir(self.legacy_root):
+            self._con.execute('PRAGMA user_version = {}'.format(MIGRATED_VERSION))
+            return
+
+        to_import, files = {}, []
+        for dirpath, _, fnames in os.walk(self.legacy_root):
+            if LEGACY_DATA_FILE in fnames:
+                fpath = '{}/{}'.format(dirpath, LEGACY_DATA_FILE)
+
+                try:
+                    with open(fpath) as f:
+                        data = json.loads(f.read())
+
+                    if data:
+                        to_import[os.path.relpath(dirpath, self.legacy_root)] = data
+
+                    files.append(fpath)
+                except:
+                    self.logger.warning("Could not import the cached data from '{}'".format(fpath))
+
+        with self._con:  # the migration is only flagged as done if everything was imported
+            if to_import:
+                self._con.executemany('INSERT OR REPLACE INTO package_data (key, data) VALUES (?, ?)',
+                                      ((key, json.dumps(data)) for key, data in to_import.items()))
+
+            self._con.execute('PRAGMA user_version = {}'.format(MIGRATED_VERSION))
+
+        for fpath in files:
+            try:
+                os.remove(fpath)
+            except OSError:
+                self.logger.warning("Could not remove the migrated file '{}'".format(fpath))
+
+        if files:
+            self.logger.info('{} cached package data files migrated to {}'.format(len(files), self.path))
+
+    def _put_many(self, items: Dict[str, dict]):
+        con = self._get_connection()
+        with con:  # single transaction: everything is written or nothing is
+            con.executemany('INSERT OR REPLACE INTO package_data (key, data) VALUES (?, ?)',
+                            ((key, json.dumps(data)) for key, data in items.items()))
+
+    def put(self, key: str, data: dict):
+        self.put_many({key: data})
+
+    def put_many(self, items: Dict[str, dict]):
+        if items:
+            self._acquire()
+            try:
+                self._put_many(items)
+            finally:
+                self.lock.release()
+
+    def get(self, key: str) -> dict:
+        return self.get_many((key,)).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, dict]:
+        """
+        :param keys:
+        :return: the data found for the given keys
+        """
+        res, keys = {}, [*{*keys}]
+
+        if keys:
+            self._acquire()
+            try:
+                con = self._get_connection()
+
+                for idx in range(0, len(keys), MAX_QUERY_ARGS):
+                    chunk = keys[idx:idx + MAX_QUERY_ARGS]
+
+                    for key, data in con.execute('SELECT key, data FROM package_data WHERE key IN ({})'.format(','.join('?' * len(chunk))), chunk):
+                        try:
+                            res[key] = json.loads(data)
+                        except:
+                            self.logger.warning("Invalid cached data for '{}'".format(key))
+                            traceback.print_exc()
+            finally:
+                self.lock.release()
+
+        return res
+
+    def contains(self, keys: Iterable[str]) -> Set[str]:
+        """
+        :param keys:
+        :return: the keys that have data stored
+        """
+        return {*self.get_many(keys).keys()}
+
+    def delete(self, *keys: str):
+        if keys:
+            self._acquire()
+            try:
+                con = self._get_connection()
+                with con:
+                    con.executemany('DELETE FROM package_data WHERE key = ?', ((k,) for k in keys))
+            finally:
+                self.lock.release()
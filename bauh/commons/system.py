@@ -8,6 +8,7 @@ from typing import List, Tuple
 
 # default environment variables for subprocesses.
 from bauh.api.abstract.handler import ProcessWatcher
+from bauh.commons import metrics
 
 PY_VERSION = "{}.{}".format(sys.version_info.major, sys.version_info.minor)
 GLOBAL_PY_LIBS = '/usr/lib/python{}'.format(PY_VERSION)
@@ -23,7 +24,7 @@ if GLOBAL_PY_LIBS not in PATH:
 USE_GLOBAL_INTERPRETER = bool(os.getenv('VIRTUAL_ENV'))
 
 
-def gen_env(global_interpreter: bool, lang: str = DEFAULT_LANG) -> dict:
+def gen_env(global_interpreter: bool, lang: str = DEFAULT_LANG, extra_env: dict = None) -> dict:
     res = {}
 
     if lang:
@@ -34,9 +35,25 @@ def gen_env(global_interpreter: bool, lang: str = DEFAULT_LANG) -> dict:
     else:
         res['PATH'] = PATH
 
+    if extra_env:
+        res.update(extra_env)
+
     return res
 
 
+def cmd_name(cmd) -> str:
+    """
+    :param cmd: a command string or a list of arguments
+    :return: the program name ( used to group the commands metrics )
+    """
+    args = cmd.split(' ') if isinstance(cmd, str) else cmd
+
+    if args:
+        return os.path.basename(args[2] if args[0] == 'sudo' and len(args) > 2 else args[0])
+
+    return ''
+
+
 class SystemProcess:
 
     """
@@ -59,7 +76,7 @@ class SystemProcess:
 class SimpleProcess:
 
     def __init__(self, cmd: List[str], cwd: str = '.', expected_code: int = None, global_interpreter: bool = USE_GLOBAL_INTERPRETER,
-                 lang: str = DEFAULT_LANG, root_password: str = None):
+                 lang: str = DEFAULT_LANG, root_password: str = None, extra_env: dict = None):
         pwdin, final_cmd = None, []
 
         if root_password is not None:
@@ -68,22 +85,23 @@ class SimpleProcess:
 
         final_cmd.extend(cmd)
 
-        self.instance = self._new(final_cmd, cwd, global_interpreter, lang, stdin=pwdin)
+        self.instance = self._new(final_cmd, cwd, global_interpreter, lang, stdin=pwdin, extra_env=extra_env)
         self.expected_code = expected_code
 
-    def _new(self, cmd: List[str], cwd: str, global_interpreter: bool, lang: str, stdin = None) -> subprocess.Popen:
+    def _new(self, cmd: List[str], cwd: str, global_interpreter: bool, lang: str, stdin = None, extra_env: dict = None) -> subprocess.Popen:
 
         args = {
             "stdout": subprocess.PIPE,
             "stderr": subprocess.STDOUT,
             "bufsize": -1,
             "cwd": cwd,
-            "env": gen_env(global_interpreter, lang)
+            "env": gen_env(global_interpreter, lang, extra_env)
         }
 
         if stdin:
             args['stdin'] = stdin
 
+        metrics.registry.inc('cmd.subprocess:{}'.format(cmd_name(cmd)))
         return subprocess.Popen(cmd, **args)
 
 
@@ -101,6 +119,10 @@ class ProcessHandler:
             self.watcher.print(msg)
 
     def handle(self, process: SystemProcess) -> bool:
+        with metrics.registry.span('cmd.handle:{}'.format(cmd_name(process.subproc.args))):
+            return self._handle(process)
+
+    def _handle(self, process: SystemProcess) -> bool:
         self._notify_watcher(' '.join(process.subproc.args) + '\n')
 
         already_succeeded = False
@@ -143,6 +165,10 @@ class ProcessHandler:
         return process.subproc.returncode is None or process.subproc.returncode == 0
 
     def handle_simple(self, proc: SimpleProcess) -> Tuple[bool, str]:
+        with metrics.registry.span('cmd.handle:{}'.format(cmd_name(proc.instance.args))):
+            return self._handle_simple(proc)
+
+    def _handle_simple(self, proc: SimpleProcess) -> Tuple[bool, str]:
         self._notify_watcher(' '.join(proc.instance.args) + '\n')
 
         output = StringIO()
@@ -181,7 +207,9 @@ def run_cmd(cmd: str, expected_code: int = 0, ignore_return_code: bool = False,
     if not print_error:
         args["stderr"] = subprocess.DEVNULL
 
-    res = subprocess.run(cmd, **args)
+    with metrics.registry.span('cmd.run:{}'.format(cmd_name(cmd))):
+        res = subprocess.run(cmd, **args)
+
     return res.stdout.decode() if ignore_return_code or res.returncode == expected_code else None
 
 
@@ -198,6 +226,7 @@ def new_subprocess(cmd: List[str], cwd: str = '.', shell: bool = False, stdin =
     if input:
         args['stdin'] = stdin
 
+    metrics.registry.inc('cmd.subprocess:{}'.format(cmd_name(cmd)))
     return subprocess.Popen(cmd, **args)
 
 
@@ -211,6 +240,7 @@ def new_root_subprocess(cmd: List[str], root_password: str, cwd: str = '.',
 
     final_cmd.extend(cmd)
 
+    metrics.registry.inc('cmd.root_subprocess:{}'.format(cmd_name(cmd)))
     return subprocess.Popen(final_cmd, stdin=pwdin, stdout=PIPE, stderr=PIPE, cwd=cwd, env=gen_env(global_interpreter, lang))
 
 
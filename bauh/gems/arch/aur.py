@@ -1,51 +1,207 @@
+import logging
 import re
-from typing import Set, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Iterable, Optional
+from urllib.parse import quote
 
 import requests
 
+from bauh.api.abstract.cache import MemoryCache
 from bauh.api.http import HttpClient
+from bauh.gems.arch.metadata import AURMetadataStore
 
 URL_INFO = 'https://aur.archlinux.org/rpc/?v=5&type=info&'
 URL_SRC_INFO = 'https://aur.archlinux.org/cgit/aur.git/plain/.SRCINFO?h='
+URL_PKGBUILD = 'https://aur.archlinux.org/cgit/aur.git/plain/PKGBUILD?h='
 URL_SEARCH = 'https://aur.archlinux.org/rpc/?v=5&type=search&arg='
 
 RE_SRCINFO_KEYS = re.compile(r'(\w+)\s+=\s+(.+)\n')
 
 KNOWN_LIST_FIELDS = ('validpgpkeys', 'depends', 'optdepends', 'sha512sums', 'sha512sums_x86_64', 'source', 'source_x86_64')
 
+MAX_INFO_URL_LENGTH = 4000  # info requests with more names are split into chunks
+MAX_INFO_WORKERS = 4  # chunks requested at the same time
+INFO_CHUNK_ATTEMPTS = 2
+
 
 def map_pkgbuild(pkgbuild: str) -> dict:
     return {attr: val.replace('"', '').replace("'", '').replace('(', '').replace(')', '') for attr, val in re.findall(r'\n(\w+)=(.+)', pkgbuild)}
 
 
+def map_srcinfo(srcinfo: str) -> dict:
+    info = {}
+    for field in RE_SRCINFO_KEYS.findall(srcinfo):
+        if field[0] not in info:
+            info[field[0]] = [field[1]] if field[0] in KNOWN_LIST_FIELDS else field[1]
+        else:
+            if not isinstance(info[field[0]], list):
+                info[field[0]] = [info[field[0]]]
+
+            info[field[0]].append(field[1])
+
+    return info
+
+
 class AURClient:
 
-    def __init__(self, http_client: HttpClient):
+    def __init__(self, http_client: HttpClient, metadata: AURMetadataStore = None, info_cache: MemoryCache = None, logger: logging.Logger = None,
+                 files_cache: MemoryCache = None):
+        """
+        :param http_client:
+        :param metadata: local AUR metadata. If defined ( and loaded ), it is queried before the RPC.
+        :param info_cache: keeps the packages info retrieved from the RPC ( and the names not found ) while not expired
+        :param logger:
+        :param files_cache: keeps the PKGBUILD and .SRCINFO files downloaded mapped by package base ( they are downloaded again when the package is modified )
+        """
         self.http_client = http_client
+        self.metadata = metadata
+        self.info_cache = info_cache
+        self.files_cache = files_cache
+        self.logger = logger
         self.names_index = set()
 
     def search(self, words: str) -> dict:
+        if self.metadata and self.metadata.is_ready():
+            results = self.metadata.search(words)
+            return {'resultcount': len(results), 'results': results}
+
         return self.http_client.get_json(URL_SEARCH + words)
 
-    def get_info(self, names: Set[str]) -> List[dict]:
-        res = self.http_client.get_json(URL_INFO + self._map_names_as_queries(names))
-        return res['results'] if res and res.get('results') else []
+    def get_info(self, names: Iterable[str]) -> List[dict]:
+        if self.metadata and self.metadata.is_ready():
+            found, names = self.metadata.get_info(names)
+        else:
+            found = []
+
+        if self.info_cache:
+            to_request = []
+            for name in names:
+                info = self.info_cache.get(name)
+
+                if info is None:
+                    to_request.append(name)
+                elif info:  # an empty dict means the package was not found
+                    found.append(info)
+        else:
+            to_request = [*names]
+
+        if to_request:
+            found.extend(self._request_info(to_request))
+
+        return found
+
+    def _request_info(self, names: List[str]) -> List[dict]:
+        chunks = self._split_info_queries(names)
+
+        if len(chunks) == 1:
+            results = [self._request_info_chunk(chunks[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_INFO_WORKERS)) as pool:
+                results = [*pool.map(self._request_info_chunk, chunks)]
+
+        res = []
+        for chunk, chunk_res in zip(chunks, results):
+            if chunk_res is not None:
+                res.extend(chunk_res)
+
+                if self.info_cache:
+                    for info in chunk_res:
+                        self.info_cache.add(info['Name'], info)
+
+                    not_found = set(chunk).difference(info['Name'] for info in chunk_res)
+
+                    for name in not_found:
+                        self.info_cache.add(name, {})
+
+        return res
+
+    def _request_info_chunk(self, names: List[str]) -> Optional[List[dict]]:
+        for _ in range(INFO_CHUNK_ATTEMPTS):
+            res = self.http_client.get_json(URL_INFO + self._map_names_as_queries(names))
+
+            if res is not None and res.get('type') != 'error':
+                return res.get('results') or []
+
+        if self.logger:
+            self.logger.warning('Could not retrieve the AUR info of {} packages'.format(len(names)))
+
+    def _split_info_queries(self, names: List[str]) -> List[List[str]]:
+        """
+        :param names:
+        :return: chunks of names fitting in an info request URL
+        """
+        chunks, chunk, url_length = [], [], len(URL_INFO)
+
+        for name in names:
+            arg_length = len(self._map_names_as_queries([name], len(chunk))) + 1
+
+            if chunk and url_length + arg_length > MAX_INFO_URL_LENGTH:
+                chunks.append(chunk)
+                chunk, url_length = [], len(URL_INFO)
+                arg_length = len(self._map_names_as_queries([name])) + 1
+
+            chunk.append(name)
+            url_length += arg_length
+
+        if chunk:
+            chunks.append(chunk)
+
+        return chunks
+
+    def _find_info(self, name: str) -> Optional[dict]:
+        """
+        :param name:
+        :return: the package info already available ( metadata or info cache ) without requesting the RPC
+        """
+        info = self.metadata.get(name) if self.metadata and self.metadata.is_ready() else None
+
+        if not info and self.info_cache:
+            info = self.info_cache.get(name)
+
+        return info or None
+
+    def _get_package_file(self, url: str, name: str, pkgbase: str = None, last_modified: int = None) -> Optional[str]:
+        if not pkgbase or last_modified is None:
+            info = self._find_info(name)
+
+            if info:
+                pkgbase = pkgbase or info.get('PackageBase')
+                last_modified = last_modified if last_modified is not None else info.get('LastModified')
+
+        key = url + (pkgbase or name)
+
+        if self.files_cache:
+            cached = self.files_cache.get(key)
+
+            if cached and (last_modified is None or cached[0] == last_modified):
+                return cached[1]
+
+        res = self.http_client.get(key)
+
+        if res and res.status_code == 200 and res.text:
+            if self.files_cache:
+                self.files_cache.add(key, (last_modified, res.text))
 
-    def get_src_info(self, name: str) -> dict:
-        res = self.http_client.get(URL_SRC_INFO + name)
+            return res.text
 
-        if res and res.text:
-            info = {}
-            for field in RE_SRCINFO_KEYS.findall(res.text):
-                if field[0] not in info:
-                    info[field[0]] = [field[1]] if field[0] in KNOWN_LIST_FIELDS else field[1]
-                else:
-                    if not isinstance(info[field[0]], list):
-                        info[field[0]] = [info[field[0]]]
+    def get_pkgbuild(self, name: str, pkgbase: str = None, last_modified: int = None) -> Optional[str]:
+        """
+        :param name:
+        :param pkgbase: if not defined, it is taken from the package info already retrieved ( or the name is used )
+        :param last_modified: AUR 'LastModified' of the package. A cached file from a different modification is downloaded again.
+        :return: the package PKGBUILD content
+        """
+        return self._get_package_file(URL_PKGBUILD, name, pkgbase, last_modified)
 
-                    info[field[0]].append(field[1])
+    def get_src_info(self, name: str, pkgbase: str = None, last_modified: int = None) -> dict:
+        """
+        Same params as 'get_pkgbuild'
+        :return: the package .SRCINFO fields
+        """
+        srcinfo = self._get_package_file(URL_SRC_INFO, name, pkgbase, last_modified)
 
-            return info
+        if srcinfo:
+            return map_srcinfo(srcinfo)
 
-    def _map_names_as_queries(self, names) -> str:
-        return '&'.join(['arg[{}]={}'.format(i, n) for i, n in enumerate(names)])
+    def _map_names_as_queries(self, names, start: int = 0) -> str:
+        return '&'.join(['arg[{}]={}'.format(i, quote(n, safe='')) for i, n in enumerate(names, start)])
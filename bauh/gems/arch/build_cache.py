@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sys
+from threading import Lock
+from typing import Optional, List, Tuple
+
+from bauh.api.constants import CACHE_PATH
+from bauh.gems.arch import aur
+
+BUILD_CACHE_DIR = CACHE_PATH + '/arch/builds'
+SOURCES_DIR = 'sources'  # sources downloaded by makepkg ( 'SRCDEST' ) for each package base
+DEFAULT_MAX_SIZE = 2048  # MB
+RE_PKG_FILE = re.compile(r'.+\.pkg\.tar(\.\w+)?$')
+
+
+def read_version(srcinfo: dict) -> Optional[str]:
+    """
+    :param srcinfo: .SRCINFO fields
+    :return: the version as displayed by the AUR ( [epoch:]pkgver-pkgrel )
+    """
+    if srcinfo.get('pkgver') and srcinfo.get('pkgrel'):
+        version = '{}-{}'.format(srcinfo['pkgver'], srcinfo['pkgrel'])
+        return '{}:{}'.format(srcinfo['epoch'], version) if srcinfo.get('epoch') else version
+
+
+def is_package_of(file_name: str, pkgname: str) -> bool:
+    """
+    :param file_name: package file name ( pkgname-pkgver-pkgrel-arch.pkg.tar.* )
+    :param pkgname:
+    :return: if the file contains the given package ( and not a package named with the same prefix )
+    """
+    return bool(RE_PKG_FILE.match(file_name)) and file_name.rsplit('-', 3)[0] == pkgname
+
+
+class BuildCache:
+    """
+    Keeps the packages built from the AUR ( and the sources downloaded to build them ) on the disk, so reinstalling or
+    downgrading to an already built version does not build it again. Builds are mapped by package base, version and the
+    PKGBUILD hash. The least recently used builds / sources are removed when the cache exceeds its max size.
+    """
+
+    def __init__(self, path: str = BUILD_CACHE_DIR, max_size: int = DEFAULT_MAX_SIZE * 1024 ** 2, logger: logging.Logger = None):
+        """
+        :param path:
+        :param max_size: max size in bytes
+        :param logger:
+        """
+        self.path = path
+        self.max_size = max_size
+        self.logger = logger
+        self.lock = Lock()
+
+    def get_key(self, project_dir: str) -> Optional[str]:
+        """
+        :param project_dir: directory with the package PKGBUILD and .SRCINFO
+        :return: the build key ( pkgbase/version-hash ) or None if the project files could not be read
+        """
+        try:
+            with open('{}/PKGBUILD'.format(project_dir), 'rb') as f:
+                pkgbuild_hash = hashlib.sha256(f.read()).hexdigest()[0:16]
+
+            with open('{}/.SRCINFO'.format(project_dir)) as f:
+                srcinfo = aur.map_srcinfo(f.read())
+        except OSError:
+            return
+
+        version = read_version(srcinfo)
+
+        if srcinfo.get('pkgbase') and version:
+            return '{}/{}-{}'.format(srcinfo['pkgbase'], version, pkgbuild_hash)
+
+    def get_sources_dir(self, key: str) -> str:
+        """
+        :param key: build key
+        :return: the directory where the sources of the package base should be downloaded ( created if it does not exist )
+        """
+        sources_dir = '{}/{}/{}'.format(self.path, key.split('/')[0], SOURCES_DIR)
+        os.makedirs(sources_dir, exist_ok=True)
+        os.utime(sources_dir)  # recently used
+        return sources_dir
+
+    def get(self, key: str, pkgname: str) -> Optional[str]:
+        """
+        :param key: build key
+        :param pkgname: the package name ( a package base can build several packages )
+        :return: the path of the cached package file
+        """
+        build_dir = '{}/{}'.format(self.path, key)
+
+        if os.path.isdir(build_dir):
+            for file_name in os.listdir(build_dir):
+                if is_package_of(file_name, pkgname):
+                    os.utime(build_dir)  # recently used
+                    return '{}/{}'.format(build_dir, file_name)
+
+    def add(self, key: str, project_dir: str) -> int:
+        """
+        Copies the packages built in the project directory to the cache
+        :param key: build key
+        :param project_dir:
+        :return: the number of package files cached
+        """
+        files = [f for f in os.listdir(project_dir) if RE_PKG_FILE.match(f)]
+
+        if not files:
+            return 0
+
+        build_dir = '{}/{}'.format(self.path, key)
+        temp_dir = '{}.{}.tmp'.format(build_dir, os.getpid())
+
+        try:
+            os.makedirs(temp_dir, exist_ok=True)
+
+            for f in files:
+                shutil.copy2('{}/{}'.format(project_dir, f), temp_dir)
+
+            self.lock.acquire()
+            try:
+                if os.path.exists(build_dir):
+                    shutil.rmtree(build_dir)
+
+                os.replace(temp_dir, build_dir)
+            finally:
+                self.lock.release()
+        except OSError:
+            if self.logger:
+                self.logger.warning("Could not cache the build '{}'".format(key))
+
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            return 0
+
+        self.evict()
+        return len(files)
+
+    def _list_entries(self) -> List[Tuple[float, int, str]]:
+        """
+        :return: builds and sources directories as ( last use, size, path )
+        """
+        entries = []
+
+        if os.path.isdir(self.path):
+            for pkgbase in os.scandir(self.path):
+                if pkgbase.is_dir():
+                    for entry in os.scandir(pkgbase.path):
+                        if entry.is_dir() and not entry.name.endswith('.tmp'):
+                            size = sum(os.path.getsize(os.path.join(root, f)) for root, dirs, files in os.walk(entry.path) for f in files)
+                            entries.append((entry.stat().st_mtime, size, entry.path))
+
+        return entries
+
+    def get_size(self) -> int:
+        return sum(e[1] for e in self._list_entries())
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used builds / sources while the cache exceeds its max size
+        :return: the number of bytes freed
+        """
+        self.lock.acquire()
+        try:
+            entries = self._list_entries()
+            total, freed = sum(e[1] for e in entries), 0
+
+            for mtime, size, path in sorted(entries):
+                if total - freed <= self.max_size:
+                    break
+
+                shutil.rmtree(path, ignore_errors=True)
+                freed += size
+
+                pkgbase_dir = os.path.dirname(path)
+                if not os.listdir(pkgbase_dir):
+                    os.rmdir(pkgbase_dir)
+
+            if freed and self.logger:
+                self.logger.info('{0:.2f} MB freed from the AUR build cache'.format(freed / 1024 ** 2))
+
+            return freed
+        finally:
+            self.lock.release()
+
+    def clean(self) -> int:
+        """
+        Removes all cached builds and sources
+        :return: the number of bytes freed
+        """
+        self.lock.acquire()
+        try:
+            size = sum(e[1] for e in self._list_entries())
+            shutil.rmtree(self.path, ignore_errors=True)
+            return size
+        finally:
+            self.lock.release()
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['clean']:
+        freed = BuildCache().clean()
+        print('AUR build cache cleaned: {0:.2f} MB freed'.format(freed / 1024 ** 2))
+    else:
+        print('usage: python3 -m bauh.gems.arch.build_cache clean')
+        sys.exit(1)
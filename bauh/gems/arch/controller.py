@@ -1,12 +1,12 @@
-import json
 import os
 import re
 import shutil
 import subprocess
 import time
-from pathlib import Path
-from threading import Thread
-from typing import List, Set, Type
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, RLock, Lock, Event, local
+from typing import List, Set, Type, Dict, Tuple, Optional
+from urllib.parse import urlparse
 
 import requests
 
@@ -16,11 +16,14 @@ from bauh.api.abstract.handler import ProcessWatcher
 from bauh.api.abstract.model import PackageUpdate, PackageHistory, SoftwarePackage, PackageSuggestion, PackageStatus
 from bauh.api.abstract.view import MessageType
 from bauh.commons.html import bold
-from bauh.commons.system import SystemProcess, ProcessHandler, new_subprocess, run_cmd, new_root_subprocess, \
+from bauh.commons.system import SystemProcess, ProcessHandler, new_subprocess, new_root_subprocess, \
     SimpleProcess
-from bauh.gems.arch import BUILD_DIR, aur, pacman, makepkg, pkgbuild, message, confirmation, disk, git, suggestions, gpg
+from bauh.gems.arch import BUILD_DIR, aur, pacman, makepkg, pkgbuild, message, confirmation, disk, git, suggestions, gpg, dependencies, \
+    build_cache
 from bauh.gems.arch.aur import AURClient
+from bauh.gems.arch.build_cache import BuildCache
 from bauh.gems.arch.mapper import ArchDataMapper
+from bauh.gems.arch.metadata import AURMetadataStore
 from bauh.gems.arch.model import ArchPackage
 from bauh.gems.arch.worker import AURIndexUpdater, ArchDiskCacheUpdater, ArchCompilationOptimizer
 
@@ -32,6 +35,12 @@ RE_SPLIT_VERSION = re.compile(r'(=|>|<)')
 
 SOURCE_FIELDS = ('source', 'source_x86_64')
 RE_PRE_DOWNLOADABLE_FILES = re.compile(r'(https?|ftp)://.+\.\w+[^gpg|git]$')
+AUR_INFO_EXPIRATION = 5 * 60  # seconds the AUR packages info are reused
+AUR_FILES_CACHE_SIZE = 200  # max number of PKGBUILD / .SRCINFO files kept in memory
+MAX_SRCINFO_WORKERS = 4  # .SRCINFO files downloaded at the same time when resolving dependencies
+DEFAULT_BUILD_JOBS = 2  # AUR dependencies built at the same time
+DEFAULT_BUILD_CACHE_SIZE = 2048  # MB
+NAMES_SEARCH_LIMIT = 25  # max number of names looked up in the names index when the AUR search returns nothing
 
 
 class ArchManager(SoftwareManager):
@@ -43,14 +52,22 @@ class ArchManager(SoftwareManager):
 
         self.mapper = ArchDataMapper(http_client=context.http_client)
         self.i18n = context.i18n
-        self.aur_client = AURClient(context.http_client)
-        self.names_index = {}
+        self.aur_metadata = AURMetadataStore(context.http_client, context.logger) if bool(int(os.getenv('BAUH_ARCH_AUR_METADATA', 0))) else None
+        self.aur_client = AURClient(context.http_client, self.aur_metadata, info_cache=context.cache_factory.new(AUR_INFO_EXPIRATION), logger=context.logger,
+                                    files_cache=context.cache_factory.new(-1, max_entries=AUR_FILES_CACHE_SIZE))
+        self.names_index = None  # NamesIndex
         self.aur_index_updater = AURIndexUpdater(context, self)
-        self.dcache_updater = ArchDiskCacheUpdater(context.logger, context.disk_cache)
+        self.dcache_updater = ArchDiskCacheUpdater(context.logger, context.disk_cache, context.disk_store)
         self.comp_optimizer = ArchCompilationOptimizer(context.logger)
         self.logger = context.logger
         self.enabled = True
         self.arch_distro = os.path.exists('/etc/arch-release')
+        self.build_jobs = max(1, int(os.getenv('BAUH_ARCH_BUILD_JOBS', DEFAULT_BUILD_JOBS)))
+        self._deps_check_lock = RLock()
+        self._pacman_lock = RLock()  # held by the pacman transactions
+        self._build_context = local()  # 'nested': the current thread is building a dependency
+        build_cache_size = int(os.getenv('BAUH_ARCH_BUILD_CACHE_SIZE', DEFAULT_BUILD_CACHE_SIZE))
+        self.build_cache = BuildCache(max_size=build_cache_size * 1024 ** 2, logger=context.logger) if build_cache_size > 0 else None
 
     def _upgrade_search_result(self, apidata: dict, installed_pkgs: dict, downgrade_enabled: bool, res: SearchResult, disk_loader: DiskCacheLoader):
         app = self.mapper.map_api_data(apidata, installed_pkgs['not_signed'])
@@ -64,8 +81,6 @@ class ArchManager(SoftwareManager):
         else:
             res.new.append(app)
 
-        Thread(target=self.mapper.fill_package_build, args=(app,)).start()
-
     def search(self, words: str, disk_loader: DiskCacheLoader, limit: int = -1) -> SearchResult:
         self.comp_optimizer.join()
 
@@ -87,21 +102,17 @@ class ArchManager(SoftwareManager):
         else:  # if there are no results from the API (it could be because there were too many), tries the names index:
             if self.names_index:
 
-                to_query = set()
-                for norm_name, real_name in self.names_index.items():
-                    if words in norm_name:
-                        to_query.add(real_name)
-
-                    if len(to_query) == 25:
-                        break
+                to_query = self.names_index.search(words, limit=limit if limit > 0 else NAMES_SEARCH_LIMIT)
 
-                pkgsinfo = self.aur_client.get_info(to_query)
+                if to_query:
+                    pkgsinfo = self.aur_client.get_info(to_query)
 
-                if pkgsinfo:
-                    read_installed.join()
+                    if pkgsinfo:
+                        read_installed.join()
+                        ranking = {name: idx for idx, name in enumerate(to_query)}
 
-                    for pkgdata in pkgsinfo:
-                        self._upgrade_search_result(pkgdata, installed, res)
+                        for pkgdata in sorted(pkgsinfo, key=lambda p: ranking.get(p.get('Name'), len(ranking))):
+                            self._upgrade_search_result(pkgdata, installed, downgrade_enabled, res, disk_loader)
 
         res.total = len(res.installed) + len(res.new)
         return res
@@ -155,71 +166,78 @@ class ArchManager(SoftwareManager):
 
         apps = []
         if installed and installed['not_signed']:
-            self.dcache_updater.join()
+            if self.dcache_updater.is_alive():  # not waited: the packages not pre-cached yet have their data filled by the next reading
+                done, total = self.dcache_updater.get_progress()
+                self.logger.info('AUR packages data still being pre-cached ( {}/{} )'.format(done, total if total >= 0 else '?'))
 
             self._fill_aur_pkgs(installed['not_signed'], apps, disk_loader, internet_available)
 
         return SearchResult(apps, None, len(apps))
 
+    def _update_git_clone(self, pkg: ArchPackage) -> Optional[str]:
+        """
+        :return: the package bare clone ( cached ) directory. The cached clone is used if it could not be updated.
+        """
+        name = pkg.package_base or pkg.name
+        repo_dir = git.get_clone_dir(name)
+
+        if git.update_clone(URL_GIT.format(name), repo_dir) or os.path.exists(repo_dir):
+            return repo_dir
+
     def downgrade(self, pkg: ArchPackage, root_password: str, watcher: ProcessWatcher) -> bool:
 
         handler = ProcessHandler(watcher)
-        app_build_dir = '{}/build_{}'.format(BUILD_DIR, int(time.time()))
+        app_build_dir = self._gen_build_dir(pkg.name)
         watcher.change_progress(5)
 
         try:
-            if not os.path.exists(app_build_dir):
-                build_dir = handler.handle(SystemProcess(new_subprocess(['mkdir', '-p', app_build_dir])))
-
-                if build_dir:
-                    watcher.change_progress(10)
-                    watcher.change_substatus(self.i18n['arch.clone'].format(bold(pkg.name)))
-                    clone = handler.handle(SystemProcess(subproc=new_subprocess(['git', 'clone', URL_GIT.format(pkg.name)], cwd=app_build_dir), check_error_output=False))
-                    watcher.change_progress(30)
-                    if clone:
-                        watcher.change_substatus(self.i18n['arch.downgrade.reading_commits'])
-                        clone_path = '{}/{}'.format(app_build_dir, pkg.name)
-                        pkgbuild_path = '{}/PKGBUILD'.format(clone_path)
-
-                        commits = run_cmd("git log", cwd=clone_path)
-                        watcher.change_progress(40)
-
-                        if commits:
-                            commit_list = re.findall(r'commit (.+)\n', commits)
-                            if commit_list:
-                                if len(commit_list) > 1:
-                                    for idx in range(1, len(commit_list)):
-                                        commit = commit_list[idx]
-                                        with open(pkgbuild_path) as f:
-                                            pkgdict = aur.map_pkgbuild(f.read())
-
-                                        if not handler.handle(SystemProcess(subproc=new_subprocess(['git', 'reset', '--hard', commit], cwd=clone_path), check_error_output=False)):
-                                            watcher.print('Could not downgrade anymore. Aborting...')
-                                            return False
-
-                                        if '{}-{}'.format(pkgdict.get('pkgver'), pkgdict.get('pkgrel')) == pkg.version:
-                                            # current version found
-                                            watcher.change_substatus(self.i18n['arch.downgrade.version_found'])
-                                            break
-
-                                    watcher.change_substatus(self.i18n['arch.downgrade.install_older'])
-                                    return self._make_pkg(pkg.name, pkg.maintainer, root_password, handler, app_build_dir, clone_path, dependency=False, skip_optdeps=True)
-                                else:
-                                    watcher.show_message(title=self.i18n['arch.downgrade.error'],
-                                                         body=self.i18n['arch.downgrade.impossible'].format(pkg.name),
-                                                         type_=MessageType.ERROR)
-                                    return False
+            watcher.change_progress(10)
+            watcher.change_substatus(self.i18n['arch.clone'].format(bold(pkg.name)))
+            repo_dir = self._update_git_clone(pkg)
+            watcher.change_progress(30)
+
+            if repo_dir:
+                watcher.change_substatus(self.i18n['arch.downgrade.reading_commits'])
+                commits = [c for c in git.read_history(repo_dir, '.SRCINFO') if c['content']]
+                watcher.change_progress(40)
+
+                if commits:
+                    if len(commits) > 1:
+                        older = commits[-1]
+                        for idx, commit in enumerate(commits[0:-1]):
+                            srcinfo = aur.map_srcinfo(commit['content'])
+
+                            if '{}-{}'.format(srcinfo.get('pkgver'), srcinfo.get('pkgrel')) == pkg.version:
+                                # current version found
+                                watcher.change_substatus(self.i18n['arch.downgrade.version_found'])
+                                older = commits[idx + 1]
+                                break
+
+                        project_dir = '{}/{}'.format(app_build_dir, pkg.name)
+
+                        if not git.export(repo_dir, older['commit'], project_dir):
+                            watcher.print('Could not downgrade anymore. Aborting...')
+                            return False
 
-                        watcher.show_message(title=self.i18n['error'], body=self.i18n['arch.downgrade.no_commits'], type_=MessageType.ERROR)
+                        watcher.change_substatus(self.i18n['arch.downgrade.install_older'])
+                        return self._make_pkg(pkg.name, pkg.maintainer, root_password, handler, app_build_dir, project_dir, dependency=False, skip_optdeps=True)
+                    else:
+                        watcher.show_message(title=self.i18n['arch.downgrade.error'],
+                                             body=self.i18n['arch.downgrade.impossible'].format(pkg.name),
+                                             type_=MessageType.ERROR)
                         return False
 
+                watcher.show_message(title=self.i18n['error'], body=self.i18n['arch.downgrade.no_commits'], type_=MessageType.ERROR)
+                return False
+
         finally:
-            if os.path.exists(app_build_dir):
-                handler.handle(SystemProcess(subproc=new_subprocess(['rm', '-rf', app_build_dir])))
+            self._remove_build_dir(app_build_dir, handler)
 
         return False
 
     def clean_cache_for(self, pkg: ArchPackage):
+        self.context.disk_store.delete(pkg.get_disk_data_key())
+
         if os.path.exists(pkg.get_disk_cache_path()):
             shutil.rmtree(pkg.get_disk_cache_path())
 
@@ -230,6 +248,7 @@ class ArchManager(SoftwareManager):
         res = handler.handle(SystemProcess(new_root_subprocess(['pacman', '-R', pkg_name, '--noconfirm'], root_password)))
 
         if res:
+            self.context.disk_store.delete(ArchPackage.disk_data_key(pkg_name, 'aur'), ArchPackage.disk_data_key(pkg_name, 'mirror'))
             cached_paths = [ArchPackage.disk_cache_path(pkg_name, 'aur'), ArchPackage.disk_cache_path(pkg_name, 'mirror')]
 
             for path in cached_paths:
@@ -259,9 +278,15 @@ class ArchManager(SoftwareManager):
     def get_managed_types(self) -> Set["type"]:
         return {ArchPackage}
 
+    def _fill_pkgbuild(self, pkg: ArchPackage):
+        pkg.pkgbuild = self.aur_client.get_pkgbuild(pkg.name, pkg.package_base, self._get_last_modified(pkg))
+
+    def _get_last_modified(self, pkg: ArchPackage) -> int:
+        return int(pkg.last_modified.timestamp()) if pkg.last_modified else None
+
     def get_info(self, pkg: ArchPackage) -> dict:
         if pkg.installed:
-            t = Thread(target=self.mapper.fill_package_build, args=(pkg,))
+            t = Thread(target=self._fill_pkgbuild, args=(pkg,))
             t.start()
 
             info = pacman.get_info_dict(pkg.name)
@@ -288,7 +313,11 @@ class ArchManager(SoftwareManager):
                 '10_url': pkg.url_download
             }
 
-            srcinfo = self.aur_client.get_src_info(pkg.name)
+            t = Thread(target=self._fill_pkgbuild, args=(pkg,))
+            t.start()
+
+            srcinfo = self.aur_client.get_src_info(pkg.name, pkg.package_base, self._get_last_modified(pkg))
+            t.join()
 
             if srcinfo:
                 if srcinfo.get('depends'):
@@ -305,68 +334,171 @@ class ArchManager(SoftwareManager):
             return info
 
     def get_history(self, pkg: ArchPackage) -> PackageHistory:
-        temp_dir = '{}/build_{}'.format(BUILD_DIR, int(time.time()))
-
-        try:
-            Path(temp_dir).mkdir(parents=True)
-            run_cmd('git clone ' + URL_GIT.format(pkg.name), print_error=False, cwd=temp_dir)
+        repo_dir = self._update_git_clone(pkg)
 
-            clone_path = '{}/{}'.format(temp_dir, pkg.name)
-            pkgbuild_path = '{}/PKGBUILD'.format(clone_path)
-
-            commits = git.list_commits(clone_path)
+        if repo_dir:
+            commits = git.read_history(repo_dir, '.SRCINFO')
 
             if commits:
                 history, status_idx = [], -1
 
-                for idx, commit in enumerate(commits):
-                    with open(pkgbuild_path) as f:
-                        pkgdict = aur.map_pkgbuild(f.read())
-
-                    if status_idx < 0 and '{}-{}'.format(pkgdict.get('pkgver'), pkgdict.get('pkgrel')) == pkg.version:
-                        status_idx = idx
+                for commit in commits:
+                    if commit['content']:
+                        srcinfo = aur.map_srcinfo(commit['content'])
 
-                    history.append({'1_version': pkgdict['pkgver'], '2_release': pkgdict['pkgrel'],
-                                    '3_date': commit['date']})  # the number prefix is to ensure the rendering order
+                        if status_idx < 0 and '{}-{}'.format(srcinfo.get('pkgver'), srcinfo.get('pkgrel')) == pkg.version:
+                            status_idx = len(history)
 
-                    if idx + 1 < len(commits):
-                        if not run_cmd('git reset --hard ' + commits[idx + 1]['commit'], cwd=clone_path):
-                            break
+                        history.append({'1_version': srcinfo.get('pkgver'), '2_release': srcinfo.get('pkgrel'),
+                                        '3_date': commit['date']})  # the number prefix is to ensure the rendering order
 
                 return PackageHistory(pkg=pkg, history=history, pkg_status_idx=status_idx)
-        finally:
-            if os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir)
 
-    def _install_deps(self, deps: Set[str], pkg_mirrors: dict, root_password: str, handler: ProcessHandler, change_progress: bool = False) -> str:
+    def _install_deps(self, deps: Set[str], pkg_mirrors: dict, root_password: str, handler: ProcessHandler, change_progress: bool = False,
+                      aur_graph: Dict[str, Set[str]] = None) -> Optional[List[str]]:
         """
+        Installs the repository dependencies first. The AUR dependencies are built following their dependency graph.
         :param deps:
         :param pkg_mirrors:
         :param root_password:
         :param handler:
-        :return: not installed dependency
+        :param aur_graph: AUR dependencies graph ( see '_map_aur_dependencies' ). It is resolved when not informed.
+        :return: the dependencies not installed ( all the repository dependencies if their transaction failed )
         """
-        progress_increment = int(100 / len(deps))
-        progress = 0
+        repo_deps = {d: pkg_mirrors[d] for d in deps if pkg_mirrors[d] != 'aur'}
+
+        if aur_graph is None:
+            aur_deps = {d for d in deps if pkg_mirrors[d] == 'aur'}
+
+            if aur_deps:
+                aur_graph, graph_repo_deps, dep_not_found = self._map_aur_dependencies(aur_deps)
+
+                if dep_not_found:
+                    return [dep_not_found]
+
+                repo_deps.update(graph_repo_deps)
+
+        progress_increment = int(100 / (len(repo_deps) + len(aur_graph or ())))
+        progress = [0]
         self._update_progress(handler.watcher, 1, change_progress)
 
-        for pkgname in deps:
+        if repo_deps:  # a single transaction for all of them
+            handler.watcher.change_substatus(self.i18n['arch.install.dependency.install'].format(bold(', '.join('{} ( {} )'.format(d, m) for d, m in sorted(repo_deps.items())))))
+
+            if not self._install_from_mirrors(repo_deps, root_password, handler, change_progress=False):
+                return sorted(repo_deps)
+
+            progress[0] += progress_increment * len(repo_deps)
+            self._update_progress(handler.watcher, progress[0], change_progress)
+
+        if aur_graph:
+            built_dirs = []
+            jobs = 1 if getattr(self._build_context, 'nested', False) else self.build_jobs
+            cancelled, output_lock = Event(), Lock()
+
+            # split packages are built once by their package base
+            bases = {i['Name']: i.get('PackageBase') or i['Name'] for i in self.aur_client.get_info(aur_graph) if i.get('Name')}
+            base_graph, base_pkgs = dependencies.group_by_base(aur_graph, bases)
+
+            def _build(base: str) -> Optional[Tuple[str, List[str]]]:
+                if cancelled.is_set():
+                    return
+
+                nested = getattr(self._build_context, 'nested', False)
+                self._build_context.nested = True  # dependencies not resolved by the graph are installed by this thread
+                build_watcher = dependencies.BuildWatcher(handler.watcher, output_lock, cancelled) if jobs > 1 else None
+                build_handler = ProcessHandler(build_watcher) if build_watcher else handler
+                try:
+                    build_dir = self._gen_build_dir(base)
+                    built_dirs.append(build_dir)
+                    project_dir = self._download_from_aur(base, build_dir, build_handler, change_progress=False)
+
+                    if project_dir and not cancelled.is_set():
+                        install_files = self._build_pkg(base_pkgs[base][0], root_password, build_handler, build_dir, project_dir,
+                                                        change_progress=False, pkgnames=base_pkgs[base])
+
+                        if install_files:
+                            return project_dir, install_files
+                finally:
+                    self._build_context.nested = nested
+
+                    if build_watcher:
+                        build_watcher.flush()
+
+            def _install(base: str, built: Tuple[str, List[str]]) -> bool:
+                self._deps_check_lock.acquire()  # not while a build is checking ( and installing ) its own dependencies
+                try:
+                    for pkgname, install_file in zip(base_pkgs[base], built[1]):
+                        handler.watcher.change_substatus(self.i18n['arch.install.dependency.install'].format(bold('{} ( aur )'.format(pkgname))))
+
+                        if not self._install(pkgname=pkgname, maintainer=None, root_password=root_password, mirror='aur', handler=handler,
+                                             install_file=install_file, pkgdir=built[0], change_progress=False):
+                            return False
 
-            mirror = pkg_mirrors[pkgname]
-            handler.watcher.change_substatus(self.i18n['arch.install.dependency.install'].format(bold('{} ()'.format(pkgname, mirror))))
-            if mirror == 'aur':
-                installed = self._install_from_aur(pkgname=pkgname, maintainer=None, root_password=root_password, handler=handler, dependency=True, change_progress=False)
-            else:
-                installed = self._install(pkgname=pkgname, maintainer=None, root_password=root_password, handler=handler, install_file=None, mirror=mirror, change_progress=False)
+                        progress[0] += progress_increment
+                        self._update_progress(handler.watcher, progress[0], change_progress)
 
-            if not installed:
-                return pkgname
+                    return True
+                finally:
+                    self._deps_check_lock.release()
 
-            progress += progress_increment
-            self._update_progress(handler.watcher, progress, change_progress)
+            try:
+                not_installed = dependencies.build_in_order(base_graph, _build, _install, jobs, cancelled)
+            finally:
+                for build_dir in built_dirs:
+                    self._remove_build_dir(build_dir, handler)
+
+            if not_installed:
+                return base_pkgs.get(not_installed, [not_installed])
 
         self._update_progress(handler.watcher, 100, change_progress)
 
+    def _map_aur_dependencies(self, pkgnames: Set[str]) -> Tuple[Dict[str, Set[str]], Dict[str, str], Optional[str]]:
+        """
+        Resolves the whole dependency graph of AUR packages from their .SRCINFO ( only the dependencies not installed are considered )
+        :param pkgnames: AUR packages
+        :return: the AUR packages mapped to the AUR packages they depend on, the repository dependencies found ( mapped to their mirrors )
+        and a dependency not found in any mirror ( if any )
+        """
+        graph, repo_deps, to_read = {}, {}, set(pkgnames)
+        x86_64 = self.context.is_system_x86_64()
+
+        while to_read:
+            to_read = sorted(to_read)
+            infos = {info['Name']: info for info in self.aur_client.get_info(to_read) if info.get('Name')}
+
+            def _get_src_info(pkgname: str) -> dict:  # split packages share the .SRCINFO of their package base
+                info = infos.get(pkgname, {})
+                return self.aur_client.get_src_info(pkgname, info.get('PackageBase'), info.get('LastModified'))
+
+            with ThreadPoolExecutor(max_workers=min(len(to_read), MAX_SRCINFO_WORKERS)) as pool:
+                srcinfos = [*pool.map(_get_src_info, to_read)]
+
+            pkg_deps = {pkgname: dependencies.read_srcinfo_deps(srcinfo or {}, x86_64) for pkgname, srcinfo in zip(to_read, srcinfos)}
+            missing = {dependencies.map_dep_name(d) for d in pacman.list_unsatisfied({d for deps in pkg_deps.values() for d in deps})}
+            missing_mirrors = self._map_mirrors(missing) if missing else {}
+
+            for dep in missing:
+                if dep not in missing_mirrors and dep not in graph:
+                    return graph, repo_deps, dep
+
+            to_read = set()
+            for pkgname, deps in pkg_deps.items():
+                graph[pkgname] = set()
+
+                for dep in {dependencies.map_dep_name(d) for d in deps}:
+                    mirror = missing_mirrors.get(dep)
+
+                    if mirror == 'aur':
+                        graph[pkgname].add(dep)
+
+                        if dep not in graph and dep not in pkg_deps:
+                            to_read.add(dep)
+                    elif mirror:
+                        repo_deps[dep] = mirror
+
+        return graph, repo_deps, None
+
     def _map_mirrors(self, pkgnames: Set[str]) -> dict:
         pkg_mirrors = pacman.get_mirrors(pkgnames)  # getting mirrors set
 
@@ -378,9 +510,18 @@ class ArchManager(SoftwareManager):
 
         return pkg_mirrors
 
+    def _read_srcinfo(self, pkgname: str, project_dir: str) -> dict:
+        srcinfo_path = '{}/.SRCINFO'.format(project_dir)
+
+        if os.path.exists(srcinfo_path):  # the downloaded snapshot already has it
+            with open(srcinfo_path) as f:
+                return aur.map_srcinfo(f.read())
+
+        return self.aur_client.get_src_info(pkgname) or {}
+
     def _pre_download_source(self, pkgname: str, project_dir: str, watcher: ProcessWatcher) -> bool:
         if self.context.file_downloader.is_multithreaded():
-            srcinfo = self.aur_client.get_src_info(pkgname)
+            srcinfo = self._read_srcinfo(pkgname, project_dir)
 
             pre_download_files = []
 
@@ -415,30 +556,76 @@ class ArchManager(SoftwareManager):
 
         return True
 
-    def _make_pkg(self, pkgname: str, maintainer: str, root_password: str, handler: ProcessHandler, build_dir: str, project_dir: str, dependency: bool, skip_optdeps: bool = False, change_progress: bool = True) -> bool:
+    def _build_pkg(self, pkgname: str, root_password: str, handler: ProcessHandler, build_dir: str, project_dir: str, change_progress: bool = True,
+                   pkgnames: List[str] = None) -> Optional[List[str]]:
+        """
+        :param pkgnames: the packages of the package base to be returned ( split packages ). Default: only 'pkgname'
+        :return: the paths of the package files built ( or cached ) following 'pkgnames' order
+        """
+        pkgnames = pkgnames or [pkgname]
+        cache_key = self.build_cache.get_key(project_dir) if self.build_cache else None
+        cached_files = [self.build_cache.get(cache_key, n) for n in pkgnames] if cache_key else None
+
+        if cached_files and all(cached_files):
+            handler.watcher.print('Using the cached build {}'.format(', '.join(cached_files)))
+            srcinfo = self._read_srcinfo(pkgname, project_dir)
 
-        self._pre_download_source(pkgname, project_dir, handler.watcher)
+            if not pacman.list_unsatisfied(dependencies.read_srcinfo_deps(srcinfo, self.context.is_system_x86_64())):
+                self._update_progress(handler.watcher, 65, change_progress)
+                return cached_files
+        else:
+            cached_files = None
+            self._pre_download_source(pkgname, project_dir, handler.watcher)
 
         self._update_progress(handler.watcher, 50, change_progress)
-        if not self._install_missings_deps_and_keys(pkgname, root_password, handler, project_dir):
-            return False
+
+        # builds running alongside others check their dependencies one at a time, since the checks may ask the user
+        deps_lock = self._deps_check_lock if getattr(self._build_context, 'nested', False) else None
+
+        if deps_lock:
+            deps_lock.acquire()
+
+        try:
+            if not self._install_missings_deps_and_keys(pkgname, root_password, handler, project_dir):
+                return
+        finally:
+            if deps_lock:
+                deps_lock.release()
+
+        if cached_files:
+            self._update_progress(handler.watcher, 65, change_progress)
+            return cached_files
 
         # building main package
         handler.watcher.change_substatus(self.i18n['arch.building.package'].format(bold(pkgname)))
-        pkgbuilt, output = handler.handle_simple(SimpleProcess(['makepkg', '-ALcsmf'], cwd=project_dir))
+        makepkg_env = {'SRCDEST': self.build_cache.get_sources_dir(cache_key)} if cache_key else None
+        pkgbuilt, output = handler.handle_simple(SimpleProcess(['makepkg', '-ALcsmf'], cwd=project_dir, extra_env=makepkg_env))
         self._update_progress(handler.watcher, 65, change_progress)
 
         if pkgbuilt:
-            gen_file = [fname for root, dirs, files in os.walk(build_dir) for fname in files if re.match(r'^{}-.+\.tar\.xz'.format(pkgname), fname)]
+            gen_files = [fname for fname in os.listdir(project_dir) if build_cache.RE_PKG_FILE.match(fname)]
+            install_files = []
 
-            if not gen_file:
-                handler.watcher.print('Could not find generated .tar.xz file. Aborting...')
-                return False
+            for name in pkgnames:
+                name_files = [f for f in gen_files if build_cache.is_package_of(f, name)]
+
+                if not name_files:
+                    handler.watcher.print('Could not find the package file generated for {}. Aborting...'.format(name))
+                    return
+
+                install_files.append('{}/{}'.format(project_dir, name_files[0]))
 
-            install_file = '{}/{}'.format(project_dir, gen_file[0])
+            if cache_key:
+                self.build_cache.add(cache_key, project_dir)
+
+            return install_files
+
+    def _make_pkg(self, pkgname: str, maintainer: str, root_password: str, handler: ProcessHandler, build_dir: str, project_dir: str, dependency: bool, skip_optdeps: bool = False, change_progress: bool = True) -> bool:
+        install_files = self._build_pkg(pkgname, root_password, handler, build_dir, project_dir, change_progress)
 
+        if install_files:
             if self._install(pkgname=pkgname, maintainer=maintainer, root_password=root_password, mirror='aur', handler=handler,
-                             install_file=install_file, pkgdir=project_dir, change_progress=change_progress):
+                             install_file=install_files[0], pkgdir=project_dir, change_progress=change_progress):
 
                 if dependency or skip_optdeps:
                     return True
@@ -464,16 +651,29 @@ class ArchManager(SoftwareManager):
                         message.show_dep_not_found(dep, self.i18n, handler.watcher)
                         return False
 
+                aur_deps = {d for d in depnames if dep_mirrors[d] == 'aur'}
+                aur_graph = None
+
+                if aur_deps:  # all dependencies are resolved before asking the user
+                    aur_graph, repo_deps, dep_not_found = self._map_aur_dependencies(aur_deps)
+
+                    if dep_not_found:
+                        message.show_dep_not_found(dep_not_found, self.i18n, handler.watcher)
+                        return False
+
+                    dep_mirrors.update(repo_deps)
+                    dep_mirrors.update({d: 'aur' for d in aur_graph})
+
                 handler.watcher.change_substatus(self.i18n['arch.missing_deps_found'].format(bold(pkgname)))
 
                 if not confirmation.request_install_missing_deps(pkgname, dep_mirrors, handler.watcher, self.i18n):
                     handler.watcher.print(self.i18n['action.cancelled'])
                     return False
 
-                dep_not_installed = self._install_deps(depnames, dep_mirrors, root_password, handler, change_progress=False)
+                deps_not_installed = self._install_deps(set(dep_mirrors), dep_mirrors, root_password, handler, change_progress=False, aur_graph=aur_graph)
 
-                if dep_not_installed:
-                    message.show_dep_not_installed(handler.watcher, pkgname, dep_not_installed, self.i18n)
+                if deps_not_installed:
+                    message.show_deps_not_installed(handler.watcher, pkgname, deps_not_installed, self.i18n)
                     return False
 
                 # it is necessary to re-check because missing PGP keys are only notified when there are none missing
@@ -515,21 +715,24 @@ class ArchManager(SoftwareManager):
             if not deps_to_install:
                 return True
             else:
-                dep_not_installed = self._install_deps(deps_to_install, pkg_mirrors, root_password, handler, change_progress=True)
+                deps_not_installed = self._install_deps(deps_to_install, pkg_mirrors, root_password, handler, change_progress=True)
 
-                if dep_not_installed:
-                    message.show_optdep_not_installed(dep_not_installed, handler.watcher, self.i18n)
+                if deps_not_installed:
+                    message.show_optdeps_not_installed(deps_not_installed, handler.watcher, self.i18n)
                     return False
 
         return True
 
-    def _install(self, pkgname: str, maintainer: str, root_password: str, mirror: str, handler: ProcessHandler, install_file: str = None, pkgdir: str = '.', change_progress: bool = True):
+    def _handle_conflicts(self, check_cmd: List[str], pkgnames: List[str], root_password: str, handler: ProcessHandler, pkgdir: str = '.', change_progress: bool = True) -> bool:
+        """
+        Runs the installation command without confirming it to check if there are conflicts. If so, the user is asked if the conflicting packages should be uninstalled.
+        :param check_cmd: installation command
+        :param pkgnames: packages being installed
+        :return: if the installation can proceed
+        """
         check_install_output = []
-        pkgpath = install_file if install_file else pkgname
-
-        handler.watcher.change_substatus(self.i18n['arch.checking.conflicts'].format(bold(pkgname)))
 
-        for check_out in SimpleProcess(['pacman', '-U' if install_file else '-S', pkgpath], root_password=root_password, cwd=pkgdir).instance.stdout:
+        for check_out in SimpleProcess(check_cmd, root_password=root_password, cwd=pkgdir).instance.stdout:
             check_install_output.append(check_out.decode())
 
         self._update_progress(handler.watcher, 70, change_progress)
@@ -542,7 +745,7 @@ class ArchManager(SoftwareManager):
                 return False
             else:  # uninstall conflicts
                 self._update_progress(handler.watcher, 75, change_progress)
-                to_uninstall = [conflict for conflict in conflicting_apps if conflict != pkgname]
+                to_uninstall = [conflict for conflict in conflicting_apps if conflict not in pkgnames]
 
                 for conflict in to_uninstall:
                     handler.watcher.change_substatus(self.i18n['arch.uninstalling.conflict'].format(bold(conflict)))
@@ -552,26 +755,75 @@ class ArchManager(SoftwareManager):
                                                      type_=MessageType.ERROR)
                         return False
 
-        handler.watcher.change_substatus(self.i18n['arch.installing.package'].format(bold(pkgname)))
-        self._update_progress(handler.watcher, 80, change_progress)
-        installed = handler.handle(pacman.install_as_process(pkgpath=pkgpath, root_password=root_password, aur=install_file is not None, pkgdir=pkgdir))
-        self._update_progress(handler.watcher, 95, change_progress)
+        return True
 
-        if installed and self.context.disk_cache:
-            handler.watcher.change_substatus(self.i18n['status.caching_data'].format(bold(pkgname)))
-            if self.context.disk_cache:
-                disk.save_several({pkgname}, mirror=mirror, maintainer=maintainer, overwrite=True)
+    def _install(self, pkgname: str, maintainer: str, root_password: str, mirror: str, handler: ProcessHandler, install_file: str = None, pkgdir: str = '.', change_progress: bool = True):
+        self._pacman_lock.acquire()  # pacman locks its database: a single transaction at a time ( builds may be running alongside )
+        try:
+            pkgpath = install_file if install_file else pkgname
+
+            handler.watcher.change_substatus(self.i18n['arch.checking.conflicts'].format(bold(pkgname)))
 
-            self._update_progress(handler.watcher, 100, change_progress)
+            if not self._handle_conflicts(['pacman', '-U' if install_file else '-S', pkgpath], [pkgname], root_password, handler, pkgdir, change_progress):
+                return False
 
-        return installed
+            handler.watcher.change_substatus(self.i18n['arch.installing.package'].format(bold(pkgname)))
+            self._update_progress(handler.watcher, 80, change_progress)
+            installed = handler.handle(pacman.install_as_process(pkgpath=pkgpath, root_password=root_password, aur=install_file is not None, pkgdir=pkgdir))
+            self._update_progress(handler.watcher, 95, change_progress)
+
+            if installed and self.context.disk_cache:
+                handler.watcher.change_substatus(self.i18n['status.caching_data'].format(bold(pkgname)))
+                if self.context.disk_cache:
+                    disk.save_several({pkgname}, mirror=mirror, disk_store=self.context.disk_store, maintainer=maintainer, overwrite=True)
+
+                self._update_progress(handler.watcher, 100, change_progress)
+
+            return installed
+        finally:
+            self._pacman_lock.release()
+
+    def _install_from_mirrors(self, pkg_mirrors: Dict[str, str], root_password: str, handler: ProcessHandler, change_progress: bool = True) -> bool:
+        """
+        Installs several packages from the mirrors in a single transaction
+        :param pkg_mirrors: package names mapped to their mirrors
+        """
+        self._pacman_lock.acquire()
+        try:
+            pkgnames = sorted(pkg_mirrors)
+            pkgs_str = ', '.join(pkgnames)
+
+            handler.watcher.change_substatus(self.i18n['arch.checking.conflicts'].format(bold(pkgs_str)))
+
+            if not self._handle_conflicts(['pacman', '-S', '--needed', *pkgnames], pkgnames, root_password, handler, change_progress=change_progress):
+                return False
+
+            handler.watcher.change_substatus(self.i18n['arch.installing.package'].format(bold(pkgs_str)))
+            self._update_progress(handler.watcher, 80, change_progress)
+            installed = handler.handle(pacman.install_from_mirrors_as_process(pkgnames, root_password))
+            self._update_progress(handler.watcher, 95, change_progress)
+
+            if installed and self.context.disk_cache:
+                handler.watcher.change_substatus(self.i18n['status.caching_data'].format(bold(pkgs_str)))
+                by_mirror = {}
+                for pkgname, mirror in pkg_mirrors.items():
+                    by_mirror.setdefault(mirror, set()).add(pkgname)
+
+                for mirror, names in by_mirror.items():
+                    disk.save_several(names, mirror=mirror, disk_store=self.context.disk_store, maintainer=None, overwrite=True)
+
+                self._update_progress(handler.watcher, 100, change_progress)
+
+            return installed
+        finally:
+            self._pacman_lock.release()
 
     def _update_progress(self, watcher: ProcessWatcher, val: int, change_progress: bool):
         if change_progress:
             watcher.change_progress(val)
 
-    def _import_pgp_keys(self, pkgname: str, root_password: str, handler: ProcessHandler):
-        srcinfo = self.aur_client.get_src_info(pkgname)
+    def _import_pgp_keys(self, pkgname: str, root_password: str, handler: ProcessHandler, project_dir: str):
+        srcinfo = self._read_srcinfo(pkgname, project_dir)
 
         if srcinfo.get('validpgpkeys'):
             handler.watcher.print(self.i18n['arch.aur.install.verifying_pgp'])
@@ -605,40 +857,55 @@ class ArchManager(SoftwareManager):
                     handler.watcher.print(self.i18n['action.cancelled'])
                     return False
 
+    def _gen_build_dir(self, pkgname: str) -> str:
+        return '{}/build_{}_{}'.format(BUILD_DIR, int(time.time()), pkgname)
+
+    def _remove_build_dir(self, build_dir: str, handler: ProcessHandler):
+        if os.path.exists(build_dir):
+            handler.handle(SystemProcess(new_subprocess(['rm', '-rf', build_dir])))
+
+    def _download_from_aur(self, pkgname: str, app_build_dir: str, handler: ProcessHandler, change_progress: bool = True) -> Optional[str]:
+        """
+        Downloads and uncompresses the package snapshot
+        :return: the project directory
+        """
+        if not os.path.exists(app_build_dir):
+            build_dir = handler.handle(SystemProcess(new_subprocess(['mkdir', '-p', app_build_dir])))
+            self._update_progress(handler.watcher, 10, change_progress)
+
+            if build_dir:
+                file_url = URL_PKG_DOWNLOAD.format(pkgname)
+                file_name = file_url.split('/')[-1]
+                handler.watcher.change_substatus('{} {}'.format(self.i18n['arch.downloading.package'], bold(file_name)))
+                download = handler.handle(SystemProcess(new_subprocess(['wget', file_url], cwd=app_build_dir), check_error_output=False))
+
+                if download:
+                    self._update_progress(handler.watcher, 30, change_progress)
+                    handler.watcher.change_substatus('{} {}'.format(self.i18n['arch.uncompressing.package'], bold(file_name)))
+                    uncompress = handler.handle(SystemProcess(new_subprocess(['tar', 'xvzf', '{}.tar.gz'.format(pkgname)], cwd=app_build_dir)))
+                    self._update_progress(handler.watcher, 40, change_progress)
+
+                    if uncompress:
+                        return '{}/{}'.format(app_build_dir, pkgname)
+
     def _install_from_aur(self, pkgname: str, maintainer: str, root_password: str, handler: ProcessHandler, dependency: bool, skip_optdeps: bool = False, change_progress: bool = True) -> bool:
-        app_build_dir = '{}/build_{}'.format(BUILD_DIR, int(time.time()))
+        app_build_dir = self._gen_build_dir(pkgname)
 
         try:
-            if not os.path.exists(app_build_dir):
-                build_dir = handler.handle(SystemProcess(new_subprocess(['mkdir', '-p', app_build_dir])))
-                self._update_progress(handler.watcher, 10, change_progress)
-
-                if build_dir:
-                    file_url = URL_PKG_DOWNLOAD.format(pkgname)
-                    file_name = file_url.split('/')[-1]
-                    handler.watcher.change_substatus('{} {}'.format(self.i18n['arch.downloading.package'], bold(file_name)))
-                    download = handler.handle(SystemProcess(new_subprocess(['wget', file_url], cwd=app_build_dir), check_error_output=False))
-
-                    if download:
-                        self._update_progress(handler.watcher, 30, change_progress)
-                        handler.watcher.change_substatus('{} {}'.format(self.i18n['arch.uncompressing.package'], bold(file_name)))
-                        uncompress = handler.handle(SystemProcess(new_subprocess(['tar', 'xvzf', '{}.tar.gz'.format(pkgname)], cwd=app_build_dir)))
-                        self._update_progress(handler.watcher, 40, change_progress)
-
-                        if uncompress:
-                            uncompress_dir = '{}/{}'.format(app_build_dir, pkgname)
-                            return self._make_pkg(pkgname=pkgname,
-                                                  maintainer=maintainer,
-                                                  root_password=root_password,
-                                                  handler=handler,
-                                                  build_dir=app_build_dir,
-                                                  project_dir=uncompress_dir,
-                                                  dependency=dependency,
-                                                  skip_optdeps=skip_optdeps,
-                                                  change_progress=change_progress)
+            project_dir = self._download_from_aur(pkgname, app_build_dir, handler, change_progress)
+
+            if project_dir:
+                return self._make_pkg(pkgname=pkgname,
+                                      maintainer=maintainer,
+                                      root_password=root_password,
+                                      handler=handler,
+                                      build_dir=app_build_dir,
+                                      project_dir=project_dir,
+                                      dependency=dependency,
+                                      skip_optdeps=skip_optdeps,
+                                      change_progress=change_progress)
         finally:
-            if os.path.exists(app_build_dir):
-                handler.handle(SystemProcess(new_subprocess(['rm', '-rf', app_build_dir])))
+            self._remove_build_dir(app_build_dir, handler)
 
         return False
 
@@ -646,12 +913,10 @@ class ArchManager(SoftwareManager):
         res = self._install_from_aur(pkg.name, pkg.maintainer, root_password, ProcessHandler(watcher), dependency=False, skip_optdeps=skip_optdeps)
 
         if res:
-            if os.path.exists(pkg.get_disk_data_path()):
-                with open(pkg.get_disk_data_path()) as f:
-                    data = f.read()
-                    if data:
-                        data = json.loads(data)
-                        pkg.fill_cached_data(data)
+            data = self.context.disk_store.get(pkg.get_disk_data_key())
+
+            if data:
+                pkg.fill_cached_data(data)
 
         return res
 
@@ -668,6 +933,9 @@ class ArchManager(SoftwareManager):
     def set_enabled(self, enabled: bool):
         self.enabled = enabled
 
+    def get_hosts(self) -> Set[str]:
+        return {urlparse(aur.URL_INFO).hostname}
+
     def can_work(self) -> bool:
         try:
             return self.arch_distro and pacman.is_enabled() and self._is_wget_available()
@@ -0,0 +1,398 @@
+import logging
+import os
+import tarfile
+import traceback
+from threading import Lock
+from typing import Dict, Optional, List, Tuple, Set, Iterable
+
+PACMAN_LOCAL_DB = '/var/lib/pacman/local'
+PACMAN_SYNC_DB = '/var/lib/pacman/sync'
+PACMAN_CONF = '/etc/pacman.conf'
+INDEXED_SUFFIXES = ('.desktop', '.png', '.svg')
+INDEXED_PREFIXES = ('/usr/bin/',)
+
+
+def parse_db_sections(lines: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Parses the content of a pacman database file ( e.g: 'desc', 'files' ) made of sections like '%NAME%' followed by their values ( one per line ).
+    :param lines:
+    :return: the values mapped by section
+    """
+    sections, values = {}, None
+
+    for line in lines:
+        line = line.strip()
+
+        if not line:
+            values = None
+        elif values is None:
+            if line.startswith('%') and line.endswith('%'):
+                values = []
+                sections[line] = values
+        else:
+            values.append(line)
+
+    return sections
+
+
+def read_db_file(file_path: str) -> Dict[str, List[str]]:
+    """
+    Reads a pacman database file ( see 'parse_db_sections' )
+    :param file_path:
+    :return: the values mapped by section
+    """
+    with open(file_path) as f:
+        return parse_db_sections(f)
+
+
+def map_desc(sections: Dict[str, List[str]]) -> Optional[dict]:
+    """
+    :param sections: sections of a pacman 'desc' file
+    :return: 'name', 'version', 'description', 'validation' ( e.g: ['pgp'], ['none'] ) and 'reason' ( 0: explicitly installed, 1: installed as a dependency )
+    """
+    if sections.get('%NAME%') and sections.get('%VERSION%'):
+        reason = sections.get('%REASON%')
+        return {'name': sections['%NAME%'][0],
+                'version': sections['%VERSION%'][0],
+                'description': ' '.join(sections['%DESC%']) if sections.get('%DESC%') else None,
+                'validation': sections.get('%VALIDATION%', []),
+                'reason': int(reason[0]) if reason else 0}
+
+
+def read_desc(file_path: str) -> Optional[dict]:
+    """
+    Reads the fields bauh needs from a pacman 'desc' file ( see 'map_desc' ).
+    :param file_path:
+    :return:
+    """
+    return map_desc(read_db_file(file_path))
+
+
+def map_provided_names(provides: Iterable[str]) -> Set[str]:
+    """
+    :param provides: '%PROVIDES%' values ( e.g: 'java-runtime=11', 'libfoo.so=1-64' )
+    :return: the provided names without their versions
+    """
+    return {p.split('=')[0].strip() for p in provides}
+
+
+def read_repositories(conf_path: str = PACMAN_CONF) -> List[str]:
+    """
+    :param conf_path: pacman configuration file
+    :return: the repositories in the order pacman looks for packages
+    """
+    repos = []
+
+    try:
+        with open(conf_path) as f:
+            for line in f:
+                line = line.strip()
+
+                if line.startswith('[') and line.endswith(']'):
+                    repo = line[1:-1].strip()
+
+                    if repo != 'options':
+                        repos.append(repo)
+    except OSError:
+        pass
+
+    return repos
+
+
+def read_sync_db(file_path: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Reads a repository database ( a compressed tar file with a directory per package holding its 'desc' file )
+    :param file_path:
+    :return: the package names and the names they provide
+    """
+    names, provided = set(), set()
+
+    with tarfile.open(file_path) as tar:
+        for member in tar:
+            # the provided names may be in a separate 'depends' file ( older database format )
+            if member.isfile() and member.name.endswith(('/desc', '/depends')):
+                sections = parse_db_sections(tar.extractfile(member).read().decode(errors='ignore').splitlines())
+
+                if sections.get('%NAME%'):
+                    names.add(sections['%NAME%'][0])
+
+                if sections.get('%PROVIDES%'):
+                    provided.update(map_provided_names(sections['%PROVIDES%']))
+
+    return names, provided
+
+
+class LocalDatabase:
+    """
+    Reads the installed packages straight from the pacman local database ( no subprocess involved ).
+    The packages read are kept in memory while the database directory is not modified ( packages installed, upgraded or removed ).
+    """
+
+    def __init__(self, path: str = PACMAN_LOCAL_DB, logger: logging.Logger = None):
+        self.path = path
+        self.logger = logger
+        self.lock = Lock()
+        self._pid = os.getpid()
+        self._mtime = None
+        self._pkgs = None
+        self._dirs = None  # package name -> database entry directory
+        self._provided = None  # names provided by the installed packages
+
+    def is_available(self) -> bool:
+        return os.path.isdir(self.path)
+
+    def get_mtime(self) -> float:
+        return os.stat(self.path).st_mtime
+
+    def _read(self) -> Tuple[Dict[str, dict], Dict[str, str], Set[str]]:
+        pkgs, dirs, provided = {}, {}, set()
+
+        for entry in os.scandir(self.path):
+            if entry.is_dir():
+                try:
+                    sections = read_db_file('{}/desc'.format(entry.path))
+                    pkg = map_desc(sections)
+
+                    if pkg:
+                        pkgs[pkg['name']] = pkg
+                        dirs[pkg['name']] = entry.path
+                        provided.update(map_provided_names(sections.get('%PROVIDES%', ())))
+                except FileNotFoundError:
+                    pass  # package being installed / removed
+                except:
+                    if self.logger:
+                        self.logger.warning("Could not read the pacman database entry '{}'".format(entry.path))
+
+                    traceback.print_exc()
+
+        return pkgs, dirs, provided
+
+    def read(self) -> Dict[str, dict]:
+        """
+        :return: the installed packages data ( see 'read_desc' ) mapped by name
+        """
+        if self._pid != os.getpid():  # forked process
+            self.lock = Lock()
+            self._pid = os.getpid()
+
+        self.lock.acquire()
+        try:
+            mtime = self.get_mtime()
+
+            if self._pkgs is None or mtime != self._mtime:
+                self._pkgs, self._dirs, self._provided = self._read()
+                self._mtime = mtime
+
+            return self._pkgs
+        finally:
+            self.lock.release()
+
+    def get_dir(self, pkgname: str) -> Optional[str]:
+        """
+        :param pkgname:
+        :return: the database entry directory of an installed package
+        """
+        self.read()
+        return self._dirs.get(pkgname)
+
+    def is_installed(self, name: str) -> bool:
+        """
+        :param name: package name or a name provided by a package ( e.g: 'java-runtime' )
+        :return: if the name is installed ( same as 'pacman -Q' )
+        """
+        return name in self.read() or name in self._provided
+
+    def read_files(self, pkgname: str) -> List[str]:
+        """
+        :param pkgname:
+        :return: the absolute paths of the files and directories ( ending with '/' ) installed by the package
+        """
+        pkg_dir = self.get_dir(pkgname)
+
+        if pkg_dir:
+            try:
+                return ['/' + f for f in read_db_file(pkg_dir + '/files').get('%FILES%', ())]
+            except FileNotFoundError:
+                pass
+
+        return []
+
+
+class FilesIndex:
+    """
+    Indexes the files bauh looks for ( desktop entries, icons and binaries ) of all installed packages in a single pass over the local database.
+    The index is rebuilt only when the database is modified.
+    """
+
+    def __init__(self, db: LocalDatabase, suffixes: Tuple[str, ...] = INDEXED_SUFFIXES, prefixes: Tuple[str, ...] = INDEXED_PREFIXES):
+        """
+        :param db:
+        :param suffixes: files ending with any of these suffixes are indexed
+        :param prefixes: files starting with any of these prefixes are indexed
+        """
+        self.db = db
+        self.suffixes = suffixes
+        self.prefixes = prefixes
+        self.lock = Lock()
+        self._pid = os.getpid()
+        self._mtime = None
+        self._files = None  # package name -> indexed files
+        self._suffix_pkgs = None  # suffix -> packages with files ending with it
+
+    def _build(self):
+        files, suffix_pkgs = {}, {s: set() for s in self.suffixes}
+
+        for pkgname in self.db.read():
+            pkg_files = []
+            for path in self.db.read_files(pkgname):
+                if path.endswith('/'):
+                    continue
+
+                matched = False
+                for suffix in self.suffixes:
+                    if path.endswith(suffix):
+                        suffix_pkgs[suffix].add(pkgname)
+                        matched = True
+                        break
+
+                if matched or path.startswith(self.prefixes):
+                    pkg_files.append(path)
+
+            if pkg_files:
+                files[pkgname] = pkg_files
+
+        return files, suffix_pkgs
+
+    def _get_index(self) -> Tuple[Dict[str, List[str]], Dict[str, Set[str]]]:
+        if self._pid != os.getpid():  # forked process
+            self.lock = Lock()
+            self._pid = os.getpid()
+
+        self.lock.acquire()
+        try:
+            mtime = self.db.get_mtime()
+
+            if self._files is None or mtime != self._mtime:
+                self._files, self._suffix_pkgs = self._build()
+                self._mtime = mtime
+
+            return self._files, self._suffix_pkgs
+        finally:
+            self.lock.release()
+
+    def get_packages(self, suffix: str) -> Set[str]:
+        """
+        :param suffix: one of the indexed suffixes
+        :return: the packages having files ending with the suffix
+        """
+        return self._get_index()[1].get(suffix, set())
+
+    def get_files(self, pkgnames: Iterable[str], suffixes: Tuple[str, ...] = None, prefix: str = None) -> List[str]:
+        """
+        :param pkgnames:
+        :param suffixes: only files ending with one of them ( must be indexed )
+        :param prefix: only files starting with it ( must be indexed )
+        :return: the indexed files of the given packages
+        """
+        files, suffix_pkgs = self._get_index()
+
+        if suffixes:
+            with_suffix = set()
+            for suffix in suffixes:
+                with_suffix.update(suffix_pkgs.get(suffix, ()))
+
+            pkgnames = [p for p in pkgnames if p in with_suffix]
+
+        res = []
+        for pkgname in pkgnames:
+            for path in files.get(pkgname, ()):
+                if (not suffixes or path.endswith(suffixes)) and (not prefix or path.startswith(prefix)):
+                    res.append(path)
+
+        return res
+
+
+class SyncDatabase:
+    """
+    Maps package names ( and the names they provide ) to the repositories they are available from by reading the
+    repositories databases once ( no subprocess involved ). Only the databases modified since the last read ( e.g: after
+    'pacman -Sy' ) are read again.
+    """
+
+    def __init__(self, path: str = PACMAN_SYNC_DB, conf_path: str = PACMAN_CONF, logger: logging.Logger = None):
+        self.path = path
+        self.conf_path = conf_path
+        self.logger = logger
+        self.lock = Lock()
+        self._pid = os.getpid()
+        self._dbs = {}  # repository -> ( database mtime, package names, provided names )
+        self._mtimes = None
+        self._index = None  # name -> repository
+
+    def is_available(self) -> bool:
+        return os.path.isdir(self.path)
+
+    def _list_mtimes(self) -> Dict[str, float]:
+        return {entry.name[0:-3]: entry.stat().st_mtime for entry in os.scandir(self.path) if entry.name.endswith('.db') and entry.is_file()}
+
+    def _build_index(self) -> Dict[str, str]:
+        repos = read_repositories(self.conf_path)
+        repos = [r for r in repos if r in self._dbs] + sorted(r for r in self._dbs if r not in repos)
+
+        index = {}
+        for field in (2, 1):  # package names take precedence over provided names
+            for repo in reversed(repos):  # the first repository ( pacman.conf order ) takes precedence
+                for name in self._dbs[repo][field]:
+                    index[name] = repo
+
+        return index
+
+    def get_index(self) -> Optional[Dict[str, str]]:
+        """
+        :return: names ( packages and provided ) mapped to their repositories. None if a database could not be read.
+        """
+        if self._pid != os.getpid():  # forked process
+            self.lock = Lock()
+            self._pid = os.getpid()
+
+        self.lock.acquire()
+        try:
+            mtimes = self._list_mtimes()
+
+            if self._index is None or mtimes != self._mtimes:
+                for repo in [*self._dbs]:
+                    if repo not in mtimes:
+                        del self._dbs[repo]
+
+                for repo, mtime in mtimes.items():
+                    if repo not in self._dbs or self._dbs[repo][0] != mtime:
+                        try:
+                            self._dbs[repo] = (mtime, *read_sync_db('{}/{}.db'.format(self.path, repo)))
+                        except (tarfile.TarError, OSError, EOFError):
+                            if self.logger:
+                                self.logger.warning("Could not read the pacman sync database '{}'".format(repo))
+
+                            traceback.print_exc()
+                            return
+
+                self._index = self._build_index()
+                self._mtimes = mtimes
+
+            return self._index
+        finally:
+            self.lock.release()
+
+    def get_repositories(self, names: Iterable[str]) -> Optional[Dict[str, str]]:
+        """
+        :param names: package names or names provided by packages
+        :return: the names available from the repositories mapped to their repository. None if the databases could not be read.
+        """
+        index = self.get_index()
+
+        if index is not None:
+            return {n: index[n] for n in names if n in index}
+
+
+local_db = LocalDatabase()
+sync_db = SyncDatabase()
+files_index = FilesIndex(local_db)
@@ -0,0 +1,204 @@
+import re
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from threading import Event, Lock
+from typing import Dict, Set, Callable, Optional, Any, List, Tuple
+
+from bauh.api.abstract.handler import ProcessWatcher
+from bauh.api.abstract.view import MessageType, ViewComponent
+
+RE_DEP_OPERATORS = re.compile(r'[<>=]')
+SRCINFO_DEPENDS_FIELDS = ('depends', 'makedepends', 'checkdepends')
+
+
+def map_dep_name(dep: str) -> str:
+    """
+    :param dep: dependency expression ( e.g: 'python>=3.7' )
+    :return: the dependency name ( e.g: 'python' )
+    """
+    return RE_DEP_OPERATORS.split(dep)[0].strip()
+
+
+def read_srcinfo_deps(srcinfo: dict, x86_64: bool) -> Set[str]:
+    """
+    :param srcinfo: .SRCINFO fields ( see 'aur.map_srcinfo' )
+    :param x86_64: if the 'x86_64' specific dependencies should be read as well
+    :return: the dependency expressions required to build and run the package
+    """
+    deps = set()
+    for field in SRCINFO_DEPENDS_FIELDS:
+        for attr in ((field, field + '_x86_64') if x86_64 else (field,)):
+            val = srcinfo.get(attr)
+
+            if val:
+                deps.update(val if isinstance(val, list) else (val,))
+
+    return deps
+
+
+def group_by_base(graph: Dict[str, Set[str]], bases: Dict[str, str]) -> Tuple[Dict[str, Set[str]], Dict[str, List[str]]]:
+    """
+    Groups the packages of a dependency graph by their package base, since the packages of a base ( split packages ) are built together.
+    :param graph: packages mapped to the packages of the graph they depend on
+    :param bases: packages mapped to their package base ( packages not informed are their own base )
+    :return: the package bases mapped to the bases they depend on, and the packages of each base ( a package comes after
+    the packages of its base it depends on )
+    """
+    base_graph, base_pkgs = {}, {}
+
+    for pkg in sorted(graph):
+        base = bases.get(pkg, pkg)
+        base_pkgs.setdefault(base, []).append(pkg)
+        base_graph.setdefault(base, set()).update(bases.get(d, d) for d in graph[pkg] if d in graph)
+
+    for base, deps in base_graph.items():
+        deps.discard(base)
+
+        remaining, ordered = base_pkgs[base], []
+        while remaining:
+            ready = [p for p in remaining if not graph[p].intersection(remaining)] or remaining  # a cycle keeps the names order
+            ordered.extend(ready)
+            remaining = [p for p in remaining if p not in ready]
+
+        base_pkgs[base] = ordered
+
+    return base_graph, base_pkgs
+
+
+def _build(build: Callable[[str], Any], pkg: str) -> Any:
+    try:
+        return build(pkg)
+    except:  # handled as a failed build
+        traceback.print_exc()
+
+
+def build_in_order(graph: Dict[str, Set[str]], build: Callable[[str], Any], install: Callable[[str, Any], bool], max_jobs: int,
+                   cancelled: Event = None) -> Optional[str]:
+    """
+    Builds the packages of a dependency graph as soon as their dependencies are installed. Independent packages are built
+    at the same time ( up to 'max_jobs' ). The installations are done one at a time by the calling thread.
+    :param graph: packages mapped to the packages of the graph they depend on
+    :param build: builds a package. It should return what 'install' needs, or None if the build failed ( same as raising an exception ).
+    :param install: installs a built package
+    :param max_jobs: max number of builds at the same time. With 1, everything runs in the calling thread.
+    :param cancelled: set when a package is not built / installed, so the builds still running can give up
+    :return: the first package not built / installed ( or left out due to a dependency cycle )
+    """
+    waiting = {pkg: {d for d in deps if d in graph} for pkg, deps in graph.items()}
+    dependents = {}
+
+    for pkg, deps in waiting.items():
+        for dep in deps:
+            dependents.setdefault(dep, set()).add(pkg)
+
+    ready = sorted((pkg for pkg, deps in waiting.items() if not deps), reverse=True)
+    done = set()
+
+    def _installed(pkg: str):
+        done.add(pkg)
+
+        for dependent in sorted(dependents.get(pkg, ()), reverse=True):
+            waiting[dependent].discard(pkg)
+
+            if not waiting[dependent]:
+                ready.append(dependent)
+
+    if max_jobs <= 1:
+        while ready:
+            pkg = ready.pop()
+            built = _build(build, pkg)
+
+            if built is None or not install(pkg, built):
+                if cancelled:
+                    cancelled.set()
+
+                return pkg
+
+            _installed(pkg)
+    else:
+        with ThreadPoolExecutor(max_workers=max_jobs) as pool:
+            running = {}
+            while ready or running:
+                while ready and len(running) < max_jobs:
+                    pkg = ready.pop()
+                    running[pool.submit(_build, build, pkg)] = pkg
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in finished:
+                    pkg = running.pop(future)
+                    built = future.result()
+
+                    if built is None or not install(pkg, built):
+                        if cancelled:
+                            cancelled.set()
+
+                        for pending in running:  # the builds already running are waited
+                            pending.cancel()
+
+                        return pkg
+
+                    _installed(pkg)
+
+    for pkg in sorted(graph):
+        if pkg not in done:
+            return pkg
+
+
+class BuildWatcher(ProcessWatcher):
+    """
+    Watcher of a build running alongside other builds. Its output is kept and printed as a single block ( when the build
+    finishes or needs the user attention ), so the output of concurrent builds does not interleave. Once the builds are
+    cancelled, confirmations are denied and the build is asked to stop.
+    """
+
+    def __init__(self, watcher: ProcessWatcher, output_lock: Lock, cancelled: Event):
+        """
+        :param watcher: the watcher of the whole installation
+        :param output_lock: shared by the builds running at the same time
+        :param cancelled: see 'build_in_order'
+        """
+        self.watcher = watcher
+        self.output_lock = output_lock
+        self.cancelled = cancelled
+        self.lines = []
+
+    def print(self, msg: str):
+        self.lines.append(msg)
+
+    def flush(self):
+        """
+        Prints the output kept so far
+        """
+        if self.lines:
+            self.output_lock.acquire()
+            try:
+                for line in self.lines:
+                    self.watcher.print(line)
+            finally:
+                self.output_lock.release()
+
+            self.lines = []
+
+    def request_confirmation(self, title: str, body: str, components: List[ViewComponent] = None, confirmation_label: str = None, deny_label: str = None) -> bool:
+        if self.cancelled.is_set():
+            return False
+
+        self.flush()
+        return self.watcher.request_confirmation(title=title, body=body, components=components, confirmation_label=confirmation_label, deny_label=deny_label)
+
+    def show_message(self, title: str, body: str, type_: MessageType = MessageType.INFO):
+        self.flush()
+        self.watcher.show_message(title=title, body=body, type_=type_)
+
+    def change_status(self, msg: str):
+        self.watcher.change_status(msg)
+
+    def change_substatus(self, msg: str):
+        self.watcher.change_substatus(msg)
+
+    def change_progress(self, val: int):
+        pass  # the progress of the installation is changed as the builds are installed
+
+    def should_stop(self) -> bool:
+        return self.cancelled.is_set() or bool(self.watcher.should_stop())
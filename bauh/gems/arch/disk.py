@@ -1,33 +1,133 @@
-import json
-import os
 import re
-from pathlib import Path
-from typing import Set, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Set, List, Dict, Iterable, Tuple, Callable
 
+from bauh.commons.store import PackageDataStore
 from bauh.gems.arch import pacman
 from bauh.gems.arch.model import ArchPackage
 
-RE_DESKTOP_ENTRY = re.compile(r'(Exec|Icon)\s*=\s*(.+)')
 RE_CLEAN_NAME = re.compile(r'^(\w+)-?|_?.+')
+APPS_DIR = '/usr/share/applications/'
+ICON_SUFFIXES = ('.png', '.svg')
+DESKTOP_ENTRY_GROUP = '[Desktop Entry]'
+DESKTOP_ENTRY_KEYS = ('Exec', 'Icon')
+DESKTOP_ENTRIES_CHUNK = 25  # desktop entries read by each task
+MAX_DESKTOP_ENTRY_READERS = 4
+
+
+def read_desktop_entry(file_path: str, keys: Tuple[str, ...] = DESKTOP_ENTRY_KEYS) -> Dict[str, str]:
+    """
+    Reads the given keys from the '[Desktop Entry]' group of a desktop file. It stops reading as soon as all keys are found.
+    :param file_path:
+    :param keys:
+    :return: the values found mapped by key
+    """
+    res, in_group = {}, False
+
+    with open(file_path, errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+
+            if not line or line.startswith('#'):
+                continue
+
+            if line.startswith('['):
+                if in_group:  # the '[Desktop Entry]' group is over
+                    break
+
+                in_group = line == DESKTOP_ENTRY_GROUP
+            elif in_group:
+                key, sep, val = line.partition('=')
+                key = key.strip()
+
+                if sep and key in keys and key not in res:
+                    res[key] = val.strip()
+
+                    if len(res) == len(keys):
+                        break
+
+    return res
+
+
+def _fill_desktop_entries(pkgs: List[ArchPackage]) -> int:
+    for p in pkgs:
+        try:
+            entry = read_desktop_entry(p.desktop_entry)
+        except OSError:
+            continue
+
+        if entry.get('Exec'):
+            p.command = entry['Exec'].replace('"', '')
+
+        if entry.get('Icon'):
+            p.icon_path = entry['Icon']
+
+    return len(pkgs)
+
+
+def fill_desktop_entries(pkgs: List[ArchPackage], on_progress: Callable[[int, int], None] = None, total: int = None):
+    """
+    Fills the command and icon of packages with their desktop entry data. The files are read in parallel chunks.
+    :param pkgs: packages with their 'desktop_entry' defined
+    :param on_progress: called with the number of packages filled every time a chunk is finished
+    :param total: total passed to 'on_progress'. Default: the number of packages
+    :return:
+    """
+    chunks = [pkgs[i:i + DESKTOP_ENTRIES_CHUNK] for i in range(0, len(pkgs), DESKTOP_ENTRIES_CHUNK)]
+    total = total if total is not None else len(pkgs)
+
+    if len(chunks) == 1:
+        _fill_desktop_entries(chunks[0])
+
+        if on_progress:
+            on_progress(len(pkgs), total)
+    elif chunks:
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(len(chunks), MAX_DESKTOP_ENTRY_READERS)) as pool:
+            for future in as_completed([pool.submit(_fill_desktop_entries, c) for c in chunks]):
+                done += future.result()
+
+                if on_progress:
+                    on_progress(done, total)
 
 
-def write(app: ArchPackage):
-    data = app.get_data_to_cache()
+def map_by_basename(paths: Iterable[str], suffixes: Tuple[str, ...] = None) -> Dict[str, str]:
+    """
+    :param paths:
+    :param suffixes: suffixes to be removed from the basenames ( e.g: ['.png', '.svg'] )
+    :return: the paths mapped by their lower case basenames ( the first path found for each basename is kept )
+    """
+    res = {}
 
-    if data:
-        Path(app.get_disk_cache_path()).mkdir(parents=True, exist_ok=True)
+    for path in paths:
+        basename = path.split('/')[-1].lower()
 
-        with open(app.get_disk_data_path(), 'w+') as f:
-            f.write(json.dumps(data))
+        if suffixes:
+            for suffix in suffixes:
+                if basename.endswith(suffix):
+                    basename = basename[0:-len(suffix)]
+                    break
+            else:
+                continue
+
+        if basename not in res:
+            res[basename] = path
 
+    return res
 
-def fill_icon_path(app: ArchPackage, icon_paths: List[str], only_exact_match: bool):
-    ends_with = re.compile(r'.+/{}\.(png|svg)$'.format(app.icon_path if app.icon_path else app.name), re.IGNORECASE)
 
-    for path in icon_paths:
-        if ends_with.match(path):
-            app.icon_path = path
-            return
+def fill_icon_path(app: ArchPackage, icons_map: Dict[str, str], only_exact_match: bool):
+    """
+    :param app:
+    :param icons_map: icon paths mapped by their names ( see 'map_by_basename' )
+    :param only_exact_match: if the package icons should be looked up when no icon named as expected is found
+    :return:
+    """
+    icon_path = icons_map.get((app.icon_path if app.icon_path else app.name).lower())
+
+    if icon_path:
+        app.icon_path = icon_path
+        return
 
     if not only_exact_match:
         pkg_icons_path = pacman.list_icon_paths({app.name})
@@ -47,8 +147,22 @@ def set_icon_path(app: ArchPackage, icon_name: str = None):
                 break
 
 
-def save_several(pkgnames: Set[str], mirror: str, overwrite: bool = True, maintainer: str = None) -> int:
-    to_cache = {n for n in pkgnames if overwrite or not os.path.exists(ArchPackage.disk_cache_path(n, mirror))}
+def save_several(pkgnames: Set[str], mirror: str, disk_store: PackageDataStore, overwrite: bool = True, maintainer: str = None,
+                 on_progress: Callable[[int, int], None] = None) -> int:
+    """
+    :param pkgnames:
+    :param mirror:
+    :param disk_store:
+    :param overwrite: if the data of packages already cached should be overwritten
+    :param maintainer:
+    :param on_progress: called with the number of packages processed and the total
+    :return: the number of packages cached
+    """
+    if overwrite:
+        to_cache = pkgnames
+    else:
+        already_cached = disk_store.contains((ArchPackage.disk_data_key(n, mirror) for n in pkgnames))
+        to_cache = {n for n in pkgnames if ArchPackage.disk_data_key(n, mirror) not in already_cached}
     desktop_files = pacman.list_desktop_entries(to_cache)
 
     no_desktop_files = {}
@@ -56,16 +170,18 @@ def save_several(pkgnames: Set[str], mirror: str, overwrite: bool = True, mainta
     to_write = []
     if desktop_files:
         desktop_matches, no_exact_match = {}, set()
-        for pkg in to_cache:  # first try to find exact matches
-            ends_with = re.compile('/usr/share/applications/{}.desktop$'.format(pkg), re.IGNORECASE)
+        desktop_map = {}  # lower case path -> path
+        for f in desktop_files:
+            desktop_map.setdefault(f.lower(), f)
 
-            for f in desktop_files:
-                if ends_with.match(f):
-                    desktop_matches[pkg] = f
-                    break
+        for pkg in to_cache:  # first try to find exact matches
+            entry = desktop_map.get('{}{}.desktop'.format(APPS_DIR, pkg.lower()))
 
-            if pkg not in desktop_matches:
+            if entry:
+                desktop_matches[pkg] = entry
+            else:
                 no_exact_match.add(pkg)
+
         if no_exact_match:  # check every not matched app individually
             for pkg in no_exact_match:
                 entries = pacman.list_desktop_entries({pkg})
@@ -75,7 +191,7 @@ def save_several(pkgnames: Set[str], mirror: str, overwrite: bool = True, mainta
 
                     if len(entries) > 1:
                         for e in entries:
-                            if e.startswith('/usr/share/applications'):
+                            if e.startswith(APPS_DIR):
                                 desktop_matches[pkg] = e
                                 break
 
@@ -85,31 +201,23 @@ def save_several(pkgnames: Set[str], mirror: str, overwrite: bool = True, mainta
             if len(desktop_matches) != len(to_cache):
                 no_desktop_files = {p for p in to_cache if p not in desktop_matches}
 
-            pkgs, apps_icons_noabspath = [], []
-
+            pkgs = []
             for pkgname, file in desktop_matches.items():
                 p = ArchPackage(name=pkgname, mirror=mirror)
                 p.desktop_entry = file
+                pkgs.append(p)
 
-                with open(file) as f:
-                    desktop_entry = f.read()
-
-                for field in RE_DESKTOP_ENTRY.findall(desktop_entry):
-                    if field[0] == 'Exec':
-                        p.command = field[1].strip().replace('"', '')
-                    elif field[0] == 'Icon':
-                        p.icon_path = field[1].strip()
-
-                        if p.icon_path and '/' not in p.icon_path:  # if the icon full path is not defined
-                            apps_icons_noabspath.append(p)
+            fill_desktop_entries(pkgs, on_progress=on_progress, total=len(to_cache))
 
-                pkgs.append(p)
+            # if the icon full path is not defined:
+            apps_icons_noabspath = [p for p in pkgs if p.icon_path and '/' not in p.icon_path]
 
             if apps_icons_noabspath:
                 icon_paths = pacman.list_icon_paths({app.name for app in apps_icons_noabspath})
                 if icon_paths:
+                    icons_map = map_by_basename(icon_paths, ICON_SUFFIXES)
                     for p in apps_icons_noabspath:
-                        fill_icon_path(p, icon_paths, False)
+                        fill_icon_path(p, icons_map, False)
 
             for p in pkgs:
                 to_write.append(p)
@@ -119,27 +227,36 @@ def save_several(pkgnames: Set[str], mirror: str, overwrite: bool = True, mainta
         bin_paths = pacman.list_bin_paths(no_desktop_files)
 
         if bin_paths:
+            bin_map = map_by_basename(bin_paths)
             for p in pkgs:
-                ends_with = re.compile(r'.+/{}$'.format(p.name), re.IGNORECASE)
+                path = bin_map.get(p.name.lower())
 
-                for path in bin_paths:
-                    if ends_with.match(path):
-                        p.command = path
-                        break
+                if path:
+                    p.command = path
 
         icon_paths = pacman.list_icon_paths(no_desktop_files)
 
         if icon_paths:
+            icons_map = map_by_basename(icon_paths, ICON_SUFFIXES)
             for p in pkgs:
-                fill_icon_path(p, icon_paths, only_exact_match=True)
+                fill_icon_path(p, icons_map, only_exact_match=True)
 
         for p in pkgs:
             to_write.append(p)
 
+    if on_progress:
+        on_progress(len(to_cache), len(to_cache))
+
     if to_write:
+        to_store = {}
         for p in to_write:
             p.maintainer = maintainer
-            write(p)
+            data = p.get_data_to_cache()
+
+            if data:
+                to_store[p.get_disk_data_key()] = data
+
+        disk_store.put_many(to_store)  # a single transaction for all packages
         return len(to_write)
     return 0
 
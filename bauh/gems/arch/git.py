@@ -1,8 +1,14 @@
+import os
+import shutil
+import subprocess
 from datetime import datetime
 from typing import List
 
+from bauh.api.constants import CACHE_PATH
 from bauh.commons.system import new_subprocess
 
+CLONES_DIR = CACHE_PATH + '/arch/git'
+
 
 def is_enabled() -> bool:
     try:
@@ -12,18 +18,81 @@ def is_enabled() -> bool:
         return False
 
 
-def list_commits(proj_dir:str) -> List[dict]:
-    logs = new_subprocess(['git', 'log', '--date=iso'], cwd=proj_dir).stdout
+def get_clone_dir(name: str) -> str:
+    return '{}/{}.git'.format(CLONES_DIR, name)
+
+
+def update_clone(url: str, repo_dir: str) -> bool:
+    """
+    Creates a bare clone of the repository. If it already exists, only the new commits are fetched.
+    :param url:
+    :param repo_dir:
+    :return: if the clone is up to date
+    """
+    if os.path.exists(repo_dir):
+        proc = new_subprocess(['git', 'fetch', '--quiet', url, '+refs/heads/*:refs/heads/*'], cwd=repo_dir)
+    else:
+        os.makedirs(os.path.dirname(repo_dir), exist_ok=True)
+        proc = new_subprocess(['git', 'clone', '--bare', '--quiet', url, repo_dir])
+
+    proc.communicate()
+
+    if proc.returncode != 0:
+        if not os.path.exists(repo_dir + '/HEAD'):  # incomplete clone
+            shutil.rmtree(repo_dir, ignore_errors=True)
+
+        return False
+
+    return True
 
-    commits, commit = [], {}
-    for out in new_subprocess(['grep', '-E', 'commit|Date:'], stdin=logs).stdout:
-        if out:
-            line = out.decode()
-            if line.startswith('commit'):
-                commit['commit'] = line.split(' ')[1].strip()
-            elif line.startswith('Date'):
-                commit['date'] = datetime.fromisoformat(line.split(':')[1].strip())
-                commits.append(commit)
-                commit = {}
+
+def read_history(repo_dir: str, file_path: str) -> List[dict]:
+    """
+    Reads every version of a file in a single pass ( 'git log' + 'git cat-file --batch' ), without checking out any commit.
+    :param repo_dir:
+    :param file_path: file path relative to the repository root
+    :return: the commits that changed the file ( newest first ) with their 'commit', 'date' and the file 'content' ( None if it was removed )
+    """
+    commits = []
+    log, _ = new_subprocess(['git', 'log', '--format=%H %ct', '--', file_path], cwd=repo_dir).communicate()
+
+    for out in log.decode().split('\n'):
+        if out.strip():
+            commit, timestamp = out.split()
+            commits.append({'commit': commit, 'date': datetime.fromtimestamp(int(timestamp))})
+
+    if commits:
+        batch = new_subprocess(['git', 'cat-file', '--batch'], cwd=repo_dir, stdin=subprocess.PIPE)
+        output, _ = batch.communicate(''.join('{}:{}\n'.format(c['commit'], file_path) for c in commits).encode())
+
+        pos = 0
+        for commit in commits:  # each object: '<sha> blob <size>\n<content>\n' or '<name> missing\n'
+            header_end = output.index(b'\n', pos)
+            header = output[pos:header_end].split()
+
+            if header[-1] == b'missing':
+                commit['content'] = None
+                pos = header_end + 1
+            else:
+                size = int(header[2])
+                commit['content'] = output[header_end + 1:header_end + 1 + size].decode(errors='ignore')
+                pos = header_end + size + 2
 
     return commits
+
+
+def export(repo_dir: str, commit: str, output_dir: str) -> bool:
+    """
+    Extracts the repository files of a given commit
+    :param repo_dir:
+    :param commit:
+    :param output_dir:
+    :return: if the files were extracted
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    archive = new_subprocess(['git', 'archive', '--format=tar', commit], cwd=repo_dir)
+    extract = new_subprocess(['tar', '-x'], cwd=output_dir, stdin=archive.stdout)
+    archive.stdout.close()  # so 'git archive' is notified if 'tar' exits
+    extract.communicate()
+    archive.wait()
+    return archive.returncode == 0 and extract.returncode == 0
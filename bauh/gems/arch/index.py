@@ -0,0 +1,178 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from threading import Lock
+from typing import Iterable, List, Set
+
+
+def normalize(name: str) -> str:
+    return name.lower().replace('-', '').replace('_', '').replace('.', '')
+
+
+class NamesIndex:
+    """
+    Package names index for fast searches. Names are normalized ( lower case, without '-', '_' and '.' ).
+    Exact matches are found through a hash map, prefix matches through a sorted list and substring matches through a trigram index.
+    Names can be added and removed without rebuilding the whole index ( see 'update' ).
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.lock = Lock()
+        self._build(names)
+
+    def _build(self, names: Iterable[str]):
+        self.names = []  # real names ( None for removed names )
+        self.norms = []  # normalized names ( same position as 'names' )
+        self.exact = {}  # normalized name -> real names positions
+        self.trigrams = {}  # trigram -> positions of the names containing it ( removed positions are ignored )
+        self.removed = 0
+
+        for name in names:
+            self._add(name)
+
+        order = sorted(range(len(self.norms)), key=lambda i: self.norms[i])
+        self._sorted_idxs = array('I', order)  # positions ordered by normalized name
+        self._sorted_norms = [self.norms[i] for i in order]
+
+    def _add(self, name: str) -> int:
+        name = sys.intern(name)
+        norm = normalize(name)
+        idx = len(self.names)
+        self.names.append(name)
+        self.norms.append(norm)
+        self.exact.setdefault(norm, []).append(idx)
+
+        for trigram in {norm[i:i + 3] for i in range(len(norm) - 2)}:
+            postings = self.trigrams.get(trigram)
+
+            if postings is None:
+                postings = array('I')
+                self.trigrams[trigram] = postings
+
+            postings.append(idx)
+
+        return idx
+
+    def _remove(self, name: str):
+        norm = normalize(name)
+        idxs = self.exact.get(norm)
+
+        if idxs:
+            for idx in idxs:
+                if self.names[idx] == name:
+                    idxs.remove(idx)
+
+                    if not idxs:
+                        del self.exact[norm]
+
+                    pos = bisect_left(self._sorted_norms, norm)
+                    while self._sorted_idxs[pos] != idx:
+                        pos += 1
+
+                    del self._sorted_norms[pos]
+                    del self._sorted_idxs[pos]
+
+                    self.names[idx], self.norms[idx] = None, None
+                    self.removed += 1
+                    break
+
+    def update(self, added: Iterable[str], removed: Iterable[str]):
+        """
+        Applies the names changes. The index is rebuilt when too many names were removed.
+        :param added:
+        :param removed:
+        :return:
+        """
+        self.lock.acquire()
+        try:
+            for name in removed:
+                self._remove(name)
+
+            if self.removed > len(self.names) / 4:  # too many positions not used
+                self._build([*self.get_names(), *added])
+            else:
+                for name in added:
+                    norm = normalize(name)
+                    pos = bisect_right(self._sorted_norms, norm)
+                    self._sorted_norms.insert(pos, norm)
+                    self._sorted_idxs.insert(pos, self._add(name))
+        finally:
+            self.lock.release()
+
+    def get_names(self) -> Set[str]:
+        return {n for n in self.names if n is not None}
+
+    def __len__(self):
+        return len(self.names) - self.removed
+
+    def _prefixed(self, norm: str) -> List[int]:
+        res = []
+        for pos in range(bisect_left(self._sorted_norms, norm), len(self._sorted_norms)):
+            if not self._sorted_norms[pos].startswith(norm):
+                break
+
+            res.append(self._sorted_idxs[pos])
+
+        return res
+
+    def _containing(self, norm: str) -> List[int]:
+        if len(norm) < 3:
+            candidates = range(len(self.norms))
+        else:
+            postings = [self.trigrams.get(norm[i:i + 3]) for i in range(len(norm) - 2)]
+
+            if not all(postings):
+                return []
+
+            candidates = min(postings, key=len)  # the rarest trigram
+
+        return [i for i in candidates if self.norms[i] is not None and norm in self.norms[i]]
+
+    def search(self, words: str, limit: int = -1) -> List[str]:
+        """
+        :param words:
+        :param limit: max number of names returned. Values <= 0 mean no limit.
+        :return: the matched names ranked by exact, prefix and substring matches ( shorter names first )
+        """
+        norm = normalize(words.strip())
+
+        if not norm:
+            return []
+
+        self.lock.acquire()
+        try:
+            res, added = [], set()
+            ranked = (self.exact.get(norm, []),
+                      sorted(self._prefixed(norm), key=lambda i: (len(self.norms[i]), self.norms[i])),
+                      None)
+
+            for matches in ranked:
+                if matches is None:  # substring matches are only looked up if needed
+                    matches = sorted(self._containing(norm), key=lambda i: (len(self.norms[i]), self.norms[i]))
+
+                for idx in matches:
+                    if idx not in added:
+                        added.add(idx)
+                        res.append(self.names[idx])
+
+                        if 0 < limit <= len(res):
+                            return res
+
+            return res
+        finally:
+            self.lock.release()
+
+    def get_memory_usage(self) -> int:
+        """
+        :return: approximate number of bytes used by the index
+        """
+        self.lock.acquire()
+        try:
+            total = sum(sys.getsizeof(o) for o in (self.names, self.norms, self.exact, self.trigrams, self._sorted_idxs, self._sorted_norms))
+            total += sum(sys.getsizeof(n) for n in self.names if n is not None)
+            total += sum(sys.getsizeof(n) for n in self.norms if n is not None)
+            total += sum(sys.getsizeof(idxs) for idxs in self.exact.values())
+            total += sum(sys.getsizeof(t) + sys.getsizeof(p) for t, p in self.trigrams.items())
+            return total
+        finally:
+            self.lock.release()
@@ -1,14 +1,15 @@
 import re
 from datetime import datetime
+from functools import lru_cache
+from typing import Optional
 
 from bauh.api.abstract.model import PackageStatus
 from bauh.api.http import HttpClient
+from bauh.gems.arch import vercmp
 from bauh.gems.arch.model import ArchPackage
 
 URL_PKG_DOWNLOAD = 'https://aur.archlinux.org/{}'
 RE_LETTERS = re.compile(r'\.([a-zA-Z]+)-\d+$')
-RE_ANY_LETTER = re.compile(r'[a-zA-Z]')
-RE_VERSION_DELS = re.compile(r'[.:#@\-_]')
 
 RE_SFX = ('r', 're', 'release')
 GA_SFX = ('ga', 'ge')
@@ -20,6 +21,12 @@ DEV_SFX = ('dev', 'devel', 'development')
 V_SUFFIX_MAP = {s: {'c': sfxs[0], 'p': idx} for idx, sfxs in enumerate([RE_SFX, GA_SFX, RC_SFX, BETA_SFX, AL_SFX, DEV_SFX]) for s in sfxs}
 
 
+@lru_cache(maxsize=vercmp.PARSED_VERSIONS_CACHE)
+def _release_suffix(version: str) -> Optional[str]:
+    suffix = RE_LETTERS.findall(version)
+    return suffix[0] if suffix else None
+
+
 class ArchDataMapper:
 
     def __init__(self, http_client: HttpClient):
@@ -54,13 +61,10 @@ class ArchDataMapper:
     @staticmethod
     def check_update(version: str, latest_version: str) -> bool:
         if version and latest_version:
-            current_sfx = RE_LETTERS.findall(version)
-            latest_sf = RE_LETTERS.findall(latest_version)
+            current_sfx = _release_suffix(version)
+            latest_sf = _release_suffix(latest_version)
 
             if latest_sf and current_sfx:
-                current_sfx = current_sfx[0]
-                latest_sf = latest_sf[0]
-
                 current_sfx_data = V_SUFFIX_MAP.get(current_sfx.lower())
                 latest_sfx_data = V_SUFFIX_MAP.get(latest_sf.lower())
 
@@ -72,38 +76,14 @@ class ArchDataMapper:
                         if current_sfx_data['c'] != latest_sfx_data['c']:
                             return latest_sfx_data['p'] < current_sfx_data['p']
                         else:
-                            return ''.join(latest_version.split(latest_sf)) > ''.join(version.split(current_sfx))
-
-                    return nlatest > nversion
+                            return vercmp.compare(''.join(latest_version.split(latest_sf)), ''.join(version.split(current_sfx))) > 0
 
-            latest_split = RE_VERSION_DELS.split(latest_version)
-            version_split = RE_VERSION_DELS.split(version)
+                    return vercmp.compare(nlatest, nversion) > 0
 
-            for idx in range(len(latest_split)):
-                if idx < len(version_split):
-                    latest_part = latest_split[idx]
-                    version_part = version_split[idx]
+            return vercmp.compare(latest_version, version) > 0
 
-                    if latest_part != version_part:
-                        if RE_ANY_LETTER.findall(latest_part) or RE_ANY_LETTER.findall(version_part):
-                            return latest_part > version_part
-                        else:
-                            dif = int(latest_part) - int(version_part)
-
-                            if dif > 0:
-                                return True
-                            elif dif < 0:
-                                return False
-                            else:
-                                continue
         return False
 
-    def fill_package_build(self, pkg: ArchPackage):
-        res = self.http_client.get(pkg.get_pkg_build_url())
-
-        if res and res.status_code == 200 and res.text:
-            pkg.pkgbuild = res.text
-
     def map_api_data(self, apidata: dict, installed: dict) -> ArchPackage:
         data = installed.get(apidata.get('Name'))
         app = ArchPackage(name=apidata.get('Name'), installed=bool(data), mirror='aur')
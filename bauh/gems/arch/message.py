@@ -1,11 +1,14 @@
+from typing import List
+
 from bauh.api.abstract.handler import ProcessWatcher
 from bauh.api.abstract.view import MessageType
 from bauh.commons.html import bold
 
 
-def show_dep_not_installed(watcher: ProcessWatcher, pkgname: str, depname: str, i18n: dict):
+def show_deps_not_installed(watcher: ProcessWatcher, pkgname: str, depnames: List[str], i18n: dict):
+    key = 'arch.install.dependency.install.error' if len(depnames) == 1 else 'arch.install.dependencies.install.error'
     watcher.show_message(title=i18n['error'],
-                         body=i18n['arch.install.dependency.install.error'].format(bold(depname), bold(pkgname)),
+                         body=i18n[key].format(', '.join(bold(d) for d in depnames), bold(pkgname)),
                          type_=MessageType.ERROR)
 
 
@@ -15,7 +18,8 @@ def show_dep_not_found(depname: str, i18n: dict, watcher: ProcessWatcher):
                          type_=MessageType.ERROR)
 
 
-def show_optdep_not_installed(depname: str, watcher: ProcessWatcher, i18n: dict):
+def show_optdeps_not_installed(depnames: List[str], watcher: ProcessWatcher, i18n: dict):
+    key = 'arch.install.optdep.error' if len(depnames) == 1 else 'arch.install.optdeps.error'
     watcher.show_message(title=i18n['error'],
-                         body=i18n['arch.install.optdep.error'].format(bold(depname)),
+                         body=i18n[key].format(', '.join(bold(d) for d in depnames)),
                          type_=MessageType.ERROR)
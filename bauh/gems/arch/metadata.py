@@ -0,0 +1,189 @@
+import gzip
+import json
+import logging
+import os
+import time
+import traceback
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List, Iterable, Tuple, Set
+
+from bauh.api.constants import CACHE_PATH
+from bauh.api.http import HttpClient
+
+URL_METADATA = 'https://aur.archlinux.org/packages-meta-v1.json.gz'
+METADATA_DIR = CACHE_PATH + '/arch/aur'
+METADATA_FILE = 'packages-meta-v1.json.gz'
+MAX_SEARCH_RESULTS = 200
+
+
+class AURMetadataStore:
+    """
+    Local copy of the AUR packages metadata ( versions, descriptions, votes, package bases, ... ) built from the AUR metadata dump.
+    The dump is saved to the disk and only downloaded again when it is modified ( conditional requests based on ETag / Last-Modified ).
+    The packages data are mapped as returned by the AUR RPC ( 'Name', 'Version', 'Description', ... ).
+    """
+
+    def __init__(self, http_client: HttpClient, logger: logging.Logger, url: str = URL_METADATA, path: str = METADATA_DIR):
+        """
+        :param http_client:
+        :param logger:
+        :param url: metadata dump address
+        :param path: directory where the dump is saved
+        """
+        self.http_client = http_client
+        self.logger = logger
+        self.url = url
+        self.path = path
+        self.lock = Lock()
+        self._pkgs = None  # name -> package data
+        self._validators = {}  # 'etag' and 'last_modified' of the dump loaded
+
+    def _file_path(self) -> str:
+        return '{}/{}'.format(self.path, METADATA_FILE)
+
+    def _validators_path(self) -> str:
+        return self._file_path() + '.json'
+
+    def is_ready(self) -> bool:
+        return self._pkgs is not None
+
+    def _parse(self, content: bytes) -> Dict[str, dict]:
+        if content[0:2] == b'\x1f\x8b':  # gzip
+            content = gzip.decompress(content)
+
+        return {p['Name']: p for p in json.loads(content.decode()) if p.get('Name')}
+
+    def load(self) -> bool:
+        """
+        Loads the last dump saved to the disk
+        :return: if the dump could be loaded
+        """
+        if not os.path.exists(self._file_path()):
+            return False
+
+        try:
+            ti = time.time()
+            with open(self._file_path(), 'rb') as f:
+                pkgs = self._parse(f.read())
+
+            validators = {}
+            if os.path.exists(self._validators_path()):
+                with open(self._validators_path()) as f:
+                    validators = json.loads(f.read())
+
+            self.lock.acquire()
+            try:
+                self._pkgs, self._validators = pkgs, validators
+            finally:
+                self.lock.release()
+
+            self.logger.info('AUR metadata of {} packages loaded from the disk in {:.2f} seconds'.format(len(pkgs), time.time() - ti))
+            return True
+        except:
+            self.logger.error("Could not load the AUR metadata from '{}'".format(self._file_path()))
+            traceback.print_exc()
+            return False
+
+    def refresh(self) -> bool:
+        """
+        Downloads the metadata dump if it was modified since the last download
+        :return: if the metadata was modified
+        """
+        headers = {}
+        if self._pkgs is not None:
+            if self._validators.get('etag'):
+                headers['If-None-Match'] = self._validators['etag']
+
+            if self._validators.get('last_modified'):
+                headers['If-Modified-Since'] = self._validators['last_modified']
+
+        res = self.http_client.get(self.url, headers=headers)
+
+        if res is None:
+            self.logger.warning('Could not retrieve the AUR metadata from {}'.format(self.url))
+            return False
+
+        if res.status_code == 304:
+            self.logger.info('AUR metadata not modified')
+            return False
+
+        try:
+            pkgs = self._parse(res.content)
+        except:
+            self.logger.error('Invalid AUR metadata returned by {}'.format(self.url))
+            traceback.print_exc()
+            return False
+
+        validators = {'etag': res.headers.get('ETag'), 'last_modified': res.headers.get('Last-Modified')}
+
+        self.lock.acquire()
+        try:
+            self._pkgs, self._validators = pkgs, validators
+        finally:
+            self.lock.release()
+
+        try:
+            Path(self.path).mkdir(parents=True, exist_ok=True)
+
+            for file_path, content in ((self._file_path(), res.content), (self._validators_path(), json.dumps(validators).encode())):
+                with open(file_path + '.tmp', 'wb+') as f:
+                    f.write(content)
+
+                os.replace(file_path + '.tmp', file_path)
+        except:
+            self.logger.warning("Could not save the AUR metadata to '{}'".format(self.path))
+            traceback.print_exc()
+
+        self.logger.info('AUR metadata of {} packages updated'.format(len(pkgs)))
+        return True
+
+    def get(self, name: str) -> dict:
+        return self._pkgs.get(name) if self._pkgs else None
+
+    def get_info(self, names: Iterable[str]) -> Tuple[List[dict], Set[str]]:
+        """
+        :param names:
+        :return: the data of the packages found and the names not found
+        """
+        found, missing, pkgs = [], set(), self._pkgs or {}
+
+        for name in names:
+            data = pkgs.get(name)
+
+            if data:
+                found.append(data)
+            else:
+                missing.add(name)
+
+        return found, missing
+
+    def search(self, words: str, limit: int = MAX_SEARCH_RESULTS) -> List[dict]:
+        """
+        Same criteria as the AUR RPC 'search' ( words contained by the name or description ).
+        :param words:
+        :param limit: max number of results
+        :return: packages ranked by exact name, name and description matches, then by popularity
+        """
+        words = words.strip().lower()
+        exact, by_name, by_desc = [], [], []
+
+        for name, data in (self._pkgs or {}).items():
+            lname = name.lower()
+
+            if lname == words:
+                exact.append(data)
+            elif words in lname:
+                by_name.append(data)
+            elif data.get('Description') and words in data['Description'].lower():
+                by_desc.append(data)
+
+        res = exact
+        for matches in (by_name, by_desc):
+            if limit > 0 and len(res) >= limit:
+                break
+
+            matches.sort(key=lambda p: p.get('Popularity') or 0, reverse=True)
+            res.extend(matches)
+
+        return res[0:limit] if limit > 0 else res
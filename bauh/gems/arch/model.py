@@ -1,4 +1,5 @@
 import datetime
+import os
 from typing import List
 
 from bauh.api.abstract.model import SoftwarePackage
@@ -37,6 +38,10 @@ class ArchPackage(SoftwarePackage):
     def disk_cache_path(pkgname: str, mirror: str):
         return CACHE_PATH + '/arch/installed/' + ('aur' if mirror == 'aur' else 'mirror') + '/' + pkgname
 
+    @staticmethod
+    def disk_data_key(pkgname: str, mirror: str):
+        return os.path.relpath(ArchPackage.disk_cache_path(pkgname, mirror), CACHE_PATH)
+
     def get_pkg_build_url(self):
         if self.package_base:
             return 'https://aur.archlinux.org/cgit/aur.git/plain/PKGBUILD?h=' + self.package_base
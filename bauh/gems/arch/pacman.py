@@ -1,12 +1,14 @@
 import re
 import subprocess
-from typing import List, Set
+from typing import List, Set, Iterable
 
 from bauh.api.abstract.handler import ProcessWatcher
 from bauh.commons.system import run_cmd, new_subprocess, new_root_subprocess, SystemProcess, ProcessHandler
+from bauh.gems.arch.database import local_db, files_index, sync_db
 
 RE_DEPS = re.compile(r'[\w\-_]+:[\s\w_\-\.]+\s+\[\w+\]')
 RE_OPTDEPS = re.compile(r'[\w\._\-]+\s*:')
+RE_INSTALLED_FILE = re.compile(r'/.+\..+[^/]$')
 
 def is_enabled() -> bool:
     try:
@@ -17,6 +19,12 @@ def is_enabled() -> bool:
 
 
 def get_mirrors(pkgs: Set[str]) -> dict:
+    if sync_db.is_available():
+        mirrors = sync_db.get_repositories(pkgs)
+
+        if mirrors is not None:
+            return mirrors
+
     pkgre = '|'.join(pkgs)
 
     searchres = new_subprocess(['pacman', '-Ss', pkgre]).stdout
@@ -24,15 +32,21 @@ def get_mirrors(pkgs: Set[str]) -> dict:
 
     for line in new_subprocess(['grep', '-E', '.+/({}) '.format(pkgre)], stdin=searchres).stdout:
         if line:
-            match = line.decode()
-            for p in pkgs:
-                if p in match:
-                    mirrors[p] = match.split('/')[0]
+            repo_name = line.decode().split(' ')[0].split('/')
+
+            if len(repo_name) == 2 and repo_name[1] in pkgs:
+                mirrors[repo_name[1]] = repo_name[0]
 
     return mirrors
 
 
 def is_available_from_mirrors(pkg_name: str) -> bool:
+    if sync_db.is_available():
+        mirrors = sync_db.get_repositories((pkg_name,))
+
+        if mirrors is not None:
+            return bool(mirrors)
+
     return bool(run_cmd('pacman -Ss ' + pkg_name))
 
 
@@ -67,42 +81,88 @@ def get_info_dict(pkg_name: str) -> dict:
 
 
 def list_installed() -> Set[str]:
+    if local_db.is_available():
+        return {*local_db.read().keys()}
+
     return {out.decode().strip() for out in new_subprocess(['pacman', '-Qq']).stdout if out}
 
 
 def check_installed(pkg: str) -> bool:
+    if local_db.is_available():
+        return local_db.is_installed(pkg)
+
     res = run_cmd('pacman -Qq ' + pkg, print_error=False)
     return bool(res)
 
 
-def list_and_map_installed() -> dict:  # returns a dict with with package names as keys and versions as values
-    installed = new_subprocess(['pacman', '-Qq']).stdout  # retrieving all installed package names
-    allinfo = new_subprocess(['pacman', '-Qi'], stdin=installed).stdout  # retrieving all installed packages info
+def list_unsatisfied(deps: Iterable[str]) -> Set[str]:
+    """
+    :param deps: dependency expressions ( e.g: 'python', 'python>=3.7', 'java-runtime' )
+    :return: the expressions not satisfied by the installed packages ( versions and provided names are considered )
+    """
+    deps = [*deps]
 
-    pkgs, current_pkg = {'mirrors': {}, 'not_signed': {}}, {}
-    for out in new_subprocess(['grep', '-E', '(Name|Description|Version|Validated By)'],
-                              stdin=allinfo).stdout:  # filtering only the Name and Validated By fields:
-        if out:
-            line = out.decode()
+    if not deps:
+        return set()
+
+    return {out.decode().strip() for out in new_subprocess(['pacman', '-T', *deps]).stdout if out.strip()}
+
+
+def map_installed(pkgs: Iterable[dict]) -> dict:
+    """
+    :param pkgs: installed packages data read from the local database ( see database.read_desc )
+    :return: same as 'list_and_map_installed'
+    """
+    res = {'mirrors': {}, 'not_signed': {}}
 
-            if line.startswith('Name'):
-                current_pkg['name'] = line.split(':')[1].strip()
-            elif line.startswith('Version'):
-                version = line.split(':')
-                current_pkg['version'] = version[len(version) - 1].strip()
-            elif line.startswith('Description'):
-                current_pkg['description'] = line.split(':')[1].strip()
-            elif line.startswith('Validated'):
+    for pkg in pkgs:
+        if pkg['validation'] == ['none']:
+            res['not_signed'][pkg['name']] = {'version': pkg['version'].split(':')[-1],  # without the epoch
+                                              'description': pkg['description']}
 
-                if line.split(':')[1].strip().lower() == 'none':
-                    pkgs['not_signed'][current_pkg['name']] = {'version': current_pkg['version'],
-                                                               'description': current_pkg['description']}
+    return res
 
-                current_pkg = {}
+
+def map_installed_info(lines: Iterable[str]) -> dict:
+    """
+    :param lines: 'pacman -Qi' output lines
+    :return: same as 'list_and_map_installed'
+    """
+    pkgs, current_pkg = {'mirrors': {}, 'not_signed': {}}, {}
+    for line in lines:
+        if line.startswith('Name'):
+            current_pkg['name'] = line.split(':', 1)[1].strip()
+        elif line.startswith('Version'):
+            version = line.split(':')
+            current_pkg['version'] = version[len(version) - 1].strip()
+        elif line.startswith('Description'):
+            current_pkg['description'] = line.split(':', 1)[1].strip()
+        elif line.startswith('Validated'):
+
+            if line.split(':')[1].strip().lower() == 'none':
+                pkgs['not_signed'][current_pkg['name']] = {'version': current_pkg['version'],
+                                                           'description': current_pkg['description']}
+
+            current_pkg = {}
 
     return pkgs
 
 
+def list_and_map_installed() -> dict:  # returns a dict with with package names as keys and versions as values
+    """
+    Reads the pacman local database directly. If it is not available, the data is retrieved through 'pacman -Qi'.
+    :return: 'not_signed': the packages not validated ( AUR ) and their 'version' and 'description'
+    """
+    if local_db.is_available():
+        return map_installed(local_db.read().values())
+
+    installed = new_subprocess(['pacman', '-Qq']).stdout  # retrieving all installed package names
+    allinfo = new_subprocess(['pacman', '-Qi'], stdin=installed).stdout  # retrieving all installed packages info
+
+    # filtering only the Name, Description, Version and Validated By fields:
+    return map_installed_info(out.decode() for out in new_subprocess(['grep', '-E', '(Name|Description|Version|Validated By)'], stdin=allinfo).stdout if out)
+
+
 def install_as_process(pkgpath: str, root_password: str, aur: bool, pkgdir: str = '.') -> SystemProcess:
     if aur:
         cmd = ['pacman', '-U', pkgpath, '--noconfirm']  # pkgpath = install file path
@@ -112,8 +172,18 @@ def install_as_process(pkgpath: str, root_password: str, aur: bool, pkgdir: str
     return SystemProcess(new_root_subprocess(cmd, root_password, cwd=pkgdir), wrong_error_phrase='warning:')
 
 
+def install_from_mirrors_as_process(pkgnames: Iterable[str], root_password: str) -> SystemProcess:
+    """
+    Installs several packages from the mirrors in a single transaction ( packages already installed are skipped )
+    """
+    return SystemProcess(new_root_subprocess(['pacman', '-S', '--needed', '--noconfirm', *pkgnames], root_password), wrong_error_phrase='warning:')
+
+
 def list_desktop_entries(pkgnames: Set[str]) -> List[str]:
     if pkgnames:
+        if local_db.is_available():
+            return files_index.get_files(pkgnames, suffixes=('.desktop',))
+
         installed_files = new_subprocess(['pacman', '-Qlq', *pkgnames])
 
         desktop_files = []
@@ -125,6 +195,9 @@ def list_desktop_entries(pkgnames: Set[str]) -> List[str]:
 
 
 def list_icon_paths(pkgnames: Set[str]) -> List[str]:
+    if local_db.is_available():
+        return files_index.get_files(pkgnames, suffixes=('.png', '.svg'))
+
     installed_files = new_subprocess(['pacman', '-Qlq', *pkgnames])
 
     icon_files = []
@@ -138,6 +211,9 @@ def list_icon_paths(pkgnames: Set[str]) -> List[str]:
 
 
 def list_bin_paths(pkgnames: Set[str]) -> List[str]:
+    if local_db.is_available():
+        return files_index.get_files(pkgnames, prefix='/usr/bin/')
+
     installed_files = new_subprocess(['pacman', '-Qlq', *pkgnames])
 
     bin_paths = []
@@ -151,11 +227,14 @@ def list_bin_paths(pkgnames: Set[str]) -> List[str]:
 
 
 def list_installed_files(pkgname: str) -> List[str]:
+    if local_db.is_available():
+        return [f for f in local_db.read_files(pkgname) if RE_INSTALLED_FILE.match(f)]
+
     installed_files = new_subprocess(['pacman', '-Qlq', pkgname])
 
     f_paths = []
 
-    for out in new_subprocess(['grep', '-E', '/.+\..+[^/]$'], stdin=installed_files.stdout).stdout:
+    for out in new_subprocess(['grep', '-E', RE_INSTALLED_FILE.pattern], stdin=installed_files.stdout).stdout:
         if out:
             line = out.decode().strip()
             if line:
@@ -0,0 +1,106 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+RE_SEGMENT = re.compile(r'([^a-zA-Z0-9]*)([0-9]+|[a-zA-Z]+)')
+PARSED_VERSIONS_CACHE = 10000  # max number of parsed versions kept in memory
+
+
+@lru_cache(maxsize=PARSED_VERSIONS_CACHE)
+def _tokenize(version: str) -> Tuple[tuple, str]:
+    """
+    :param version:
+    :return: the version segments as ( separator length, is numeric, value ) and the trailing separators
+    """
+    tokens, size = [], 0
+
+    for sep, seg in RE_SEGMENT.findall(version):
+        tokens.append((len(sep), seg.isdigit(), int(seg) if seg.isdigit() else seg))
+        size += len(sep) + len(seg)
+
+    return tuple(tokens), version[size:]
+
+
+def _compare_segments(v1: str, v2: str) -> int:
+    """
+    Same algorithm as pacman's 'rpmvercmp'
+    """
+    if v1 == v2:
+        return 0
+
+    tokens1, trail1 = _tokenize(v1)
+    tokens2, trail2 = _tokenize(v2)
+
+    for t1, t2 in zip(tokens1, tokens2):
+        if t1[0] != t2[0]:  # different separators lengths
+            return -1 if t1[0] < t2[0] else 1
+
+        if t1[1] != t2[1]:  # numeric segments are always newer than alpha segments
+            return 1 if t1[1] else -1
+
+        if t1[2] != t2[2]:
+            return -1 if t1[2] < t2[2] else 1
+
+    common = min(len(tokens1), len(tokens2))
+
+    if len(tokens1) > common:  # a remaining alpha segment never beats an empty string
+        left = tokens1[common]
+        return -1 if not left[1] and (trail2 or not left[0]) else 1
+
+    if len(tokens2) > common:
+        left = tokens2[common]
+        return 1 if not left[1] and (trail1 or not left[0]) else -1
+
+    if bool(trail1) != bool(trail2):
+        return 1 if trail1 else -1
+
+    return 0
+
+
+@lru_cache(maxsize=PARSED_VERSIONS_CACHE)
+def parse(version: str) -> Tuple[str, str, str]:
+    """
+    :param version: [epoch:]pkgver[-pkgrel]
+    :return: epoch ( '0' when not defined ), pkgver and pkgrel ( None when not defined )
+    """
+    epoch, sep, rest = version.partition(':')
+
+    if sep and (not epoch or epoch.isdigit()):
+        epoch = epoch or '0'
+    else:
+        epoch, rest = '0', version
+
+    pkgver, sep, pkgrel = rest.rpartition('-')
+    return (epoch, pkgver, pkgrel) if sep else (epoch, rest, None)
+
+
+def compare(v1: str, v2: str) -> int:
+    """
+    Compares two package versions like pacman's 'vercmp'
+    :param v1:
+    :param v2:
+    :return: -1 if v1 is older than v2, 0 if they are equal and 1 if v1 is newer
+    """
+    if v1 == v2:
+        return 0
+
+    epoch1, pkgver1, pkgrel1 = parse(v1)
+    epoch2, pkgver2, pkgrel2 = parse(v2)
+
+    res = _compare_segments(epoch1, epoch2)
+
+    if res == 0:
+        res = _compare_segments(pkgver1, pkgver2)
+
+        if res == 0 and pkgrel1 is not None and pkgrel2 is not None:
+            res = _compare_segments(pkgrel1, pkgrel2)
+
+    return res
+
+
+def compare_many(pairs: Iterable[Tuple[str, str]]) -> List[int]:
+    """
+    :param pairs: pairs of versions ( e.g: installed and latest versions )
+    :return: the result of 'compare' for each pair
+    """
+    return [compare(v1, v2) for v1, v2 in pairs]
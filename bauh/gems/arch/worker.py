@@ -1,18 +1,27 @@
+import json
 import logging
 import os
 import re
 import time
+import traceback
 from math import ceil
-from multiprocessing import Process
+from multiprocessing import Process, Value
+from pathlib import Path
 from threading import Thread
+from typing import Tuple
+
+import requests
 
 from bauh.api.abstract.context import ApplicationContext
 from bauh.api.abstract.controller import SoftwareManager
-from bauh.api.constants import HOME_PATH
+from bauh.api.constants import HOME_PATH, CACHE_PATH
+from bauh.commons.store import PackageDataStore
 from bauh.gems.arch import pacman, disk
+from bauh.gems.arch.index import NamesIndex
 
 URL_INDEX = 'https://aur.archlinux.org/packages.gz'
 URL_INFO = 'https://aur.archlinux.org/rpc/?v=5&type=info&arg={}'
+NAMES_INDEX_FILE = '{}/arch/aur/packages.txt'.format(CACHE_PATH)  # first line: index validators
 
 GLOBAL_MAKEPKG = '/etc/makepkg.conf'
 USER_MAKEPKG = '{}/.makepkg.conf'.format(HOME_PATH)
@@ -23,24 +32,96 @@ RE_COMPRESS_XZ = re.compile(r'#?\s*COMPRESSXZ\s*=\s*.+')
 
 class AURIndexUpdater(Thread):
 
-    def __init__(self, context: ApplicationContext, man: SoftwareManager):
+    def __init__(self, context: ApplicationContext, man: SoftwareManager, index_file: str = NAMES_INDEX_FILE):
         super(AURIndexUpdater, self).__init__(daemon=True)
         self.http_client = context.http_client
         self.logger = context.logger
         self.man = man
+        self.index_file = index_file
+        self.validators = {}  # 'ETag' and 'Last-Modified' of the names index
+
+    def _refresh_metadata(self):
+        try:
+            self.man.aur_metadata.refresh()
+        except requests.exceptions.ConnectionError:
+            self.logger.warning('No internet connection: could not update the AUR metadata')
+        except:
+            self.logger.error('Could not update the AUR metadata')
+            traceback.print_exc()
+
+    def _load_index(self):
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file) as f:
+                    lines = f.read().split('\n')
+
+                self.validators = json.loads(lines[0]) if lines[0] else {}
+                self.man.names_index = NamesIndex(n for n in lines[1:] if n)
+                self.logger.info('{} AUR package names loaded from the disk'.format(len(self.man.names_index)))
+            except:
+                self.logger.error("Could not load the AUR names index from '{}'".format(self.index_file))
+                traceback.print_exc()
+
+    def _save_index(self):
+        try:
+            Path(os.path.dirname(self.index_file)).mkdir(parents=True, exist_ok=True)
+
+            with open(self.index_file + '.tmp', 'w+') as f:
+                f.write(json.dumps(self.validators) + '\n')
+                f.write('\n'.join(self.man.names_index.get_names()))
+
+            os.replace(self.index_file + '.tmp', self.index_file)
+        except:
+            self.logger.warning("Could not save the AUR names index to '{}'".format(self.index_file))
+            traceback.print_exc()
+
+    def _update_index(self):
+        headers = {}
+        if self.man.names_index:
+            if self.validators.get('ETag'):
+                headers['If-None-Match'] = self.validators['ETag']
+
+            if self.validators.get('Last-Modified'):
+                headers['If-Modified-Since'] = self.validators['Last-Modified']
+
+        res = self.http_client.get(URL_INDEX, headers=headers)
+
+        if res is not None and res.status_code == 304:
+            self.logger.info('AUR names index not modified')
+            return
+
+        if not res or not res.text:
+            self.logger.warning('No data returned from: {}'.format(URL_INDEX))
+            return
+
+        names = {n for n in res.text.split('\n') if n and not n.startswith('#')}
+
+        if self.man.names_index:
+            current = self.man.names_index.get_names()
+            added, removed = names.difference(current), current.difference(names)
+            self.man.names_index.update(added, removed)
+            self.logger.info('AUR names index updated: {} names added and {} removed'.format(len(added), len(removed)))
+        else:
+            self.man.names_index = NamesIndex(names)
+
+        self.validators = {h: res.headers[h] for h in ('ETag', 'Last-Modified') if res.headers.get(h)}
+        self._save_index()
+        self.logger.info('Pre-indexed {} AUR package names in memory ( ~{:.2f} MB )'.format(len(self.man.names_index), self.man.names_index.get_memory_usage() / 1024 / 1024))
 
     def run(self):
+        if self.man.aur_metadata:
+            self.man.aur_metadata.load()  # the last metadata saved is available even without internet connection
+
+        self._load_index()
+
         while True:
+            if self.man.aur_metadata:
+                self._refresh_metadata()
+
             self.logger.info('Pre-indexing AUR packages in memory')
             try:
-                res = self.http_client.get(URL_INDEX)
-
-                if res and res.text:
-                    self.man.names_index = {n.replace('-', '').replace('_', '').replace('.', ''): n for n in res.text.split('\n') if n and not n.startswith('#')}
-                    self.logger.info('Pre-indexed {} AUR package names in memory'.format(len(self.man.names_index)))
-                else:
-                    self.logger.warning('No data returned from: {}'.format(URL_INDEX))
-            except ConnectionError:
+                self._update_index()
+            except requests.exceptions.ConnectionError:
                 self.logger.warning('No internet connection: could not pre-index packages')
 
             time.sleep(5 * 60)  # updates every 5 minutes
@@ -48,10 +129,23 @@ class AURIndexUpdater(Thread):
 
 class ArchDiskCacheUpdater(Thread if bool(os.getenv('BAUH_DEBUG', 0)) else Process):
 
-    def __init__(self, logger: logging.Logger, disk_cache: bool):
+    def __init__(self, logger: logging.Logger, disk_cache: bool, disk_store: PackageDataStore):
         super(ArchDiskCacheUpdater, self).__init__(daemon=True)
         self.logger = logger
         self.disk_cache = disk_cache
+        self.disk_store = disk_store
+        self.done = Value('i', 0)  # shared with the main process
+        self.total = Value('i', -1)  # -1: not known yet
+
+    def _update_progress(self, done: int, total: int):
+        self.done.value = done
+        self.total.value = total
+
+    def get_progress(self) -> Tuple[int, int]:
+        """
+        :return: the number of packages already processed and the total ( -1 if not known yet )
+        """
+        return self.done.value, self.total.value
 
     def run(self):
         if self.disk_cache:
@@ -60,7 +154,8 @@ class ArchDiskCacheUpdater(Thread if bool(os.getenv('BAUH_DEBUG', 0)) else Proce
 
             saved = 0
             if installed and installed['not_signed']:
-                saved = disk.save_several({app for app in installed['not_signed']}, 'aur', overwrite=False)
+                saved = disk.save_several({app for app in installed['not_signed']}, 'aur', disk_store=self.disk_store, overwrite=False,
+                                          on_progress=self._update_progress)
 
             self.logger.info('Pre-cached data of {} AUR packages to the disk'.format(saved))
 
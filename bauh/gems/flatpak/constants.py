@@ -1,2 +1,3 @@
 FLATHUB_URL = 'https://flathub.org'
 FLATHUB_API_URL = FLATHUB_URL + '/api/v1'
+FLATHUB_MAX_CONNECTIONS = 5
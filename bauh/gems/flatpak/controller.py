@@ -2,6 +2,7 @@ import traceback
 from datetime import datetime
 from threading import Thread
 from typing import List, Set, Type
+from urllib.parse import urlparse
 
 from bauh.api.abstract.controller import SearchResult, SoftwareManager, ApplicationContext
 from bauh.api.abstract.disk import DiskCacheLoader
@@ -11,6 +12,7 @@ from bauh.api.abstract.view import MessageType
 from bauh.commons.html import strip_html
 from bauh.commons.system import SystemProcess, ProcessHandler
 from bauh.gems.flatpak import flatpak, suggestions
+from bauh.gems.flatpak.constants import FLATHUB_API_URL
 from bauh.gems.flatpak.model import FlatpakApplication
 from bauh.gems.flatpak.worker import FlatpakAsyncDataLoader, FlatpakUpdateLoader
 
@@ -23,6 +25,7 @@ class FlatpakManager(SoftwareManager):
         self.api_cache = context.cache_factory.new()
         context.disk_loader_factory.map(FlatpakApplication, self.api_cache)
         self.enabled = True
+        self.data_loader = FlatpakAsyncDataLoader(manager=self, context=context, api_cache=self.api_cache)
 
     def get_managed_types(self) -> Set["type"]:
         return {FlatpakApplication}
@@ -41,7 +44,7 @@ class FlatpakManager(SoftwareManager):
                     disk_loader.fill(app)  # preloading cached disk data
 
                 if internet:
-                    FlatpakAsyncDataLoader(app=app, api_cache=self.api_cache, manager=self, context=self.context).start()
+                    self.data_loader.load(app)
 
         else:
             app.fill_cached_data(api_data)
@@ -178,6 +181,9 @@ class FlatpakManager(SoftwareManager):
     def set_enabled(self, enabled: bool):
         self.enabled = enabled
 
+    def get_hosts(self) -> Set[str]:
+        return {urlparse(FLATHUB_API_URL).hostname}
+
     def can_work(self) -> bool:
         return flatpak.is_installed()
 
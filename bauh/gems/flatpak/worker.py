@@ -4,71 +4,64 @@ from threading import Thread
 from bauh.api.abstract.cache import MemoryCache
 from bauh.api.abstract.context import ApplicationContext
 from bauh.api.abstract.controller import SoftwareManager
-from bauh.api.abstract.model import PackageStatus
 from bauh.api.http import HttpClient
-
-from bauh.gems.flatpak import flatpak
-from bauh.gems.flatpak.constants import FLATHUB_API_URL, FLATHUB_URL
+from bauh.commons.loader import AsyncPackageDataLoader
+from bauh.gems.flatpak.constants import FLATHUB_API_URL, FLATHUB_URL, FLATHUB_MAX_CONNECTIONS
 from bauh.gems.flatpak.model import FlatpakApplication
 
 
-class FlatpakAsyncDataLoader(Thread):
+class FlatpakAsyncDataLoader(AsyncPackageDataLoader):
+    """
+    Retrieves the applications data from Flathub. All requests go to the same host, so 'max_workers' is also the
+    max number of simultaneous connections to it.
+    """
 
-    def __init__(self, app: FlatpakApplication, manager: SoftwareManager, context: ApplicationContext, api_cache: MemoryCache):
-        super(FlatpakAsyncDataLoader, self).__init__(daemon=True)
-        self.app = app
+    def __init__(self, manager: SoftwareManager, context: ApplicationContext, api_cache: MemoryCache, max_workers: int = FLATHUB_MAX_CONNECTIONS):
+        super(FlatpakAsyncDataLoader, self).__init__(max_workers=max_workers, logger=context.logger)
         self.manager = manager
         self.http_client = context.http_client
         self.api_cache = api_cache
-        self.persist = False
-        self.logger = context.logger
-
-    def run(self):
-        if self.app:
-            self.app.status = PackageStatus.LOADING_DATA
 
-            try:
-                res = self.http_client.get('{}/apps/{}'.format(FLATHUB_API_URL, self.app.id))
+    def get_key(self, app: FlatpakApplication) -> str:
+        return app.id
 
-                if res.status_code == 200 and res.text:
-                    data = res.json()
+    def fetch(self, app_id: str, app: FlatpakApplication) -> dict:
+        res = self.http_client.get('{}/apps/{}'.format(FLATHUB_API_URL, app_id))
 
-                    if not self.app.version:
-                        self.app.version = data.get('version')
+        if res and res.text:
+            return res.json()
+        else:
+            self.logger.warning("Could not retrieve app data for id '{}'".format(app_id))
 
-                    if not self.app.name:
-                        self.app.name = data.get('name')
+    def fill(self, app: FlatpakApplication, data: dict):
+        if not app.version:
+            app.version = data.get('version')
 
-                    self.app.description = data.get('description', data.get('summary', None))
-                    self.app.icon_url = data.get('iconMobileUrl', None)
-                    self.app.latest_version = data.get('currentReleaseVersion', self.app.version)
+        if not app.name:
+            app.name = data.get('name')
 
-                    if self.app.latest_version and (not self.app.version or not self.app.update):
-                        self.app.version = self.app.latest_version
+        app.description = data.get('description', data.get('summary', None))
+        app.icon_url = data.get('iconMobileUrl', None)
+        app.latest_version = data.get('currentReleaseVersion', app.version)
 
-                    if not self.app.installed and self.app.latest_version:
-                        self.app.version = self.app.latest_version
+        if app.latest_version and (not app.version or not app.update):
+            app.version = app.latest_version
 
-                    if self.app.icon_url and self.app.icon_url.startswith('/'):
-                        self.app.icon_url = FLATHUB_URL + self.app.icon_url
+        if not app.installed and app.latest_version:
+            app.version = app.latest_version
 
-                    if data.get('categories'):
-                        self.app.categories = [c['name'] for c in data['categories']]
+        if app.icon_url and app.icon_url.startswith('/'):
+            app.icon_url = FLATHUB_URL + app.icon_url
 
-                    loaded_data = self.app.get_data_to_cache()
+        if data.get('categories'):
+            app.categories = [c['name'] for c in data['categories']]
 
-                    self.api_cache.add(self.app.id, loaded_data)
-                    self.persist = self.app.supports_disk_cache()
-                else:
-                    self.logger.warning("Could not retrieve app data for id '{}'. Server response: {}. Body: {}".format(self.app.id, res.status_code, res.content.decode()))
-            except:
-                self.logger.error("Could not retrieve app data for id '{}'".format(self.app.id))
-                traceback.print_exc()
+        loaded_data = app.get_data_to_cache()
 
-            self.app.status = PackageStatus.READY
+        self.api_cache.add(app.id, loaded_data)
 
-            if self.persist:
-                self.manager.cache_to_disk(pkg=self.app, icon_bytes=None, only_icon=False)
+        if app.supports_disk_cache():
+            self.manager.cache_to_disk(pkg=app, icon_bytes=None, only_icon=False)
 
 
 class FlatpakUpdateLoader(Thread):
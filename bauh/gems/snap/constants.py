@@ -1 +1,2 @@
 SNAP_API_URL = 'https://search.apps.ubuntu.com/api/v1'
+SNAP_API_MAX_CONNECTIONS = 5
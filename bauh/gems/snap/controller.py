@@ -2,6 +2,7 @@ import time
 from datetime import datetime
 from threading import Thread
 from typing import List, Set, Type
+from urllib.parse import urlparse
 
 from bauh.api.abstract.controller import SoftwareManager, SearchResult, ApplicationContext
 from bauh.api.abstract.disk import DiskCacheLoader
@@ -26,6 +27,7 @@ class SnapManager(SoftwareManager):
         self.enabled = True
         self.http_client = context.http_client
         self.logger = context.logger
+        self.data_loader = SnapAsyncDataLoader(manager=self, api_cache=self.api_cache, context=context)
 
     def map_json(self, app_json: dict, installed: bool,  disk_loader: DiskCacheLoader, internet: bool = True) -> SnapApplication:
         app = SnapApplication(publisher=app_json.get('publisher'),
@@ -51,7 +53,7 @@ class SnapManager(SoftwareManager):
                 disk_loader.fill(app)
 
             if internet:
-                SnapAsyncDataLoader(app=app, api_cache=self.api_cache, manager=self, context=self.context).start()
+                self.data_loader.load(app)
         else:
             app.fill_cached_data(api_data)
 
@@ -128,6 +130,9 @@ class SnapManager(SoftwareManager):
     def set_enabled(self, enabled: bool):
         self.enabled = enabled
 
+    def get_hosts(self) -> Set[str]:
+        return {urlparse(SNAP_API_URL).hostname}
+
     def can_work(self) -> bool:
         return snap.is_installed()
 
@@ -1,70 +1,60 @@
-import traceback
-from threading import Thread
-
 from bauh.api.abstract.cache import MemoryCache
 from bauh.api.abstract.context import ApplicationContext
 from bauh.api.abstract.controller import SoftwareManager
-from bauh.api.abstract.model import PackageStatus
+from bauh.commons.loader import AsyncPackageDataLoader
 from bauh.gems.snap import snap
-from bauh.gems.snap.constants import SNAP_API_URL
+from bauh.gems.snap.constants import SNAP_API_URL, SNAP_API_MAX_CONNECTIONS
 from bauh.gems.snap.model import SnapApplication
 
 
-class SnapAsyncDataLoader(Thread):
+class SnapAsyncDataLoader(AsyncPackageDataLoader):
+    """
+    Retrieves the applications data from the Snap API using the shared http client ( and its connection pool ).
+    """
 
-    def __init__(self, app: SnapApplication, manager: SoftwareManager, api_cache: MemoryCache,
-                 context: ApplicationContext):
-        super(SnapAsyncDataLoader, self).__init__(daemon=True)
-        self.app = app
-        self.id_ = '{}#{}'.format(self.__class__.__name__, id(self))
+    def __init__(self, manager: SoftwareManager, api_cache: MemoryCache, context: ApplicationContext, max_workers: int = SNAP_API_MAX_CONNECTIONS):
+        super(SnapAsyncDataLoader, self).__init__(max_workers=max_workers, logger=context.logger)
         self.manager = manager
         self.http_client = context.http_client
         self.api_cache = api_cache
-        self.persist = False
         self.download_icons = context.download_icons
-        self.logger = context.logger
-
-    def run(self):
-        if self.app:
-            self.app.status = PackageStatus.LOADING_DATA
-
-            try:
-                res = self.http_client.session.get('{}/search?q={}'.format(SNAP_API_URL, self.app.name))
-
-                if res:
-                    try:
-                        snap_list = res.json()['_embedded']['clickindex:package']
-                    except:
-                        self.logger.warning('Snap API response responded differently from expected for app: {}'.format(self.app.name))
-                        return
 
-                    if not snap_list:
-                        self.logger.warning("Could not retrieve app data for id '{}'. Server response: {}. Body: {}".format(self.app.id, res.status_code, res.content.decode()))
-                    else:
-                        snap_data = snap_list[0]
+    def get_key(self, app: SnapApplication) -> str:
+        return app.name
 
-                        api_data = {
-                            'confinement': snap_data.get('confinement'),
-                            'description': snap_data.get('description'),
-                            'icon_url': snap_data.get('icon_url') if self.download_icons else None
-                        }
+    def fetch(self, name: str, app: SnapApplication) -> dict:
+        res = self.http_client.get('{}/search?q={}'.format(SNAP_API_URL, name))
 
-                        self.api_cache.add(self.app.id, api_data)
-                        self.app.confinement = api_data['confinement']
-                        self.app.icon_url = api_data['icon_url']
-
-                        if not api_data.get('description'):
-                            api_data['description'] = snap.get_info(self.app.name, ('description',)).get('description')
-
-                        self.app.description = api_data['description']
-                        self.persist = self.app.supports_disk_cache()
-                else:
-                    self.logger.warning("Could not retrieve app data for id '{}'. Server response: {}. Body: {}".format(self.app.id, res.status_code, res.content.decode()))
+        if res:
+            try:
+                snap_list = res.json()['_embedded']['clickindex:package']
             except:
-                self.logger.error("Could not retrieve app data for id '{}'".format(self.app.id))
-                traceback.print_exc()
-
-            self.app.status = PackageStatus.READY
-
-            if self.persist:
-                self.manager.cache_to_disk(pkg=self.app, icon_bytes=None, only_icon=False)
+                self.logger.warning('Snap API response responded differently from expected for app: {}'.format(name))
+                return
+
+            if not snap_list:
+                self.logger.warning("Could not retrieve app data for id '{}'. Server response: {}. Body: {}".format(app.id, res.status_code, res.content.decode()))
+            else:
+                snap_data = snap_list[0]
+
+                api_data = {
+                    'confinement': snap_data.get('confinement'),
+                    'description': snap_data.get('description'),
+                    'icon_url': snap_data.get('icon_url') if self.download_icons else None
+                }
+
+                if not api_data.get('description'):
+                    api_data['description'] = snap.get_info(name, ('description',)).get('description')
+
+                return api_data
+        else:
+            self.logger.warning("Could not retrieve app data for id '{}'".format(app.id))
+
+    def fill(self, app: SnapApplication, api_data: dict):
+        self.api_cache.add(app.id, api_data)
+        app.confinement = api_data['confinement']
+        app.icon_url = api_data['icon_url']
+        app.description = api_data['description']
+
+        if app.supports_disk_cache():
+            self.manager.cache_to_disk(pkg=app, icon_bytes=None, only_icon=False)
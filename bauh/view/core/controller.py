@@ -1,15 +1,16 @@
 import time
 import traceback
 from argparse import Namespace
-from threading import Thread
-from typing import List, Set, Type
+from threading import Thread, Lock
+from typing import List, Set, Type, Callable
 
 from bauh.api.abstract.controller import SoftwareManager, SearchResult, ApplicationContext
 from bauh.api.abstract.disk import DiskCacheLoader
 from bauh.api.abstract.handler import ProcessWatcher
 from bauh.api.abstract.model import SoftwarePackage, PackageUpdate, PackageHistory, PackageSuggestion, PackageAction
 from bauh.api.exception import NoInternetException
-from bauh.commons import internet
+from bauh.commons import metrics
+from bauh.view.util.disk import ClosableDiskCacheLoader
 
 SUGGESTIONS_LIMIT = 5
 
@@ -21,18 +22,33 @@ class GenericSoftwareManager(SoftwareManager):
         self.managers = managers
         self.map = {t: m for m in self.managers for t in m.get_managed_types()}
         self._available_cache = {} if app_args.check_packaging_once else None
+        self.gem_timeout = app_args.gem_timeout
         self.thread_prepare = None
         self.i18n = context.i18n
         self.disk_loader_factory = context.disk_loader_factory
         self.logger = context.logger
         self._already_prepared = []
         self.working_managers = []
+        self._reading_installed = {}  # manager -> thread reading its installed packages
+        self._update_internet_hosts()
+
+    def _update_internet_hosts(self):
+        hosts = set()
+
+        if self.managers:
+            for man in self.managers:
+                if man.is_enabled():
+                    hosts.update(man.get_hosts())
+
+        self.context.internet_checker.set_hosts(hosts)
 
     def reset_cache(self):
         if self._available_cache is not None:
             self._available_cache = {}
             self.working_managers.clear()
 
+        self._update_internet_hosts()  # the enabled gems may have changed
+
     def _sort(self, apps: List[SoftwarePackage], word: str) -> List[SoftwarePackage]:
 
         exact_name_matches, contains_name_matches, others = [], [], []
@@ -79,31 +95,61 @@ class GenericSoftwareManager(SoftwareManager):
 
         return available
 
-    def _search(self, word: str, man: SoftwareManager, disk_loader, res: SearchResult):
+    def _sorted_result(self, res: SearchResult, word: str) -> SearchResult:
+        installed, new = self._sort([*res.installed], word), self._sort([*res.new], word)
+        return SearchResult(installed, new, len(installed) + len(new), dict(res.timings))
+
+    def _search(self, word: str, man: SoftwareManager, disk_loader, res: SearchResult, lock: Lock, on_partial: Callable[[SearchResult], None], partial: dict):
         if self._can_work(man):
-            mti = time.time()
-            apps_found = man.search(words=word, disk_loader=disk_loader)
-            mtf = time.time()
-            self.logger.info(man.__class__.__name__ + " took {0:.2f} seconds".format(mtf - mti))
+            with metrics.registry.span('search:{}'.format(man.__class__.__name__)) as span:
+                apps_found = man.search(words=word, disk_loader=disk_loader)
 
-            res.installed.extend(apps_found.installed)
-            res.new.extend(apps_found.new)
+            self.logger.info(man.__class__.__name__ + " took {0:.2f} seconds".format(span.duration))
 
-    def search(self, word: str, disk_loader: DiskCacheLoader = None, limit: int = -1) -> SearchResult:
+            snapshot = None
+            lock.acquire()
+            try:
+                res.installed.extend(apps_found.installed)
+                res.new.extend(apps_found.new)
+                res.timings[man.__class__.__name__] = span.duration
+
+                if on_partial and (apps_found.installed or apps_found.new):
+                    snapshot = self._sorted_result(res, word)
+            finally:
+                lock.release()
+
+            if snapshot:  # notified out of the lock, so the other managers can merge their results meanwhile
+                partial['lock'].acquire()
+                try:
+                    if snapshot.total > partial['total']:  # an older snapshot is not notified after a newer one
+                        partial['total'] = snapshot.total
+                        on_partial(snapshot)
+                finally:
+                    partial['lock'].release()
+
+    def search(self, word: str, disk_loader: DiskCacheLoader = None, limit: int = -1, on_partial: Callable[[SearchResult], None] = None) -> SearchResult:
+        """
+        :param word:
+        :param disk_loader:
+        :param limit:
+        :param on_partial: called with all the packages found so far every time a manager finishes its search
+        :return: the packages found by all the managers
+        """
         ti = time.time()
         self._wait_to_be_ready()
 
         res = SearchResult([], [], 0)
 
-        if internet.is_available(self.context.http_client, self.context.logger):
+        if self.context.internet_checker.is_available():
             norm_word = word.strip().lower()
             disk_loader = self.disk_loader_factory.new()
             disk_loader.start()
 
-            threads = []
+            threads, lock = [], Lock()
+            partial = {'lock': Lock(), 'total': 0}  # last partial result notified
 
             for man in self.managers:
-                t = Thread(target=self._search, args=(norm_word, man, disk_loader, res))
+                t = Thread(target=self._search, args=(norm_word, man, disk_loader, res, lock, on_partial, partial))
                 t.start()
                 threads.append(t)
 
@@ -114,14 +160,13 @@ class GenericSoftwareManager(SoftwareManager):
                 disk_loader.stop_working()
                 disk_loader.join()
 
-            res.installed = self._sort(res.installed, norm_word)
-            res.new = self._sort(res.new, norm_word)
-            res.total = len(res.installed) + len(res.new)
+            res = self._sorted_result(res, norm_word)
         else:
             raise NoInternetException()
 
         tf = time.time()
         self.logger.info('Took {0:.2f} seconds'.format(tf - ti))
+        metrics.registry.observe('search', tf - ti)
         return res
 
     def _wait_to_be_ready(self):
@@ -136,13 +181,39 @@ class GenericSoftwareManager(SoftwareManager):
         return True
 
     def _is_internet_available(self, res: dict):
-        res['available'] = internet.is_available(self.context.http_client, self.context.logger)
+        res['available'] = self.context.internet_checker.is_available()
 
     def _get_internet_check(self, res: dict) -> Thread:
         t = Thread(target=self._is_internet_available, args=(res,))
         t.start()
         return t
 
+    def _read_installed(self, man: SoftwareManager, disk_loader: DiskCacheLoader, thread_internet_check: Thread, net_check: dict, results: dict):
+        thread_internet_check.join()
+
+        try:
+            with metrics.registry.span('read_installed:{}'.format(man.__class__.__name__)) as span:
+                man_res = man.read_installed(disk_loader=disk_loader, pkg_types=None, internet_available=net_check['available'])
+        except:
+            self.logger.error("{} could not read the installed packages".format(man.__class__.__name__))
+            traceback.print_exc()
+            return
+
+        self.logger.info(man.__class__.__name__ + " took {0:.2f} seconds".format(span.duration))
+        results[man] = man_res, span.duration
+
+    def _get_working_managers(self, pkg_types: Set[Type[SoftwarePackage]]) -> List[SoftwareManager]:
+        if not pkg_types:  # any type
+            return [man for man in self.managers if self._can_work(man)]
+
+        managers = []
+        for t in pkg_types:
+            man = self.map.get(t)
+            if man and man not in managers and self._can_work(man):
+                managers.append(man)
+
+        return managers
+
     def read_installed(self, disk_loader: DiskCacheLoader = None, limit: int = -1, only_apps: bool = False, pkg_types: Set[Type[SoftwarePackage]] = None, net_check: bool = None) -> SearchResult:
         ti = time.time()
         self._wait_to_be_ready()
@@ -152,51 +223,53 @@ class GenericSoftwareManager(SoftwareManager):
 
         res = SearchResult([], None, 0)
 
-        disk_loader = None
+        managers = self._get_working_managers(pkg_types)
 
-        if not pkg_types:  # any type
-            for man in self.managers:
-                if self._can_work(man):
-                    if not disk_loader:
-                        disk_loader = self.disk_loader_factory.new()
-                        disk_loader.start()
+        if managers:
+            disk_loader = self.disk_loader_factory.new()
+            disk_loader.start()
 
-                    if thread_internet_check.isAlive():
-                        thread_internet_check.join()
+            results, workers = {}, []
+            for man in managers:
+                previous = self._reading_installed.get(man)
 
-                    mti = time.time()
-                    man_res = man.read_installed(disk_loader=disk_loader, pkg_types=None, internet_available=net_check['available'])
-                    mtf = time.time()
-                    self.logger.info(man.__class__.__name__ + " took {0:.2f} seconds".format(mtf - mti))
+                if previous and previous.is_alive():  # at most one thread per manager: the abandoned ones are not piled up
+                    self.logger.warning("{} is still reading its installed packages from a previous call. Ignoring it.".format(man.__class__.__name__))
+                    continue
 
-                    res.installed.extend(man_res.installed)
-                    res.total += man_res.total
-        else:
-            man_already_used = []
+                man_loader = ClosableDiskCacheLoader(disk_loader)
+                # daemon: a manager that does not finish in time is abandoned and does not block the exit
+                t = Thread(target=self._read_installed, args=(man, man_loader, thread_internet_check, net_check, results), daemon=True)
+                t.start()
+                self._reading_installed[man] = t
+                workers.append((man, t, man_loader))
 
-            for t in pkg_types:
-                man = self.map.get(t)
-                if man and (man not in man_already_used) and self._can_work(man):
+            deadline = time.time() + self.gem_timeout
+            for man, t, man_loader in workers:  # the results are merged following the managers order
+                t.join(max(0, deadline - time.time()))
+                man_loader.close()  # packages filled from now on are ignored
 
-                    if not disk_loader:
-                        disk_loader = self.disk_loader_factory.new()
-                        disk_loader.start()
+                man_name = man.__class__.__name__
+                if t.is_alive():
+                    self.logger.warning("{} did not return its installed packages within {} seconds. Ignoring it.".format(man_name, self.gem_timeout))
+                    continue
 
-                    thread_internet_check.join()
-                    mti = time.time()
-                    man_res = man.read_installed(disk_loader=disk_loader, pkg_types=None, internet_available=net_check['available'])
-                    mtf = time.time()
-                    self.logger.info(man.__class__.__name__ + " took {0:.2f} seconds".format(mtf - mti))
+                man_res, man_time = results.get(man, (None, None))
+                if man_time is None:  # failed
+                    continue
 
+                res.timings[man_name] = man_time
+
+                if man_res:
                     res.installed.extend(man_res.installed)
                     res.total += man_res.total
 
-        if disk_loader:
             disk_loader.stop_working()
             disk_loader.join()
 
         tf = time.time()
         self.logger.info('Took {0:.2f} seconds'.format(tf - ti))
+        metrics.registry.observe('read_installed', tf - ti)
         return res
 
     def downgrade(self, app: SoftwarePackage, root_password: str, handler: ProcessWatcher) -> bool:
@@ -232,7 +305,9 @@ class GenericSoftwareManager(SoftwareManager):
             ti = time.time()
             try:
                 self.logger.info('Installing {}'.format(app))
-                return man.install(app, root_password, handler)
+
+                with metrics.registry.span('install:{}'.format(man.__class__.__name__)):
+                    return man.install(app, root_password, handler)
             except:
                 traceback.print_exc()
                 return False
@@ -325,10 +400,10 @@ class GenericSoftwareManager(SoftwareManager):
 
     def _fill_suggestions(self, suggestions: list, man: SoftwareManager, limit: int):
         if self._can_work(man):
-            mti = time.time()
-            man_sugs = man.list_suggestions(limit)
-            mtf = time.time()
-            self.logger.info(man.__class__.__name__ + ' took {0:.2f} seconds'.format(mtf - mti))
+            with metrics.registry.span('list_suggestions:{}'.format(man.__class__.__name__)) as span:
+                man_sugs = man.list_suggestions(limit)
+
+            self.logger.info(man.__class__.__name__ + ' took {0:.2f} seconds'.format(span.duration))
 
             if man_sugs:
                 if len(man_sugs) > limit:
@@ -337,7 +412,7 @@ class GenericSoftwareManager(SoftwareManager):
                 suggestions.extend(man_sugs)
 
     def list_suggestions(self, limit: int) -> List[PackageSuggestion]:
-        if self.managers and internet.is_available(self.context.http_client, self.context.logger):
+        if self.managers and self.context.internet_checker.is_available():
             suggestions, threads = [], []
             for man in self.managers:
                 t = Thread(target=self._fill_suggestions, args=(suggestions, man, SUGGESTIONS_LIMIT))
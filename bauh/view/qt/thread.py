@@ -7,7 +7,7 @@ import requests
 from PyQt5.QtCore import QThread, pyqtSignal
 
 from bauh.api.abstract.cache import MemoryCache
-from bauh.api.abstract.controller import SoftwareManager
+from bauh.api.abstract.controller import SoftwareManager, SearchResult
 from bauh.api.abstract.handler import ProcessWatcher
 from bauh.api.abstract.model import PackageStatus, SoftwarePackage, PackageAction
 from bauh.api.abstract.view import InputViewComponent, MessageType
@@ -223,17 +223,22 @@ class GetAppHistory(AsyncAction):
 
 class SearchPackages(AsyncAction):
 
+    signal_partial = pyqtSignal(object)  # sends the packages found so far while the other managers are still searching
+
     def __init__(self, manager: SoftwareManager):
         super(SearchPackages, self).__init__()
         self.word = None
         self.manager = manager
 
+    def _notify_partial(self, res: SearchResult):
+        self.signal_partial.emit({'pkgs_found': [*res.installed, *res.new], 'error': None})
+
     def run(self):
         search_res = {'pkgs_found': [], 'error': None}
 
         if self.word:
             try:
-                res = self.manager.search(self.word)
+                res = self.manager.search(self.word, on_partial=self._notify_partial)
                 search_res['pkgs_found'].extend(res.installed)
                 search_res['pkgs_found'].extend(res.new)
             except NoInternetException:
@@ -209,6 +209,7 @@ class ManageWindow(QWidget):
         self.thread_get_info = self._bind_async_action(GetAppInfo(self.manager), finished_call=self._finish_get_info)
         self.thread_get_history = self._bind_async_action(GetAppHistory(self.manager, self.i18n), finished_call=self._finish_get_history)
         self.thread_search = self._bind_async_action(SearchPackages(self.manager), finished_call=self._finish_search, only_finished=True)
+        self.thread_search.signal_partial.connect(self._update_search_partial)
         self.thread_downgrade = self._bind_async_action(DowngradeApp(self.manager, self.i18n), finished_call=self._finish_downgrade)
         self.thread_suggestions = self._bind_async_action(FindSuggestions(man=self.manager), finished_call=self._finish_search, only_finished=True)
         self.thread_run_app = self._bind_async_action(LaunchApp(self.manager), finished_call=self._finish_run_app, only_finished=False)
@@ -848,6 +849,11 @@ class ManageWindow(QWidget):
             self.thread_search.word = word
             self.thread_search.start()
 
+    def _update_search_partial(self, res: dict):
+        if res['pkgs_found']:
+            self.ref_bt_upgrade.setVisible(False)
+            self.update_pkgs(res['pkgs_found'], as_installed=False, ignore_updates=True)
+
     def _finish_search(self, res: dict):
         self.finish_action()
 
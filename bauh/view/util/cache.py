@@ -1,19 +1,57 @@
-import datetime
+import heapq
+import sys
 import time
+from collections import OrderedDict
 from threading import Lock, Thread
 
 from bauh.api.abstract.cache import MemoryCache, MemoryCacheFactory
+from bauh.commons import metrics
+
+DEFAULT_MAX_ENTRIES = 5000
+
+
+def estimate_size(val: object) -> int:
+    """
+    :param val:
+    :return: an approximate number of bytes taken by a cached value ( the length of bytes / strings inside it )
+    """
+    if val is None:
+        return 0
+    elif isinstance(val, dict):
+        return sum(estimate_size(v) for v in val.values())
+    elif isinstance(val, (list, tuple, set)):
+        return sum(estimate_size(v) for v in val)
+    elif isinstance(val, (bytes, bytearray, str)) or hasattr(val, '__len__'):  # e.g: QByteArray
+        try:
+            return len(val)
+        except TypeError:
+            pass
+
+    return sys.getsizeof(val)
 
 
 class DefaultMemoryCache(MemoryCache):
     """
-    A synchronized cache implementation
+    A synchronized cache implementation. The least recently used keys are evicted when 'max_entries' or 'max_bytes' are exceeded.
+    Expired keys are tracked by a heap ( based on a monotonic clock ), so cleaning them does not require checking every key.
     """
 
-    def __init__(self, expiration_time: int):
+    def __init__(self, expiration_time: int, max_entries: int = None, max_bytes: int = None):
+        """
+        :param expiration_time: expiration time for the keys in seconds. Use -1 to disable this feature.
+        :param max_entries: max number of keys. None ( or <= 0 ) means no limit.
+        :param max_bytes: max number of bytes ( estimated ) the values can take. None ( or <= 0 ) means no limit.
+        """
         super(DefaultMemoryCache, self).__init__()
         self.expiration_time = expiration_time
-        self._cache = {}
+        self.max_entries = max_entries if max_entries is not None and max_entries > 0 else None
+        self.max_bytes = max_bytes if max_bytes is not None and max_bytes > 0 else None
+        self._cache = OrderedDict()  # key -> (value, expires_at, size). Ordered from the least to the most recently used.
+        self._expirations = []  # heap of (expires_at, key)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         self.lock = Lock()
 
     def is_enabled(self):
@@ -22,52 +60,119 @@ class DefaultMemoryCache(MemoryCache):
     def add(self, key: str, val: object):
         if key and self.is_enabled():
             self.lock.acquire()
-            self._add(key, val)
-            self.lock.release()
+            try:
+                self._add(key, val)
+            finally:
+                self.lock.release()
 
     def _add(self, key: str, val: object):
         if key:
-            self._cache[key] = {'val': val, 'expires_at': datetime.datetime.utcnow() + datetime.timedelta(seconds=self.expiration_time) if self.expiration_time > 0 else None}
+            self._remove(key)
+
+            expires_at = time.monotonic() + self.expiration_time if self.expiration_time > 0 else None
+            size = estimate_size(val) if self.max_bytes is not None else 0
+            self._cache[key] = (val, expires_at, size)
+            self._bytes += size
+
+            if expires_at is not None:
+                heapq.heappush(self._expirations, (expires_at, key))
+
+            self._evict()
+
+    def _remove(self, key: str) -> bool:
+        entry = self._cache.pop(key, None)
+
+        if entry:
+            self._bytes -= entry[2]
+            return True
+
+        return False
+
+    def _evict(self):
+        while self._cache and ((self.max_entries is not None and len(self._cache) > self.max_entries) or
+                               (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            key, entry = self._cache.popitem(last=False)
+            self._bytes -= entry[2]
+            self.evictions += 1
 
     def add_non_existing(self, key: str, val: object):
-        if key and self. is_enabled():
+        if key and self.is_enabled():
             self.lock.acquire()
-            cur_val = self.get(key)
+            try:
+                if self._get(key) is None:
+                    self._add(key, val)
+            finally:
+                self.lock.release()
 
-            if cur_val is None:
-                self._add(key, val)
+    def _get(self, key: str):
+        entry = self._cache.get(key)
 
-            self.lock.release()
+        if entry:
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+
+            self._cache.move_to_end(key)
+            return entry[0]
 
     def get(self, key: str):
         if key and self.is_enabled():
-            val = self._cache.get(key)
-
-            if val:
-                expiration = val.get('expires_at')
+            self.lock.acquire()
+            try:
+                val = self._get(key)
 
-                if expiration and expiration <= datetime.datetime.utcnow():
-                    self.lock.acquire()
-                    del self._cache[key]
-                    self.lock.release()
-                    return None
+                if val is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
 
-                return val['val']
+                return val
+            finally:
+                self.lock.release()
 
     def delete(self, key):
         if key and self.is_enabled():
-            if key in self._cache:
-                self.lock.acquire()
-                del self._cache[key]
+            self.lock.acquire()
+            try:
+                self._remove(key)
+            finally:
                 self.lock.release()
 
     def keys(self):
-        return set(self._cache.keys()) if self.is_enabled() else set()
+        if self.is_enabled():
+            self.lock.acquire()
+            try:
+                return set(self._cache.keys())
+            finally:
+                self.lock.release()
+
+        return set()
 
     def clean_expired(self):
         if self.is_enabled():
-            for key in self.keys():
-                self.get(key)
+            self.lock.acquire()
+            try:
+                now = time.monotonic()
+
+                while self._expirations and self._expirations[0][0] <= now:
+                    expires_at, key = heapq.heappop(self._expirations)
+                    entry = self._cache.get(key)
+
+                    if entry and entry[1] == expires_at:  # the key could have been added again with a newer expiration
+                        self._remove(key)
+
+                if len(self._expirations) > 2 * len(self._cache) + 100:  # drops the entries of deleted / evicted keys
+                    self._expirations = [(e[1], k) for k, e in self._cache.items() if e[1] is not None]
+                    heapq.heapify(self._expirations)
+            finally:
+                self.lock.release()
+
+    def get_stats(self) -> dict:
+        self.lock.acquire()
+        try:
+            return {'entries': len(self._cache), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+        finally:
+            self.lock.release()
 
 
 class CacheCleaner(Thread):
@@ -92,16 +197,36 @@ class CacheCleaner(Thread):
 
 class DefaultMemoryCacheFactory(MemoryCacheFactory):
 
-    def __init__(self, expiration_time: int, cleaner: CacheCleaner):
+    def __init__(self, expiration_time: int, cleaner: CacheCleaner, max_entries: int = DEFAULT_MAX_ENTRIES):
         """
         :param expiration_time: default expiration time for all instantiated caches
         :param cleaner
+        :param max_entries: default max number of keys for all instantiated caches ( used when 'new' is not called with a limit ). None ( or <= 0 ) means no limit.
         """
         super(DefaultMemoryCacheFactory, self).__init__()
         self.expiration_time = expiration_time
         self.cleaner = cleaner
-
-    def new(self, expiration: int = None) -> MemoryCache:
-        instance = DefaultMemoryCache(expiration if expiration is not None else self.expiration_time)
+        self.max_entries = max_entries
+        self.instances = []
+        metrics.registry.add_source('memory_caches', self.get_stats)
+
+    def new(self, expiration: int = None, max_entries: int = None, max_bytes: int = None) -> MemoryCache:
+        instance = DefaultMemoryCache(expiration if expiration is not None else self.expiration_time,
+                                      max_entries=max_entries if max_entries is not None else self.max_entries,
+                                      max_bytes=max_bytes)
         self.cleaner.register(instance)
+        self.instances.append(instance)
         return instance
+
+    def get_stats(self) -> dict:
+        """
+        :return: the stats of every cache instantiated and their totals
+        """
+        caches = []
+        for cache in self.instances:
+            stats = cache.get_stats()
+            stats.update({'expiration': cache.expiration_time, 'max_entries': cache.max_entries, 'max_bytes': cache.max_bytes})
+            caches.append(stats)
+
+        total = {attr: sum(c[attr] for c in caches) for attr in ('entries', 'bytes', 'hits', 'misses', 'evictions')}
+        return {'total': total, 'caches': caches}
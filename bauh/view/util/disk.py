@@ -1,22 +1,25 @@
-import json
 import logging
-import os
 import time
+import traceback
+from queue import Queue, Empty
 from threading import Thread, Lock
-from typing import Type, Dict
+from typing import Type, Dict, List, Tuple
 
 from bauh.api.abstract.cache import MemoryCache
 from bauh.api.abstract.disk import DiskCacheLoader, DiskCacheLoaderFactory
 from bauh.api.abstract.model import SoftwarePackage
+from bauh.commons.store import PackageDataStore
+
+END_OF_QUEUE = object()  # informs the loader no more packages will be queued
+MAX_BATCH_SIZE = 500  # max number of packages read by a single query
 
 
 class AsyncDiskCacheLoader(Thread, DiskCacheLoader):
 
-    def __init__(self, enabled: bool, cache_map: Dict[Type[SoftwarePackage], MemoryCache], logger: logging.Logger):
+    def __init__(self, enabled: bool, cache_map: Dict[Type[SoftwarePackage], MemoryCache], logger: logging.Logger, disk_store: PackageDataStore):
         super(AsyncDiskCacheLoader, self).__init__(daemon=True)
-        self.pkgs = []
-        self._work = True
-        self.lock = Lock()
+        self.pkgs = Queue()
+        self.disk_store = disk_store
         self.cache_map = cache_map
         self.enabled = enabled
         self.logger = logger
@@ -29,48 +32,111 @@ class AsyncDiskCacheLoader(Thread, DiskCacheLoader):
         :return:
         """
         if self.enabled and pkg and pkg.supports_disk_cache():
-            self.pkgs.append(pkg)
+            self.pkgs.put(pkg)
 
     def stop_working(self):
-        self._work = False
+        """
+        Packages added before this call are still read. The thread finishes after that.
+        :return:
+        """
+        self.pkgs.put(END_OF_QUEUE)
+
+    def _next_batch(self) -> Tuple[List[SoftwarePackage], bool]:
+        """
+        :return: the packages queued so far ( blocks until there is at least one ) and if the end of the queue was reached
+        """
+        batch = []
+        pkg = self.pkgs.get()  # blocks ( without consuming CPU ) until a package or the end is queued
+
+        while pkg is not END_OF_QUEUE:
+            batch.append(pkg)
+
+            if len(batch) == MAX_BATCH_SIZE:
+                return batch, False
+
+            try:
+                pkg = self.pkgs.get_nowait()
+            except Empty:
+                return batch, False
+
+        return batch, True
 
     def run(self):
         if self.enabled:
-            last = 0
+            ti, finished = None, False
 
-            while True:
-                time.sleep(0.00001)
-                if len(self.pkgs) > self.processed:
-                    pkg = self.pkgs[last]
+            while not finished:
+                batch, finished = self._next_batch()
 
-                    self._fill_cached_data(pkg)
-                    self.processed += 1
-                    last += 1
-                elif not self._work:
-                    break
+                if batch:
+                    if ti is None:
+                        ti = time.time()
 
-    def _fill_cached_data(self, pkg: SoftwarePackage) -> bool:
+                    try:
+                        self._fill_cached_data(batch)
+                    except:
+                        self.logger.error('Could not read the cached data of {} packages'.format(len(batch)))
+                        traceback.print_exc()
+
+                    self.processed += len(batch)
+
+            if self.processed:
+                tf = time.time()
+                self.logger.info('Cached data of {} packages read from the disk in {:.4f} seconds'.format(self.processed, tf - ti))
+
+    def _fill_cached_data(self, pkgs: List[SoftwarePackage]):
         if self.enabled:
-            if os.path.exists(pkg.get_disk_data_path()):
-                with open(pkg.get_disk_data_path()) as f:
-                    cached_data = json.loads(f.read())
+            cached = self.disk_store.get_many((p.get_disk_data_key() for p in pkgs))  # a single query for the whole batch
+
+            if cached:
+                for pkg in pkgs:
+                    cached_data = cached.get(pkg.get_disk_data_key())
+
                     if cached_data:
                         pkg.fill_cached_data(cached_data)
-                        cache = self.cache_map.get(pkg.__class__)\
+                        cache = self.cache_map.get(pkg.__class__)
 
                         if cache:
                             cache.add_non_existing(pkg.id, cached_data)
 
-                        return True
-        return False
+
+class ClosableDiskCacheLoader(DiskCacheLoader):
+    """
+    Forwards the packages to another loader until it is closed. Packages filled after that are ignored ( e.g: by a
+    manager that did not finish in time, after the loader it forwards to stopped working ).
+    """
+
+    def __init__(self, loader: DiskCacheLoader):
+        self.loader = loader
+        self.lock = Lock()
+        self.closed = False
+
+    def map(self, cache: MemoryCache, pkg_type: Type[SoftwarePackage]):
+        self.loader.map(cache, pkg_type)
+
+    def fill(self, pkg: SoftwarePackage):
+        self.lock.acquire()
+        try:
+            if not self.closed:
+                self.loader.fill(pkg)
+        finally:
+            self.lock.release()
+
+    def close(self):
+        self.lock.acquire()
+        try:
+            self.closed = True
+        finally:
+            self.lock.release()
 
 
 class DefaultDiskCacheLoaderFactory(DiskCacheLoaderFactory):
 
-    def __init__(self, disk_cache_enabled: bool, logger: logging.Logger):
+    def __init__(self, disk_cache_enabled: bool, logger: logging.Logger, disk_store: PackageDataStore):
         super(DefaultDiskCacheLoaderFactory, self).__init__()
         self.disk_cache_enabled = disk_cache_enabled
         self.logger = logger
+        self.disk_store = disk_store
         self.cache_map = {}
 
     def map(self, pkg_type: Type[SoftwarePackage], cache: MemoryCache):
@@ -79,4 +145,4 @@ class DefaultDiskCacheLoaderFactory(DiskCacheLoaderFactory):
                     self.cache_map[pkg_type] = cache
 
     def new(self) -> AsyncDiskCacheLoader:
-        return AsyncDiskCacheLoader(enabled=self.disk_cache_enabled, cache_map=self.cache_map, logger=self.logger)
+        return AsyncDiskCacheLoader(enabled=self.disk_cache_enabled, cache_map=self.cache_map, logger=self.logger, disk_store=self.disk_store)
@@ -0,0 +1,124 @@
+"""
+Compares how the Arch disk pre-cache ( disk.save_several ) matches the packages to their desktop entries, icons and binaries:
+the old regular expressions tested against every path versus the current hash maps.
+
+Usage ( from the repository root ): python3 benchmarks/arch_disk_matching.py [--packages 1000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import List, Dict, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bauh.gems.arch import disk
+from bauh.gems.arch.model import ArchPackage
+
+
+def gen_paths(pkgnames: List[str], seed: int) -> Tuple[List[str], List[str], List[str]]:
+    """
+    :return: desktop entries, icons and binaries paths ( 3 icons and 3 binaries per package, half of them not related to any )
+    """
+    rand = random.Random(seed)
+    others = ['other{}'.format(n) for n in range(len(pkgnames))]
+    desktop_files = ['/usr/share/applications/{}.desktop'.format(n) for n in pkgnames[0:len(pkgnames) // 2] + others]
+    icons = ['/usr/share/icons/hicolor/{}/apps/{}.{}'.format(size, n, rand.choice(('png', 'svg')))
+             for n in pkgnames + others for size in ('48x48', '128x128') if rand.random() > 0.25]
+    icons.extend('/usr/share/pixmaps/{}.xpm'.format(n) for n in others)
+    bins = ['/usr/bin/{}'.format(n) for n in pkgnames + others] + ['/usr/bin/{}-helper'.format(n) for n in pkgnames]
+
+    for paths in (desktop_files, icons, bins):
+        rand.shuffle(paths)
+
+    return desktop_files, icons, bins
+
+
+def old_matching(pkgnames: List[str], desktop_files: List[str], icon_paths: List[str], bin_paths: List[str]) -> Dict[str, tuple]:
+    res = {}
+    for pkg in pkgnames:
+        ends_with = re.compile('/usr/share/applications/{}.desktop$'.format(pkg), re.IGNORECASE)
+        entry = None
+
+        for f in desktop_files:
+            if ends_with.match(f):
+                entry = f
+                break
+
+        p = ArchPackage(name=pkg, mirror='aur')
+        ends_with = re.compile(r'.+/{}$'.format(p.name), re.IGNORECASE)
+
+        for path in bin_paths:
+            if ends_with.match(path):
+                p.command = path
+                break
+
+        ends_with = re.compile(r'.+/{}\.(png|svg)$'.format(p.name), re.IGNORECASE)
+
+        for path in icon_paths:
+            if ends_with.match(path):
+                p.icon_path = path
+                break
+
+        res[pkg] = (entry, p.command, p.icon_path)
+
+    return res
+
+
+def new_matching(pkgnames: List[str], desktop_files: List[str], icon_paths: List[str], bin_paths: List[str]) -> Dict[str, tuple]:
+    res = {}
+    desktop_map = {}
+    for f in desktop_files:
+        desktop_map.setdefault(f.lower(), f)
+
+    bin_map = disk.map_by_basename(bin_paths)
+    icons_map = disk.map_by_basename(icon_paths, disk.ICON_SUFFIXES)
+
+    for pkg in pkgnames:
+        entry = desktop_map.get('{}{}.desktop'.format(disk.APPS_DIR, pkg.lower()))
+        p = ArchPackage(name=pkg, mirror='aur')
+        p.command = bin_map.get(p.name.lower())
+        disk.fill_icon_path(p, icons_map, only_exact_match=True)
+        res[pkg] = (entry, p.command, p.icon_path)
+
+    return res
+
+
+def measure(func, repeat: int, *args) -> Tuple[float, object]:
+    best, res = None, None
+    for _ in range(repeat):
+        ti = time.perf_counter()
+        res = func(*args)
+        duration = time.perf_counter() - ti
+        best = duration if best is None else min(best, duration)
+
+    return best, res
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--packages', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pkgnames = ['pkg{}-{}'.format(n, 'git' if n % 3 == 0 else 'bin') for n in range(args.packages)]
+    desktop_files, icons, bins = gen_paths(pkgnames, args.seed)
+    print('{} packages / {} desktop entries / {} icons / {} binaries ( best of {} )'.format(len(pkgnames), len(desktop_files),
+                                                                                        len(icons), len(bins), args.repeat))
+
+    old_time, old_res = measure(old_matching, args.repeat, pkgnames, desktop_files, icons, bins)
+    new_time, new_res = measure(new_matching, args.repeat, pkgnames, desktop_files, icons, bins)
+
+    if old_res != new_res:
+        print('The results differ: {}'.format([n for n in pkgnames if old_res[n] != new_res[n]][0:10]))
+        sys.exit(1)
+
+    print('regular expressions: {0:.3f} s'.format(old_time))
+    print('hash maps:           {0:.3f} s ( {1:.0f}x faster )'.format(new_time, old_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
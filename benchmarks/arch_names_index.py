@@ -0,0 +1,106 @@
+"""
+Compares the AUR names search fallback: the old linear scan over the normalized names versus the names index
+( index.NamesIndex: hash map, sorted names and trigrams ).
+
+Usage ( from the repository root ): python3 benchmarks/arch_names_index.py [--names 80000] [--queries 300]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bauh.gems.arch.index import NamesIndex, normalize
+
+SUFFIXES = ('', '', '-git', '-bin', '-svn', '-hg', '-qt5', '-gtk3', '-nightly', '-beta')
+
+
+def gen_names(total: int, rand: random.Random) -> List[str]:
+    names = set()
+
+    while len(names) < total:
+        words = [''.join(rand.choice(string.ascii_lowercase) for _ in range(rand.randint(2, 8))) for _ in range(rand.randint(1, 3))]
+        prefix = rand.choice(('', '', 'python-', 'lib', 'ttf-', 'perl-', 'nodejs-'))
+        names.add(prefix + '-'.join(words) + rand.choice(SUFFIXES))
+
+    return sorted(names)
+
+
+def gen_queries(names: List[str], total: int, rand: random.Random) -> List[str]:
+    queries = []
+    for _ in range(total):
+        name = rand.choice(names)
+        kind = rand.randint(0, 3)
+
+        if kind == 0:  # exact
+            queries.append(name)
+        elif kind == 1:  # prefix
+            queries.append(name[0:rand.randint(2, len(name))])
+        elif kind == 2:  # substring
+            start = rand.randint(0, len(name) - 2)
+            queries.append(name[start:start + rand.randint(2, 6)])
+        else:  # probably not found
+            queries.append(''.join(rand.choice(string.ascii_lowercase) for _ in range(rand.randint(4, 8))))
+
+    return queries
+
+
+def old_search(names_index: Dict[str, str], words: str, limit: int) -> set:
+    to_query = set()
+    for norm_name, real_name in names_index.items():
+        if words in norm_name:
+            to_query.add(real_name)
+
+        if len(to_query) == limit:
+            break
+
+    return to_query
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--names', type=int, default=80000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--limit', type=int, default=25)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    names = gen_names(args.names, rand)
+    queries = [normalize(q) for q in gen_queries(names, args.queries, rand)]  # the old scan did not normalize the words
+    print('{} names / {} queries / limit {}'.format(len(names), len(queries), args.limit))
+
+    ti = time.perf_counter()
+    old_index = {normalize(n): n for n in names}
+    old_build = time.perf_counter() - ti
+
+    ti = time.perf_counter()
+    index = NamesIndex(names)
+    new_build = time.perf_counter() - ti
+
+    for query in queries:  # without a limit both find the same names ( the old dict kept a single name per normalized name )
+        if {normalize(n) for n in old_search(old_index, query, -1)} != {normalize(n) for n in index.search(query)}:
+            print("The results differ for '{}'".format(query))
+            sys.exit(1)
+
+    ti = time.perf_counter()
+    for query in queries:
+        old_search(old_index, query, args.limit)
+    old_time = (time.perf_counter() - ti) / len(queries)
+
+    ti = time.perf_counter()
+    for query in queries:
+        index.search(query, args.limit)
+    new_time = (time.perf_counter() - ti) / len(queries)
+
+    print('linear scan: {0:.3f} ms per query ( building the dict: {1:.2f} s )'.format(old_time * 1000, old_build))
+    print('names index: {0:.3f} ms per query ( building the index: {1:.2f} s ) - {2:.0f}x faster'.format(new_time * 1000, new_build,
+                                                                                                        old_time / new_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Compares the Arch update check: the old ArchDataMapper.check_update ( string / int comparisons of split parts )
+versus the current one based on the vercmp module ( a port of pacman's vercmp ).
+It also counts the pairs whose results differ between both implementations and the pairs the old one could not compare.
+
+Usage ( from the repository root ): python3 benchmarks/arch_vercmp.py [--pairs 3000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bauh.gems.arch import vercmp, mapper
+from bauh.gems.arch.mapper import ArchDataMapper, V_SUFFIX_MAP, RE_LETTERS
+
+RE_ANY_LETTER = re.compile(r'[a-zA-Z]')
+RE_VERSION_DELS = re.compile(r'[.:#@\-_]')
+
+
+def old_check_update(version: str, latest_version: str) -> bool:
+    if version and latest_version:
+        current_sfx = RE_LETTERS.findall(version)
+        latest_sf = RE_LETTERS.findall(latest_version)
+
+        if latest_sf and current_sfx:
+            current_sfx = current_sfx[0]
+            latest_sf = latest_sf[0]
+
+            current_sfx_data = V_SUFFIX_MAP.get(current_sfx.lower())
+            latest_sfx_data = V_SUFFIX_MAP.get(latest_sf.lower())
+
+            if current_sfx_data and latest_sfx_data:
+                nversion = version.split(current_sfx)[0]
+                nlatest = latest_version.split(latest_sf)[0]
+
+                if nversion == nlatest:
+                    if current_sfx_data['c'] != latest_sfx_data['c']:
+                        return latest_sfx_data['p'] < current_sfx_data['p']
+                    else:
+                        return ''.join(latest_version.split(latest_sf)) > ''.join(version.split(current_sfx))
+
+                return nlatest > nversion
+
+        latest_split = RE_VERSION_DELS.split(latest_version)
+        version_split = RE_VERSION_DELS.split(version)
+
+        for idx in range(len(latest_split)):
+            if idx < len(version_split):
+                latest_part = latest_split[idx]
+                version_part = version_split[idx]
+
+                if latest_part != version_part:
+                    if RE_ANY_LETTER.findall(latest_part) or RE_ANY_LETTER.findall(version_part):
+                        return latest_part > version_part
+                    else:
+                        dif = int(latest_part) - int(version_part)
+
+                        if dif > 0:
+                            return True
+                        elif dif < 0:
+                            return False
+                        else:
+                            continue
+    return False
+
+
+def gen_version(rand: random.Random) -> str:
+    version = '.'.join(str(rand.randint(0, 12)) for _ in range(rand.randint(1, 4)))
+    kind = rand.random()
+
+    if kind < 0.1:
+        version += '.{}'.format(rand.choice(('rc', 'beta', 'alpha', 'dev')))
+    elif kind < 0.2:
+        version += '.r{}.g{:07x}'.format(rand.randint(1, 3000), rand.randint(0, 0xfffffff))  # VCS packages
+    elif kind < 0.25:
+        version += rand.choice(('a', 'b', 'p1'))
+
+    if rand.random() < 0.05:
+        version = '{}:{}'.format(rand.randint(1, 2), version)
+
+    return '{}-{}'.format(version, rand.randint(1, 3))
+
+
+def gen_pairs(total: int, rand: random.Random) -> List[Tuple[str, str]]:
+    pairs = []
+    for _ in range(total):
+        version = gen_version(rand)
+        pairs.append((version, version if rand.random() < 0.5 else gen_version(rand)))  # most installed packages are up to date
+
+    return pairs
+
+
+def measure(check, pairs: List[Tuple[str, str]], repeat: int, clear_caches: bool) -> float:
+    best = None
+    for _ in range(repeat):
+        if clear_caches:
+            for cached in (vercmp._tokenize, vercmp.parse, mapper._release_suffix):
+                cached.cache_clear()
+
+        ti = time.perf_counter()
+        for version, latest in pairs:
+            try:
+                check(version, latest)
+            except ValueError:
+                pass
+
+        duration = time.perf_counter() - ti
+        best = duration if best is None else min(best, duration)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pairs', type=int, default=3000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    pairs = gen_pairs(args.pairs, random.Random(args.seed))
+
+    different, errors = 0, 0
+    for version, latest in pairs:
+        try:
+            if old_check_update(version, latest) != ArchDataMapper.check_update(version, latest):
+                different += 1
+        except ValueError:
+            errors += 1
+
+    old_time = measure(old_check_update, pairs, args.repeat, False)
+    cold_time = measure(ArchDataMapper.check_update, pairs, args.repeat, True)
+    warm_time = measure(ArchDataMapper.check_update, pairs, args.repeat, False)
+
+    print('{} pairs ( best of {} passes )'.format(len(pairs), args.repeat))
+    print('old check_update:         {0:.2f} ms per pass ( {1} different results, {2} errors )'.format(old_time * 1000, different, errors))
+    print('vercmp ( empty caches ):  {0:.2f} ms per pass'.format(cold_time * 1000))
+    print('vercmp ( warm caches ):   {0:.2f} ms per pass'.format(warm_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+import logging
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from bauh.api.http import HttpDiskCache, HttpClient
+
+URL = 'https://aur.archlinux.org/rpc/?v=5&type=info&arg[]=bauh'
+
+
+def new_response(status_code: int, body: bytes = None, headers: dict = None) -> requests.Response:
+    res = requests.Response()
+    res.status_code = status_code
+    res.headers = CaseInsensitiveDict(headers or {})
+    res._content = body
+    return res
+
+
+class Clock:
+
+    def __init__(self, now: float = 1000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class HttpDiskCacheTest(TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.clock = Clock()
+        self.time_patch = patch('bauh.api.http.time.time', self.clock)
+        self.time_patch.start()
+
+        self.cache = HttpDiskCache(logging.getLogger(__name__), path=self.path, max_size=1000, host_ttls={'aur.archlinux.org': 60})
+        self.client = HttpClient(logging.getLogger(__name__), sleep=0, cache=self.cache)
+        self.client.session = Mock()
+
+    def tearDown(self):
+        self.time_patch.stop()
+        shutil.rmtree(self.path)
+
+    def test_get__fresh_response_not_requested(self):
+        self.client.session.get.return_value = new_response(200, b'{"v": 1}', {'ETag': '"a"'})
+        self.assertEqual(b'{"v": 1}', self.client.get(URL).content)
+
+        self.clock.now += 59
+        res = self.client.get(URL)
+
+        self.assertEqual(b'{"v": 1}', res.content)
+        self.assertEqual('"a"', res.headers['etag'])
+        self.assertEqual(1, self.client.session.get.call_count)
+
+    def test_get__expired_response_revalidated(self):
+        self.client.session.get.return_value = new_response(200, b'{"v": 1}', {'ETag': '"a"', 'Last-Modified': 'Sat, 17 Oct 2026 10:00:00 GMT'})
+        self.client.get(URL)
+
+        self.clock.now += 61
+        self.client.session.get.return_value = new_response(304)
+        res = self.client.get(URL)
+
+        self.assertEqual(200, res.status_code)
+        self.assertEqual(b'{"v": 1}', res.content)  # the stored body is served
+        self.assertEqual({'If-None-Match': '"a"', 'If-Modified-Since': 'Sat, 17 Oct 2026 10:00:00 GMT'},
+                         self.client.session.get.call_args[1]['headers'])
+
+        # the stored timestamp is refreshed: fresh again without any request
+        self.assertEqual(self.clock.now, self.cache.get(URL)['meta']['stored_at'])
+        self.clock.now += 59
+        self.client.get(URL)
+        self.assertEqual(2, self.client.session.get.call_count)
+
+    def test_get__expired_response_replaced_when_modified(self):
+        self.client.session.get.return_value = new_response(200, b'{"v": 1}', {'ETag': '"a"'})
+        self.client.get(URL)
+
+        self.clock.now += 61
+        self.client.session.get.return_value = new_response(200, b'{"v": 2}', {'ETag': '"b"'})
+
+        self.assertEqual(b'{"v": 2}', self.client.get(URL).content)
+        self.assertEqual('"b"', self.cache.get(URL)['meta']['etag'])
+
+    def test_get__custom_headers_not_cached(self):
+        self.client.session.get.return_value = new_response(200, b'{"v": 1}', {'ETag': '"a"'})
+        self.client.get(URL)
+
+        self.client.session.get.return_value = new_response(304)
+        res = self.client.get(URL, headers={'If-None-Match': '"a"'})
+
+        self.assertEqual(304, res.status_code)  # returned to the caller as it is
+        self.assertEqual({'If-None-Match': '"a"'}, self.client.session.get.call_args[1]['headers'])
+        self.assertEqual(2, self.client.session.get.call_count)
+
+        self.client.session.get.return_value = new_response(200, b'{"v": 2}', {'ETag': '"b"'})
+        self.client.get(URL, headers={'Accept': 'application/json'})
+        self.assertEqual(b'{"v": 1}', self.cache.get(URL)['body'])  # not stored
+
+    def test_store__not_reusable_response_ignored(self):
+        url = 'https://not.cached.org/file'
+        self.cache.store(url, new_response(200, b'abc'))
+        self.assertIsNone(self.cache.get(url))
+
+    def test_store__least_recently_used_evicted(self):
+        urls = ['https://aur.archlinux.org/{}'.format(n) for n in range(4)]
+
+        for url in urls:  # 4 x 90 bytes
+            self.clock.now += 1
+            self.cache.store(url, new_response(200, b'x' * 90, {'ETag': url}))
+
+        self.clock.now += 1
+        self.assertIsNotNone(self.cache.get(urls[0]))  # the oldest one becomes the most recently used
+
+        for n in range(4, 12):  # exceeding the max size ( 1000 bytes )
+            self.clock.now += 1
+            self.cache.store('https://aur.archlinux.org/{}'.format(n), new_response(200, b'x' * 90, {'ETag': str(n)}))
+
+        self.assertLessEqual(self.cache._size, 1000)
+        self.assertEqual(990, self.cache._size)
+        self.assertIsNone(self.cache.get(urls[1]))  # the least recently used
+        self.assertIsNotNone(self.cache.get(urls[0]))
+        self.assertEqual(11, len([f for f in os.listdir(self.path) if f.endswith('.body')]))
+
+    def test_get__warm_cache_downloads_no_body(self):
+        urls = ['https://aur.archlinux.org/{}'.format(n) for n in range(5)]
+        self.client.session.get.side_effect = lambda url, timeout, headers: new_response(200, url.encode(), {'ETag': url})
+
+        for url in urls:
+            self.client.get(url)
+
+        # a new session reading the same directory
+        self.clock.now += 3600
+        cache = HttpDiskCache(logging.getLogger(__name__), path=self.path, max_size=1000, host_ttls={'aur.archlinux.org': 60})
+        client = HttpClient(logging.getLogger(__name__), sleep=0, cache=cache)
+        client.session = Mock()
+        client.session.get.return_value = new_response(304)
+
+        self.assertEqual([url.encode() for url in urls], [client.get(url).content for url in urls])
+        self.assertEqual(5, client.session.get.call_count)
+        self.assertTrue(all(c[1]['headers'].get('If-None-Match') for c in client.session.get.call_args_list))  # only conditional requests
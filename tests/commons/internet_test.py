@@ -0,0 +1,76 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from bauh.commons.internet import InternetChecker, PROBE_PORT
+
+
+class Clock:
+
+    def __init__(self, now: float = 100):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@patch('bauh.commons.internet.socket.create_connection')
+class InternetCheckerTest(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.time_patch = patch('bauh.commons.internet.time.monotonic', self.clock)
+        self.time_patch.start()
+        self.http_client = Mock()
+        self.checker = InternetChecker(Mock(), self.http_client, hosts=['flathub.org', 'aur.archlinux.org'], expiration=30)
+
+    def tearDown(self):
+        self.time_patch.stop()
+
+    def test_init__listens_to_the_http_client(self, create_connection: Mock):
+        self.http_client.add_connection_listener.assert_called_once_with(self.checker.notify)
+
+    def test_is_available__probed_only_when_expired(self, create_connection: Mock):
+        self.assertTrue(self.checker.is_available())
+        self.clock.now += 30
+        self.assertTrue(self.checker.is_available())
+        self.assertEqual(1, create_connection.call_count)
+
+        self.clock.now += 1
+        create_connection.side_effect = OSError()
+        self.assertFalse(self.checker.is_available())
+        self.assertEqual(3, create_connection.call_count)  # both hosts tried
+
+    def test_is_available__probe_falls_back_to_the_next_host(self, create_connection: Mock):
+        create_connection.side_effect = [OSError(), Mock()]
+
+        self.assertTrue(self.checker.is_available())
+        self.assertEqual([(('aur.archlinux.org', PROBE_PORT),), (('flathub.org', PROBE_PORT),)],
+                         [c[0] for c in create_connection.call_args_list])
+
+    def test_is_available__no_hosts_to_probe(self, create_connection: Mock):
+        self.checker.set_hosts([])
+        self.assertTrue(self.checker.is_available())
+        create_connection.assert_not_called()
+
+    def test_notify__success_refreshes_the_state(self, create_connection: Mock):
+        create_connection.side_effect = OSError()
+        self.assertFalse(self.checker.is_available())
+
+        self.clock.now += 10
+        self.checker.notify(True)
+        self.clock.now += 25  # expired for the probe, not for the notified state
+        self.assertTrue(self.checker.is_available())
+        self.assertEqual(2, create_connection.call_count)
+
+    def test_notify__failure_confirmed_by_the_probe(self, create_connection: Mock):
+        self.assertTrue(self.checker.is_available())
+
+        self.checker.notify(False)  # e.g: a single host is down
+        self.assertTrue(self.checker.is_available())  # the other hosts are reachable
+        self.assertEqual(2, create_connection.call_count)
+
+        self.checker.notify(False)
+        create_connection.side_effect = OSError()
+        self.assertFalse(self.checker.is_available())
+        self.assertFalse(self.checker.is_available())  # not probed again before expiring
+        self.assertEqual(4, create_connection.call_count)
@@ -0,0 +1,77 @@
+import logging
+from threading import Event
+from unittest import TestCase
+from unittest.mock import Mock
+
+from bauh.api.abstract.model import PackageStatus
+from bauh.commons.loader import AsyncPackageDataLoader
+
+
+class FakeLoader(AsyncPackageDataLoader):
+
+    def __init__(self):
+        super(FakeLoader, self).__init__(max_workers=2, logger=logging.getLogger(__name__))
+        self.fetched = []
+        self.release = Event()
+        self.release.set()
+
+    def get_key(self, pkg) -> str:
+        return pkg.id
+
+    def fetch(self, key: str, pkg) -> object:
+        self.fetched.append(key)
+        self.release.wait(5)
+        return 'data of {}'.format(key)
+
+    def fill(self, pkg, data: object):
+        pkg.data = data
+
+
+class AsyncPackageDataLoaderTest(TestCase):
+
+    def test_load__package_filled(self):
+        loader = FakeLoader()
+        pkg = Mock(id='a', data=None)
+
+        loader.load(pkg)
+        loader.executor.shutdown(wait=True)
+
+        self.assertEqual('data of a', pkg.data)
+        self.assertEqual(PackageStatus.READY, pkg.status)
+        self.assertEqual((1, 1), loader.get_progress())
+
+    def test_load__same_key_fetched_once(self):
+        loader = FakeLoader()
+        loader.release.clear()  # the first fetch is still running when the other packages are requested
+        pkgs = [Mock(id='a', data=None), Mock(id='a', data=None), Mock(id='b', data=None)]
+
+        for pkg in pkgs:
+            loader.load(pkg)
+
+        self.assertEqual(PackageStatus.LOADING_DATA, pkgs[1].status)
+        self.assertEqual((0, 2), loader.get_progress())
+
+        loader.release.set()
+        loader.executor.shutdown(wait=True)
+
+        self.assertEqual(['a', 'b'], sorted(loader.fetched))
+        self.assertEqual(['data of a', 'data of a', 'data of b'], [p.data for p in pkgs])
+        self.assertTrue(all(p.status == PackageStatus.READY for p in pkgs))
+        self.assertEqual((2, 2), loader.get_progress())
+
+    def test_get_metrics(self):
+        loader = FakeLoader()
+        self.assertEqual({'queued': 0, 'finished': 0, 'avg_latency': 0, 'max_latency': 0}, loader.get_metrics())
+
+        loader.release.clear()
+        loader.load(Mock(id='a'))
+        self.assertEqual(1, loader.get_metrics()['queued'])
+
+        loader.release.set()
+        loader.executor.shutdown(wait=True)
+
+        metrics = loader.get_metrics()
+        self.assertEqual(0, metrics['queued'])
+        self.assertEqual(1, metrics['finished'])
+        self.assertGreaterEqual(metrics['max_latency'], metrics['avg_latency'])
+        self.assertGreater(metrics['avg_latency'], 0)
@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from bauh import app_args
+from bauh.commons.metrics import MetricsRegistry, Histogram
+
+
+class MetricsRegistryTest(TestCase):
+
+    def test_inc__only_when_enabled(self):
+        registry = MetricsRegistry()
+        registry.inc('http.requests')
+        self.assertEqual({}, registry.counters)
+
+        registry.enable()
+        registry.inc('http.requests')
+        registry.inc('http.requests', 2)
+        self.assertEqual({'http.requests': 3}, registry.counters)
+
+    def test_histogram__percentiles(self):
+        histogram = Histogram()
+
+        for value in range(100, 0, -1):
+            histogram.observe(value)
+
+        self.assertEqual({'count': 100, 'sum': 5050, 'min': 1, 'max': 100, 'avg': 50.5, 'p50': 51, 'p95': 96}, histogram.to_dict())
+
+    def test_histogram__percentiles_of_the_recent_samples(self):
+        histogram = Histogram(max_samples=2)
+
+        for value in (100, 1, 2):
+            histogram.observe(value)
+
+        res = histogram.to_dict()
+        self.assertEqual(100, res['max'])
+        self.assertEqual(2, res['p95'])
+
+    def test_span__timing(self):
+        registry = MetricsRegistry(enabled=True)
+
+        with patch('bauh.commons.metrics.time.perf_counter', side_effect=[10.0, 10.25]):
+            with registry.span('cmd.handle:pacman') as span:
+                pass
+
+        self.assertEqual(0.25, span.duration)
+        self.assertEqual(0.25, registry.histograms['cmd.handle:pacman'].total)
+        self.assertEqual(1, len(registry.spans))
+        self.assertFalse(registry.spans[0]['failed'])
+
+    def test_span__failed(self):
+        registry = MetricsRegistry(enabled=True)
+
+        with self.assertRaises(ValueError):
+            with registry.span('read_installed:ArchManager'):
+                raise ValueError()
+
+        self.assertTrue(registry.spans[0]['failed'])
+
+    def test_dump__metrics_file(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            file_path = temp_dir + '/metrics.json'
+
+            with patch.object(sys, 'argv', ['bauh', '--metrics-file', file_path]):
+                args = app_args.read()
+
+            registry = MetricsRegistry(enabled=True)
+            registry.inc('http.requests')
+            registry.observe('read_installed', 1.5)
+            registry.add_source('memory_caches', lambda: {'hits': 3})
+            registry.dump(args.metrics_file)
+
+            self.assertTrue(os.path.exists(file_path))
+
+            with open(file_path) as f:
+                dumped = json.loads(f.read())
+
+            self.assertEqual({'http.requests': 1}, dumped['counters'])
+            self.assertEqual(1.5, dumped['histograms']['read_installed']['max'])
+            self.assertEqual({'memory_caches': {'hits': 3}}, dumped['sources'])
+        finally:
+            shutil.rmtree(temp_dir)
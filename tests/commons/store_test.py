@@ -0,0 +1,36 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+from bauh.commons.store import PackageDataStore
+
+
+class PackageDataStoreTest(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(self.root + '/flatpak/installed/org.gimp.GIMP')
+
+        with open(self.root + '/flatpak/installed/org.gimp.GIMP/data.json', 'w') as f:
+            f.write(json.dumps({'icon_url': 'gimp.svg'}))
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _new_store(self) -> PackageDataStore:
+        return PackageDataStore(logging.getLogger(__name__), path=self.root + '/packages.db', legacy_root=self.root)
+
+    def test_migrate__legacy_files_imported(self):
+        self.assertEqual({'icon_url': 'gimp.svg'}, self._new_store().get('flatpak/installed/org.gimp.GIMP'))
+        self.assertFalse(os.path.exists(self.root + '/flatpak/installed/org.gimp.GIMP/data.json'))
+
+    def test_migrate__retried_after_a_failure(self):
+        with patch('bauh.commons.store.json.dumps', side_effect=OSError):
+            self.assertIsNone(self._new_store().get('flatpak/installed/org.gimp.GIMP'))
+
+        self.assertTrue(os.path.exists(self.root + '/flatpak/installed/org.gimp.GIMP/data.json'))
+        self.assertEqual({'icon_url': 'gimp.svg'}, self._new_store().get('flatpak/installed/org.gimp.GIMP'))
@@ -0,0 +1,81 @@
+from threading import Lock
+from unittest import TestCase
+from unittest.mock import Mock
+from urllib.parse import urlparse, parse_qsl
+
+from bauh.gems.arch import aur
+from bauh.gems.arch.aur import AURClient
+from bauh.view.util.cache import DefaultMemoryCache
+
+
+class FakeRPC:
+    """
+    Answers the info requests like the AUR RPC for the packages it knows. The first 'fails' requests return nothing.
+    """
+
+    def __init__(self, known: set, fails: int = 0):
+        self.known = known
+        self.fails = fails
+        self.urls = []
+        self.lock = Lock()
+
+    def get_json(self, url: str):
+        with self.lock:
+            self.urls.append(url)
+
+            if self.fails > 0:
+                self.fails -= 1
+                return None
+
+        names = [v for k, v in parse_qsl(urlparse(url).query) if k.startswith('arg[')]
+        return {'type': 'multiinfo', 'results': [{'Name': n, 'Version': '1.0-1'} for n in names if n in self.known]}
+
+    def get(self, url: str):
+        with self.lock:
+            self.urls.append(url)
+
+        return Mock(status_code=200, text='pkgbase = {}\n\tdepends = git\n'.format(url.split('=')[-1]))
+
+
+class AURClientTest(TestCase):
+
+    def test_get_info__chunks_fit_the_url_limit(self):
+        names = ['package-with-a-long-name-{}'.format(i) for i in range(500)]
+        rpc = FakeRPC(set(names))
+
+        res = AURClient(rpc).get_info(names)
+
+        self.assertEqual(set(names), {p['Name'] for p in res})
+        self.assertGreater(len(rpc.urls), 1)
+        self.assertTrue(all(len(url) <= aur.MAX_INFO_URL_LENGTH for url in rpc.urls))
+
+    def test_get_info__names_encoded(self):
+        rpc = FakeRPC({'gtk+-git'})
+        self.assertEqual(['gtk+-git'], [p['Name'] for p in AURClient(rpc).get_info(['gtk+-git'])])
+
+    def test_get_info__chunk_retried(self):
+        rpc = FakeRPC({'yay'}, fails=1)
+        self.assertEqual(['yay'], [p['Name'] for p in AURClient(rpc).get_info(['yay'])])
+        self.assertEqual(2, len(rpc.urls))
+
+    def test_get_info__cached_names_not_requested_again(self):
+        rpc = FakeRPC({'yay', 'bauh'})
+        client = AURClient(rpc, info_cache=DefaultMemoryCache(60))
+
+        client.get_info(['yay', 'not-in-aur'])
+        res = client.get_info(['yay', 'not-in-aur', 'bauh'])
+
+        self.assertEqual(['yay', 'bauh'], [p['Name'] for p in res])
+        self.assertEqual(2, len(rpc.urls))
+        self.assertEqual([('arg[0]', 'bauh')], parse_qsl(urlparse(rpc.urls[1]).query)[2:])
+
+    def test_get_src_info__cached_by_package_base_and_last_modified(self):
+        rpc = FakeRPC(set())
+        client = AURClient(rpc, files_cache=DefaultMemoryCache(-1))
+
+        self.assertEqual({'pkgbase': 'foo', 'depends': ['git']}, client.get_src_info('foo-cli', 'foo', 10))
+        client.get_src_info('foo-gui', 'foo', 10)
+        self.assertEqual(1, len(rpc.urls))
+
+        client.get_src_info('foo-cli', 'foo', 20)  # modified
+        self.assertEqual(2, len(rpc.urls))
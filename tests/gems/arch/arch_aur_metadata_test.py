@@ -0,0 +1,98 @@
+import gzip
+import json
+import logging
+import shutil
+import tempfile
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from unittest import TestCase
+
+from bauh.api.http import HttpClient
+from bauh.gems.arch.aur import AURClient
+from bauh.gems.arch.metadata import AURMetadataStore
+
+PACKAGES = [{'ID': 1, 'Name': 'bauh', 'PackageBase': 'bauh', 'Version': '0.6.3-1', 'Description': 'Graphical interface for managing your applications', 'NumVotes': 20, 'Popularity': 2.5},
+            {'ID': 2, 'Name': 'bauh-staging', 'PackageBase': 'bauh-staging', 'Version': '0.7.0-1', 'Description': 'Staging version', 'NumVotes': 1, 'Popularity': 0.1},
+            {'ID': 3, 'Name': 'yay', 'PackageBase': 'yay', 'Version': '9.4.2-1', 'Description': 'Pacman wrapper and AUR helper', 'NumVotes': 1000, 'Popularity': 40},
+            {'ID': 4, 'Name': 'app-manager', 'PackageBase': 'app-manager', 'Version': '1.0-1', 'Description': 'Frontend for bauh', 'NumVotes': 5, 'Popularity': 1}]
+
+
+class MetadataHandler(BaseHTTPRequestHandler):
+    """
+    Serves the AUR metadata dump like the AUR does ( with ETag and Last-Modified validators )
+    """
+    etag = '"v1"'
+    requests = []
+
+    def do_GET(self):
+        MetadataHandler.requests.append(self.headers.get('If-None-Match'))
+
+        if self.headers.get('If-None-Match') == MetadataHandler.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = gzip.compress(json.dumps(PACKAGES).encode())
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', MetadataHandler.etag)
+        self.send_header('Last-Modified', 'Mon, 21 Oct 2019 10:00:00 GMT')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class AURMetadataStoreTest(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = HTTPServer(('127.0.0.1', 0), MetadataHandler)
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = 'http://127.0.0.1:{}/packages-meta-v1.json.gz'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        MetadataHandler.requests.clear()
+        self.logger = logging.getLogger('test')
+        self.http_client = HttpClient(self.logger, sleep=0)
+        self.dir = tempfile.mkdtemp()
+        self.store = AURMetadataStore(self.http_client, self.logger, url=self.url, path=self.dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_refresh__only_downloads_when_modified(self):
+        self.assertFalse(self.store.is_ready())
+        self.assertTrue(self.store.refresh())
+        self.assertTrue(self.store.is_ready())
+        self.assertEqual('9.4.2-1', self.store.get('yay')['Version'])
+
+        self.assertFalse(self.store.refresh())
+        self.assertEqual([None, '"v1"'], MetadataHandler.requests)
+
+    def test_load__saved_dump(self):
+        self.store.refresh()
+
+        store = AURMetadataStore(self.http_client, self.logger, url=self.url, path=self.dir)
+        self.assertTrue(store.load())
+        self.assertEqual({p['Name'] for p in PACKAGES}, {p['Name'] for p in store.get_info(p['Name'] for p in PACKAGES)[0]})
+        self.assertFalse(store.refresh())  # the validators were saved as well
+
+    def test_search__ranked(self):
+        self.store.refresh()
+        self.assertEqual(['bauh', 'bauh-staging', 'app-manager'], [p['Name'] for p in self.store.search(' Bauh')])
+        self.assertEqual(['bauh'], [p['Name'] for p in self.store.search('bauh', limit=1)])
+
+    def test_client__rpc_only_for_missing_packages(self):
+        self.store.refresh()
+        client = AURClient(self.http_client, self.store)
+        client.http_client = None  # no RPC request should be made
+
+        self.assertEqual(['bauh', 'yay'], [p['Name'] for p in client.get_info(['bauh', 'yay'])])
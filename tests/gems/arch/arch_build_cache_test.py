@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from bauh.gems.arch import build_cache
+from bauh.gems.arch.build_cache import BuildCache
+
+SRCINFO = 'pkgbase = foo\n\tpkgver = 1.0\n\tpkgrel = 2\n\tepoch = 1\n\npkgname = foo\n\npkgname = foo-docs\n'
+
+
+class BuildCacheTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_dir = self.temp_dir + '/foo'
+        os.makedirs(self.project_dir)
+        self._write('PKGBUILD', 'pkgbase=foo\npkgver=1.0\n')
+        self._write('.SRCINFO', SRCINFO)
+        self.cache = BuildCache(path=self.temp_dir + '/cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, file_name: str, content: str, project_dir: str = None):
+        with open('{}/{}'.format(project_dir or self.project_dir, file_name), 'w+') as f:
+            f.write(content)
+
+    def test_get_key__changes_with_pkgbuild(self):
+        key = self.cache.get_key(self.project_dir)
+        self.assertTrue(key.startswith('foo/1:1.0-2-'))
+
+        self._write('PKGBUILD', 'pkgbase=foo\npkgver=1.0\nsource=(changed)\n')
+        self.assertNotEqual(key, self.cache.get_key(self.project_dir))
+
+    def test_add_and_get(self):
+        key = self.cache.get_key(self.project_dir)
+        self.assertIsNone(self.cache.get(key, 'foo'))
+
+        for f in ('foo-1:1.0-2-x86_64.pkg.tar.xz', 'foo-docs-1:1.0-2-any.pkg.tar.xz', 'foo-1:1.0-2-x86_64.pkg.tar.xz.sig'):
+            self._write(f, 'built')
+
+        self.assertEqual(2, self.cache.add(key, self.project_dir))
+        self.assertTrue(self.cache.get(key, 'foo').endswith('/foo-1:1.0-2-x86_64.pkg.tar.xz'))
+        self.assertTrue(self.cache.get(key, 'foo-docs').endswith('/foo-docs-1:1.0-2-any.pkg.tar.xz'))
+
+    def test_is_package_of(self):
+        self.assertTrue(build_cache.is_package_of('foo-bar-1.0-1-any.pkg.tar.zst', 'foo-bar'))
+        self.assertFalse(build_cache.is_package_of('foo-bar-1.0-1-any.pkg.tar.zst', 'foo'))
+
+    def test_evict__least_recently_used(self):
+        self.cache.max_size = 10
+        keys = []
+
+        for version in ('1', '2'):
+            project_dir = '{}/foo-{}'.format(self.temp_dir, version)
+            os.makedirs(project_dir)
+            self._write('PKGBUILD', 'pkgver={}'.format(version), project_dir)
+            self._write('.SRCINFO', SRCINFO.replace('1.0', version), project_dir)
+            self._write('foo-{}-2-any.pkg.tar.xz'.format(version), '0123456789', project_dir)
+            keys.append(self.cache.get_key(project_dir))
+            self.cache.add(keys[-1], project_dir)
+
+        self.assertIsNone(self.cache.get(keys[0], 'foo'))
+        self.assertIsNotNone(self.cache.get(keys[1], 'foo'))
+        self.assertEqual(10, self.cache.get_size())
@@ -0,0 +1,129 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+from unittest import TestCase
+
+from bauh.gems.arch import pacman
+from bauh.gems.arch.database import LocalDatabase, FilesIndex, SyncDatabase
+
+RESOURCES_DIR = os.path.dirname(os.path.abspath(__file__)) + '/resources'
+
+
+class LocalDatabaseTest(TestCase):
+
+    def setUp(self):
+        self.db = LocalDatabase(RESOURCES_DIR + '/local')
+
+    def test_read(self):
+        pkgs = self.db.read()
+        self.assertEqual({'bauh', 'glibc', 'libfoo-git', 'linux', 'yay'}, {*pkgs.keys()})
+        self.assertEqual({'name': 'libfoo-git', 'version': '1:2.0.r10.g1a2b3c4-1', 'description': 'Foo: a library to test descriptions: with colons',
+                          'validation': ['none'], 'reason': 1}, pkgs['libfoo-git'])
+        self.assertEqual(['sha256', 'pgp'], pkgs['linux']['validation'])
+        self.assertEqual(0, pkgs['linux']['reason'])
+
+    def test_read__same_result_as_pacman_info(self):
+        with open(RESOURCES_DIR + '/pacman_qi.txt') as f:
+            expected = pacman.map_installed_info(f.readlines())
+
+        self.assertEqual({'bauh', 'libfoo-git', 'yay'}, {*expected['not_signed'].keys()})
+        self.assertEqual(expected, pacman.map_installed(self.db.read().values()))
+
+    def test_read__only_when_modified(self):
+        db_dir = tempfile.mkdtemp()
+        try:
+            shutil.copytree(RESOURCES_DIR + '/local/yay-9.4.2-1', db_dir + '/yay-9.4.2-1')
+            db = LocalDatabase(db_dir)
+            first = db.read()
+            self.assertIs(first, db.read())
+
+            shutil.copytree(RESOURCES_DIR + '/local/bauh-0.6.3-1', db_dir + '/bauh-0.6.3-1')
+            os.utime(db_dir, (0, db.get_mtime() + 1))
+            self.assertEqual({'yay', 'bauh'}, {*db.read().keys()})
+        finally:
+            shutil.rmtree(db_dir)
+
+
+    def test_is_installed__provided_names(self):
+        self.assertTrue(self.db.is_installed('libfoo-git'))
+        self.assertTrue(self.db.is_installed('libfoo'))
+        self.assertTrue(self.db.is_installed('libfoo.so'))
+        self.assertFalse(self.db.is_installed('libfo'))
+
+
+class FilesIndexTest(TestCase):
+
+    def setUp(self):
+        self.index = FilesIndex(LocalDatabase(RESOURCES_DIR + '/local'))
+
+    def test_get_files__desktop_entries(self):
+        self.assertEqual(['/usr/share/applications/bauh.desktop'], self.index.get_files({'bauh', 'yay', 'glibc'}, suffixes=('.desktop',)))
+
+    def test_get_files__icons(self):
+        self.assertEqual(['/usr/lib/python3.7/site-packages/bauh/view/resources/img/logo.svg', '/usr/share/icons/hicolor/scalable/apps/bauh.svg'],
+                         self.index.get_files(['bauh', 'yay'], suffixes=('.png', '.svg')))
+
+    def test_get_files__binaries(self):
+        self.assertEqual(['/usr/bin/bauh', '/usr/bin/yay'], self.index.get_files(['bauh', 'yay', 'linux'], prefix='/usr/bin/'))
+
+    def test_get_packages(self):
+        self.assertEqual({'bauh'}, self.index.get_packages('.desktop'))
+        self.assertEqual(set(), self.index.get_packages('.png'))
+
+    def test_read_files(self):
+        self.assertEqual(['/etc/', '/etc/mkinitcpio.d/', '/etc/mkinitcpio.d/linux.preset', '/usr/', '/usr/lib/modules/5.3.7-arch1-1/vmlinuz'],
+                         self.index.db.read_files('linux'))
+        self.assertEqual([], self.index.db.read_files('glibc'))
+
+
+class SyncDatabaseTest(TestCase):
+
+    def setUp(self):
+        self.db_dir = tempfile.mkdtemp()
+        self.db = SyncDatabase(self.db_dir, conf_path=self.db_dir + '/pacman.conf')
+
+        with open(self.db_dir + '/pacman.conf', 'w') as f:
+            f.write('[options]\nArchitecture = auto\n\n[testing]\nInclude = /etc/pacman.d/mirrorlist\n\n[core]\nInclude = /etc/pacman.d/mirrorlist\n')
+
+        self.write_db('core', {'linux': ['linux-api=5.3'], 'linux-lts': [], 'jre-openjdk': ['java-runtime=13']})
+        self.write_db('testing', {'linux': [], 'python-git': ['python-gitpython']})
+        self.write_db('community', {'jre11-openjdk': ['java-runtime=11'], 'linux-api': []})
+
+    def tearDown(self):
+        shutil.rmtree(self.db_dir)
+
+    def write_db(self, repo: str, pkgs: dict):
+        with tarfile.open('{}/{}.db'.format(self.db_dir, repo), 'w:gz') as tar:
+            for name, provides in pkgs.items():
+                desc = '%NAME%\n{}\n\n%VERSION%\n1.0-1\n\n'.format(name)
+
+                if provides:
+                    desc += '%PROVIDES%\n{}\n\n'.format('\n'.join(provides))
+
+                info = tarfile.TarInfo('{}-1.0-1/desc'.format(name))
+                info.size = len(desc.encode())
+                tar.addfile(info, io.BytesIO(desc.encode()))
+
+    def test_get_repositories(self):
+        self.assertEqual({'linux': 'testing', 'linux-lts': 'core', 'python-gitpython': 'testing', 'java-runtime': 'core', 'linux-api': 'community'},
+                         self.db.get_repositories(['linux', 'linux-lts', 'linux-l', 'python-gitpython', 'java-runtime', 'linux-api', 'git']))
+
+    def test_get_index__only_modified_databases_read(self):
+        index = self.db.get_index()
+        self.assertIs(index, self.db.get_index())
+
+        core = self.db._dbs['core']
+        self.write_db('community', {'yay': []})
+        os.utime(self.db_dir + '/community.db', (0, self.db._dbs['community'][0] + 1))
+
+        self.assertEqual('community', self.db.get_index()['yay'])
+        self.assertNotIn('jre11-openjdk', self.db.get_index())
+        self.assertIs(core, self.db._dbs['core'])
+
+    def test_get_index__unreadable_database(self):
+        with open(self.db_dir + '/broken.db', 'w') as f:
+            f.write('not a database')
+
+        self.assertIsNone(self.db.get_repositories(['linux']))
@@ -0,0 +1,115 @@
+import time
+from threading import Lock, Event
+from unittest import TestCase
+from unittest.mock import Mock
+
+from bauh.gems.arch import dependencies
+
+
+class BuildInOrderTest(TestCase):
+
+    def setUp(self):
+        # d depends on b and c, which depend on a. e is independent
+        self.graph = {'a': set(), 'b': {'a'}, 'c': {'a'}, 'd': {'b', 'c'}, 'e': set()}
+        self.installed = []
+        self.building, self.max_building = 0, 0
+        self.lock = Lock()
+
+    def _build(self, pkg: str):
+        with self.lock:
+            self.building += 1
+            self.max_building = max(self.building, self.max_building)
+
+        time.sleep(0.05)
+
+        with self.lock:
+            self.building -= 1
+
+        return pkg + '.pkg.tar.xz'
+
+    def _install(self, pkg: str, built: str) -> bool:
+        self.assertEqual(pkg + '.pkg.tar.xz', built)
+        self.installed.append(pkg)
+        return True
+
+    def _assert_order(self):
+        self.assertEqual(set(self.graph), set(self.installed))
+
+        for pkg, deps in self.graph.items():
+            for dep in deps:
+                self.assertLess(self.installed.index(dep), self.installed.index(pkg))
+
+    def test_build_in_order__parallel(self):
+        self.assertIsNone(dependencies.build_in_order(self.graph, self._build, self._install, 2))
+        self._assert_order()
+        self.assertEqual(2, self.max_building)
+
+    def test_build_in_order__sequential(self):
+        self.assertIsNone(dependencies.build_in_order(self.graph, self._build, self._install, 1))
+        self._assert_order()
+        self.assertEqual(1, self.max_building)
+
+    def test_build_in_order__failed_build(self):
+        res = dependencies.build_in_order(self.graph, lambda p: None if p == 'b' else self._build(p), self._install, 2)
+        self.assertEqual('b', res)
+        self.assertNotIn('d', self.installed)
+
+    def test_build_in_order__failed_build_cancels_the_others(self):
+        cancelled, gave_up = Event(), []
+
+        def _build(pkg: str):
+            if pkg == 'a':
+                return None
+
+            gave_up.append(cancelled.wait(1))
+            return None if cancelled.is_set() else self._build(pkg)
+
+        self.assertEqual('a', dependencies.build_in_order(self.graph, _build, self._install, 2, cancelled))
+        self.assertTrue(cancelled.is_set())
+        self.assertIn(gave_up, ([], [True]))  # 'e' was cancelled or gave up. No other build was started.
+        self.assertEqual([], self.installed)
+
+    def test_build_in_order__build_exception_handled_as_a_failure(self):
+        cancelled = Event()
+
+        def _build(pkg: str):
+            if pkg == 'a':
+                raise OSError()
+
+            cancelled.wait(1)
+            return None if cancelled.is_set() else self._build(pkg)
+
+        self.assertEqual('a', dependencies.build_in_order(self.graph, _build, self._install, 2, cancelled))
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual([], self.installed)
+
+    def test_group_by_base(self):
+        # 'foo' and 'foo-common' are split packages of 'foo-base'. 'foo' depends on 'foo-common'.
+        graph = {'foo': {'foo-common'}, 'foo-common': {'libbar'}, 'libbar': set(), 'app': {'foo', 'libbar'}}
+        base_graph, base_pkgs = dependencies.group_by_base(graph, {'foo': 'foo-base', 'foo-common': 'foo-base'})
+
+        self.assertEqual({'foo-base': {'libbar'}, 'libbar': set(), 'app': {'foo-base', 'libbar'}}, base_graph)
+        self.assertEqual({'foo-base': ['foo-common', 'foo'], 'libbar': ['libbar'], 'app': ['app']}, base_pkgs)
+
+    def test_build_watcher__output_printed_as_a_block(self):
+        watcher = Mock()
+        build_watcher = dependencies.BuildWatcher(watcher, Lock(), Event())
+        build_watcher.print('==> Making package: foo')
+        build_watcher.print('==> Finished making: foo')
+        watcher.print.assert_not_called()
+
+        build_watcher.flush()
+        self.assertEqual(['==> Making package: foo', '==> Finished making: foo'], [c[0][0] for c in watcher.print.call_args_list])
+
+        build_watcher.cancelled.set()
+        self.assertFalse(build_watcher.request_confirmation('title', 'body'))
+        watcher.request_confirmation.assert_not_called()
+
+    def test_build_in_order__cycle(self):
+        self.assertEqual('x', dependencies.build_in_order({'x': {'y'}, 'y': {'x'}}, self._build, self._install, 2))
+
+    def test_read_srcinfo_deps(self):
+        srcinfo = {'depends': ['python>=3.5', 'qt5-base'], 'makedepends': 'git', 'depends_x86_64': ['lib32-glibc']}
+        self.assertEqual({'python>=3.5', 'qt5-base', 'git'}, dependencies.read_srcinfo_deps(srcinfo, x86_64=False))
+        self.assertIn('lib32-glibc', dependencies.read_srcinfo_deps(srcinfo, x86_64=True))
+        self.assertEqual('python', dependencies.map_dep_name('python>=3.5'))
@@ -0,0 +1,50 @@
+import os
+from unittest import TestCase
+
+from bauh.gems.arch import disk
+from bauh.gems.arch.model import ArchPackage
+
+APPS_DIR = os.path.dirname(os.path.abspath(__file__)) + '/resources/applications'
+
+
+class ArchDiskTest(TestCase):
+
+    def test_map_by_basename__first_path_kept(self):
+        paths = ['/usr/share/icons/hicolor/48x48/apps/Foo.png', '/usr/share/icons/hicolor/scalable/apps/foo.svg', '/usr/share/doc/foo.txt']
+        self.assertEqual({'foo': '/usr/share/icons/hicolor/48x48/apps/Foo.png'}, disk.map_by_basename(paths, disk.ICON_SUFFIXES))
+        self.assertEqual({'foo.png': paths[0], 'foo.svg': paths[1], 'foo.txt': paths[2]}, disk.map_by_basename(paths))
+
+    def test_fill_icon_path__exact_match(self):
+        icons_map = disk.map_by_basename(['/usr/share/pixmaps/gtk+-app.svg', '/usr/share/pixmaps/bar.png'], disk.ICON_SUFFIXES)
+
+        pkg = ArchPackage(name='bar')
+        disk.fill_icon_path(pkg, icons_map, only_exact_match=True)
+        self.assertEqual('/usr/share/pixmaps/bar.png', pkg.icon_path)
+
+        pkg = ArchPackage(name='gtk-app')
+        pkg.icon_path = 'GTK+-app'
+        disk.fill_icon_path(pkg, icons_map, only_exact_match=True)
+        self.assertEqual('/usr/share/pixmaps/gtk+-app.svg', pkg.icon_path)
+
+        pkg = ArchPackage(name='baz')
+        disk.fill_icon_path(pkg, icons_map, only_exact_match=True)
+        self.assertIsNone(pkg.icon_path)
+
+    def test_read_desktop_entry__only_desktop_entry_group(self):
+        self.assertEqual({'Exec': '/usr/lib/firefox/firefox %u', 'Icon': 'firefox'}, disk.read_desktop_entry(APPS_DIR + '/firefox.desktop'))
+        self.assertEqual({'Exec': '"/opt/no icon/run"'}, disk.read_desktop_entry(APPS_DIR + '/no-icon.desktop'))
+
+    def test_fill_desktop_entries__parallel_chunks(self):
+        pkgs = []
+        for i in range(disk.DESKTOP_ENTRIES_CHUNK * 3 + 1):
+            p = ArchPackage(name='pkg{}'.format(i))
+            p.desktop_entry = APPS_DIR + ('/firefox.desktop' if i % 2 == 0 else '/no-icon.desktop')
+            pkgs.append(p)
+
+        progress = []
+        disk.fill_desktop_entries(pkgs, on_progress=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual((len(pkgs), len(pkgs)), progress[-1])
+        self.assertEqual(4, len(progress))
+        self.assertEqual(('/usr/lib/firefox/firefox %u', 'firefox'), (pkgs[0].command, pkgs[0].icon_path))
+        self.assertEqual(('/opt/no icon/run', None), (pkgs[1].command, pkgs[1].icon_path))
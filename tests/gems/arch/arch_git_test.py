@@ -0,0 +1,54 @@
+import os
+import shutil
+import subprocess
+import tempfile
+from unittest import TestCase
+
+from bauh.gems.arch import git
+
+
+class GitTest(TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.origin = self.temp_dir + '/origin'
+        os.makedirs(self.origin)
+        self._git('init', '--quiet')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, *args):
+        subprocess.run(['git', '-c', 'user.name=bauh', '-c', 'user.email=bauh@bauh', *args], cwd=self.origin, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _commit(self, pkgver: str):
+        with open(self.origin + '/.SRCINFO', 'w+') as f:
+            f.write('pkgbase = foo\n\tpkgver = {}\n\tpkgrel = 1\n'.format(pkgver))
+
+        self._git('add', '.SRCINFO')
+        self._git('commit', '--quiet', '-m', pkgver)
+
+    def test_read_history__fetched_incrementally(self):
+        repo_dir = self.temp_dir + '/clones/foo.git'
+        self._commit('1.0')
+        self._commit('1.1')
+
+        self.assertTrue(git.update_clone(self.origin, repo_dir))
+        self.assertEqual(['1.1', '1.0'], [c['content'].split('pkgver = ')[1].split('\n')[0] for c in git.read_history(repo_dir, '.SRCINFO')])
+
+        self._commit('2.0')
+        self.assertTrue(git.update_clone(self.origin, repo_dir))
+        history = git.read_history(repo_dir, '.SRCINFO')
+        self.assertEqual(3, len(history))
+        self.assertIn('pkgver = 2.0', history[0]['content'])
+
+        self.assertTrue(git.export(repo_dir, history[-1]['commit'], self.temp_dir + '/foo'))
+
+        with open(self.temp_dir + '/foo/.SRCINFO') as f:
+            self.assertIn('pkgver = 1.0', f.read())
+
+    def test_update_clone__invalid_url(self):
+        repo_dir = self.temp_dir + '/clones/bar.git'
+        self.assertFalse(git.update_clone(self.temp_dir + '/not_found', repo_dir))
+        self.assertFalse(os.path.exists(repo_dir))
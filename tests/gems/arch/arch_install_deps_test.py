@@ -0,0 +1,74 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from bauh.gems.arch.controller import ArchManager
+
+
+class I18n(dict):
+
+    def __missing__(self, key: str) -> str:
+        return key
+
+
+def new_manager() -> ArchManager:
+    context = Mock(disk_cache=False, i18n=I18n())
+
+    manager = ArchManager(context)
+    manager.build_jobs = 1
+    manager.aur_client = Mock()
+    manager.aur_client.get_info.side_effect = lambda names: [{'Name': n} for n in names]
+    manager._download_from_aur = Mock(side_effect=lambda pkgname, build_dir, handler, change_progress: '/tmp/{}'.format(pkgname))
+    manager._build_pkg = Mock(side_effect=lambda pkgname, *args, **kwargs: ['{}.pkg.tar.xz'.format(pkgname)])
+    manager._install = Mock(return_value=True)
+    manager._remove_build_dir = Mock()
+    return manager
+
+
+@patch('bauh.gems.arch.controller.pacman.install_from_mirrors_as_process')
+@patch('bauh.gems.arch.controller.SimpleProcess')
+class InstallDepsTest(TestCase):
+
+    def setUp(self):
+        self.manager = new_manager()
+        self.handler = Mock()
+        self.mirrors = {'b': 'core', 'a': 'extra', 'c': 'community', 'x': 'aur'}
+
+    def test_install_deps__repository_deps_in_a_single_transaction(self, simple_process: Mock, install_process: Mock):
+        simple_process.return_value.instance.stdout = [b'there is nothing to do\n']
+        self.handler.handle.return_value = True
+
+        not_installed = self.manager._install_deps({*self.mirrors}, self.mirrors, 'pwd', self.handler, aur_graph={'x': set()})
+
+        self.assertIsNone(not_installed)
+        simple_process.assert_called_once_with(['pacman', '-S', '--needed', 'a', 'b', 'c'], root_password='pwd', cwd='.')
+        install_process.assert_called_once_with(['a', 'b', 'c'], 'pwd')
+        self.handler.handle.assert_called_once_with(install_process.return_value)
+
+        # the AUR dependency is built and installed on its own
+        self.manager._build_pkg.assert_called_once()
+        self.assertEqual('x', self.manager._build_pkg.call_args[0][0])
+        self.manager._install.assert_called_once()
+        self.assertEqual(('x', 'aur', 'x.pkg.tar.xz'), tuple(self.manager._install.call_args[1][k] for k in ('pkgname', 'mirror', 'install_file')))
+
+    def test_install_deps__failed_transaction_reports_all_repository_deps(self, simple_process: Mock, install_process: Mock):
+        simple_process.return_value.instance.stdout = [b'there is nothing to do\n']
+        self.handler.handle.return_value = False
+
+        not_installed = self.manager._install_deps({*self.mirrors}, self.mirrors, 'pwd', self.handler, aur_graph={'x': set()})
+
+        self.assertEqual(['a', 'b', 'c'], not_installed)
+        install_process.assert_called_once_with(['a', 'b', 'c'], 'pwd')
+        self.manager._build_pkg.assert_not_called()  # nothing is built after the transaction fails
+
+    @patch('bauh.gems.arch.controller.message.show_deps_not_installed')
+    @patch('bauh.gems.arch.controller.confirmation.request_install_missing_deps', return_value=True)
+    @patch('bauh.gems.arch.controller.makepkg.check', return_value={'missing_deps': ['a>=1.0', 'b', 'c']})
+    def test_install_missing_deps__failure_shows_the_real_names(self, check: Mock, request_install: Mock, show_not_installed: Mock,
+                                                                simple_process: Mock, install_process: Mock):
+        simple_process.return_value.instance.stdout = [b'there is nothing to do\n']
+        self.handler.handle.return_value = False
+        self.manager._map_mirrors = Mock(return_value={d: self.mirrors[d] for d in ('a', 'b', 'c')})
+
+        self.assertFalse(self.manager._install_missings_deps_and_keys('foo', 'pwd', self.handler, '/tmp/foo'))
+        install_process.assert_called_once_with(['a', 'b', 'c'], 'pwd')
+        show_not_installed.assert_called_once_with(self.handler.watcher, 'foo', ['a', 'b', 'c'], self.manager.i18n)
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from bauh.gems.arch.index import NamesIndex
+
+
+class NamesIndexTest(TestCase):
+
+    def setUp(self):
+        self.index = NamesIndex(['python-foo-git', 'foo', 'foobar', 'lib32-foo', 'Foo.Bar-bin', 'bar', 'fo'])
+
+    def test_search__ranked(self):
+        self.assertEqual(['foo', 'foobar', 'Foo.Bar-bin', 'lib32-foo', 'python-foo-git'], self.index.search('foo'))
+
+    def test_search__normalized(self):
+        self.assertEqual(['foobar', 'Foo.Bar-bin'], self.index.search('Foo-Bar'))
+        self.assertEqual(['python-foo-git'], self.index.search('python_foo'))
+
+    def test_search__limit(self):
+        self.assertEqual(['foo', 'foobar'], self.index.search('foo', limit=2))
+        self.assertEqual(['fo', 'foo', 'foobar'], self.index.search('fo', limit=3))
+
+    def test_search__no_match(self):
+        self.assertEqual([], self.index.search('baz'))
+        self.assertEqual([], self.index.search(' '))
+
+    def test_update__added_and_removed(self):
+        self.index.update(added={'foo-cli'}, removed={'foobar'})
+        self.assertEqual(7, len(self.index))
+        self.assertEqual(['foo', 'foo-cli', 'Foo.Bar-bin', 'lib32-foo', 'python-foo-git'], self.index.search('foo'))
+        self.assertEqual({'python-foo-git', 'foo', 'foo-cli', 'lib32-foo', 'Foo.Bar-bin', 'bar', 'fo'}, self.index.get_names())
+
+    def test_update__rebuilt_when_many_removed(self):
+        self.index.update(added={'baz'}, removed={'foo', 'foobar', 'bar'})
+        self.assertEqual(0, self.index.removed)
+        self.assertEqual(['fo', 'Foo.Bar-bin', 'lib32-foo', 'python-foo-git'], self.index.search('fo'))
+        self.assertEqual(['baz'], self.index.search('baz'))
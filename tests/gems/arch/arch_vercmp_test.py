@@ -0,0 +1,20 @@
+import os
+from unittest import TestCase
+
+from bauh.gems.arch import vercmp
+
+FILE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class VercmpTest(TestCase):
+
+    def test_compare__vercmp_output(self):
+        with open(FILE_DIR + '/resources/vercmp.txt') as f:
+            cases = [l.split() for l in f.read().split('\n') if l and not l.startswith('#')]
+
+        for v1, v2, expected in cases:
+            self.assertEqual(int(expected), vercmp.compare(v1, v2), '{} {}'.format(v1, v2))
+            self.assertEqual(-int(expected), vercmp.compare(v2, v1), '{} {}'.format(v2, v1))
+
+    def test_compare_many(self):
+        self.assertEqual([-1, 0, 1], vercmp.compare_many([('1.0-1', '1.0-2'), ('1:2.0', '1:2.0'), ('1:1.0', '2.0')]))
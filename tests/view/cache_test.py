@@ -0,0 +1,127 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from bauh.view.util.cache import DefaultMemoryCache, DefaultMemoryCacheFactory
+
+
+class Clock:
+
+    def __init__(self, now: float = 100):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class DefaultMemoryCacheTest(TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.time_patch = patch('bauh.view.util.cache.time.monotonic', self.clock)
+        self.time_patch.start()
+
+    def tearDown(self):
+        self.time_patch.stop()
+
+    def test_add__least_recently_used_evicted(self):
+        cache = DefaultMemoryCache(expiration_time=-1, max_entries=3)
+
+        for key in ('a', 'b', 'c'):
+            cache.add(key, key.upper())
+
+        self.assertEqual('A', cache.get('a'))  # 'b' becomes the least recently used
+        cache.add('d', 'D')
+
+        self.assertEqual({'a', 'c', 'd'}, cache.keys())
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.evictions)
+
+    def test_add__max_bytes(self):
+        cache = DefaultMemoryCache(expiration_time=-1, max_bytes=10)
+        cache.add('a', b'1234')
+        cache.add('b', {'name': 'abc', 'icons': [b'12']})
+        self.assertEqual(9, cache.get_stats()['bytes'])
+
+        cache.add('a', b'12')  # replaced
+        self.assertEqual(7, cache.get_stats()['bytes'])
+
+        cache.add('c', '12345')
+        self.assertEqual({'a', 'c'}, cache.keys())
+        self.assertEqual(7, cache.get_stats()['bytes'])
+
+        cache.delete('a')
+        self.assertEqual(5, cache.get_stats()['bytes'])
+
+    def test_no_limits(self):
+        for limit in (None, 0, -1):
+            cache = DefaultMemoryCache(expiration_time=-1, max_entries=limit, max_bytes=limit)
+
+            for n in range(100):
+                cache.add(str(n), b'x' * 100)
+
+            self.assertEqual(100, len(cache.keys()))
+            self.assertEqual(0, cache.evictions)
+
+    def test_get__expired_key(self):
+        cache = DefaultMemoryCache(expiration_time=10)
+        cache.add('a', 'A')
+
+        self.clock.now += 9
+        self.assertEqual('A', cache.get('a'))
+
+        self.clock.now += 1
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(set(), cache.keys())
+
+    def test_clean_expired__only_expired_keys(self):
+        cache = DefaultMemoryCache(expiration_time=10)
+        cache.add('a', 'A')
+        self.clock.now += 5
+        cache.add('b', 'B')
+        self.clock.now += 4
+        cache.add('a', 'A2')  # re-added: expires later than its first heap entry
+
+        self.clock.now += 2
+        cache.clean_expired()
+        self.assertEqual({'a', 'b'}, cache.keys())  # the first expiration of 'a' is ignored
+
+        self.clock.now += 4
+        cache.clean_expired()
+        self.assertEqual({'a'}, cache.keys())
+
+        self.clock.now += 4
+        cache.clean_expired()
+        self.assertEqual(set(), cache.keys())
+        self.assertEqual([], cache._expirations)
+
+    def test_clean_expired__heap_compacted(self):
+        cache = DefaultMemoryCache(expiration_time=10)
+
+        for n in range(200):
+            cache.add('a', n)  # every addition pushes a new heap entry
+
+        cache.clean_expired()
+        self.assertEqual(1, len(cache._expirations))
+
+    def test_get_stats__counters(self):
+        cache = DefaultMemoryCache(expiration_time=-1, max_entries=1)
+        cache.add('a', 'A')
+        cache.get('a')
+        cache.get('b')
+        cache.add('b', 'B')
+        cache.get('a')
+
+        self.assertEqual({'entries': 1, 'bytes': 0, 'hits': 1, 'misses': 2, 'evictions': 1}, cache.get_stats())
+
+
+class DefaultMemoryCacheFactoryTest(TestCase):
+
+    def test_new__default_max_entries(self):
+        factory = DefaultMemoryCacheFactory(expiration_time=60, cleaner=Mock(), max_entries=10)
+        self.assertEqual(10, factory.new().max_entries)
+        self.assertEqual(2, factory.new(max_entries=2).max_entries)
+
+    def test_new__no_limit(self):
+        for max_entries in (None, 0, -1):
+            factory = DefaultMemoryCacheFactory(expiration_time=60, cleaner=Mock(), max_entries=max_entries)
+            self.assertIsNone(factory.new().max_entries)
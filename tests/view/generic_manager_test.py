@@ -0,0 +1,116 @@
+import logging
+import time
+from argparse import Namespace
+from threading import Event
+from unittest import TestCase
+from unittest.mock import Mock
+
+from bauh.api.abstract.controller import SearchResult
+from bauh.view.core.controller import GenericSoftwareManager
+
+
+class FakeManager:
+    """
+    Returns the given packages after 'delay' seconds, filling them through the disk loader
+    """
+
+    def __init__(self, pkgs: list, delay: float = 0):
+        self.pkgs = pkgs
+        self.delay = delay
+        self.calls = 0
+        self.released = Event()
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def can_work(self) -> bool:
+        return True
+
+    def get_managed_types(self) -> set:
+        return {self.__class__}
+
+    def get_hosts(self) -> set:
+        return {self.__class__.__name__.lower() + '.org'}
+
+    def read_installed(self, disk_loader, pkg_types, internet_available) -> SearchResult:
+        self.calls += 1
+        self.released.wait(self.delay)
+
+        for pkg in self.pkgs:
+            disk_loader.fill(pkg)
+
+        return SearchResult([*self.pkgs], None, len(self.pkgs))
+
+    def search(self, words: str, disk_loader) -> SearchResult:
+        self.calls += 1
+        self.released.wait(self.delay)
+        return SearchResult([], [Namespace(name=n) for n in self.pkgs], len(self.pkgs))
+
+
+class FastManager(FakeManager):
+    pass
+
+
+class SlowManager(FakeManager):
+    pass
+
+
+def new_generic_manager(managers: list, gem_timeout: float = 5) -> GenericSoftwareManager:
+    context = Mock(logger=logging.getLogger(__name__))
+    context.internet_checker.is_available.return_value = True
+    context.disk_loader_factory.new.return_value.filled = []
+    context.disk_loader_factory.new.return_value.fill.side_effect = context.disk_loader_factory.new.return_value.filled.append
+    return GenericSoftwareManager(managers, context, Namespace(check_packaging_once=False, gem_timeout=gem_timeout))
+
+
+class GenericSoftwareManagerTest(TestCase):
+
+    def test_read_installed__managers_read_concurrently(self):
+        managers = [SlowManager(['slow'], 0.3), FastManager(['fast'], 0.3)]
+        generic = new_generic_manager(managers)
+
+        ti = time.time()
+        res = generic.read_installed()
+
+        self.assertLess(time.time() - ti, 0.55)
+        self.assertEqual(['slow', 'fast'], res.installed)  # following the managers order
+        self.assertEqual(2, res.total)
+        self.assertEqual({'SlowManager', 'FastManager'}, {*res.timings.keys()})
+        self.assertTrue(all(t >= 0.3 for t in res.timings.values()))
+
+    def test_init__internet_probe_hosts_from_enabled_managers(self):
+        generic = new_generic_manager([SlowManager([]), FastManager([])])
+        generic.context.internet_checker.set_hosts.assert_called_once_with({'slowmanager.org', 'fastmanager.org'})
+
+    def test_read_installed__manager_timed_out_ignored(self):
+        slow, fast = SlowManager(['slow'], 5), FastManager(['fast'])
+        generic = new_generic_manager([slow, fast], gem_timeout=0.2)
+        disk_loader = generic.disk_loader_factory.new()
+
+        try:
+            res = generic.read_installed()
+            self.assertEqual(['fast'], res.installed)
+            self.assertEqual({'FastManager'}, {*res.timings.keys()})
+
+            # the slow manager is still reading: it is not called again
+            self.assertEqual(['fast'], generic.read_installed().installed)
+            self.assertEqual(1, slow.calls)
+            self.assertEqual(2, fast.calls)
+        finally:
+            slow.released.set()
+
+        generic._reading_installed[slow].join(1)
+        self.assertNotIn('slow', disk_loader.filled)  # filled after the timeout
+        self.assertEqual(['fast', 'fast'], disk_loader.filled)
+
+    def test_search__partial_results_sorted(self):
+        managers = [SlowManager(['firefox', 'firefox-beta'], 0.3), FastManager(['firefox-esr', 'abc'])]
+        generic = new_generic_manager(managers)
+        partials = []
+
+        res = generic.search('Firefox ', on_partial=lambda r: partials.append([p.name for p in r.new]))
+
+        # exact name matches first, then the names containing the word and then the others
+        self.assertEqual([['firefox-esr', 'abc'], ['firefox', 'firefox-beta', 'firefox-esr', 'abc']], partials)
+        self.assertEqual(['firefox', 'firefox-beta', 'firefox-esr', 'abc'], [p.name for p in res.new])
+        self.assertEqual(4, res.total)